@@ -0,0 +1,75 @@
+# Bytes-per-sample and CPU-per-frame for JSON vs binary sensors frames.
+#
+#   python -m bench.framing [--n 20000] [--baud 115200]
+#
+# CPU numbers are for the Pi side (CPython). The Pico encoder is the same
+# algorithm, so the ratio carries over even though absolute times don't.
+
+import argparse
+import json
+import time
+
+from tcd1 import binproto
+
+
+def sample(i: int) -> dict:
+    return {
+        "pump_pressure_bar": 1.0 + 0.01 * (i % 7),
+        "bus_voltage_v": 24.016194,
+        "canister_mass_kg": 1.5 - 0.0009 * i,
+        "sump_mass_kg": 0.2 + 0.0009 * i,
+        "tank1_mass_kg": 5.0,
+        "tank2_mass_kg": 5.0,
+        "pump_current_a": 1.0,
+        "dv_current_a": 0.2,
+        "stream_hz": 50.0,
+        "job": "drain_canister_to_sump",
+        "sim_tick": 88548 + i,
+        "scenario": "",
+    }
+
+
+def bench(name: str, encode, decode, msgs: list, baud: int) -> None:
+    t0 = time.perf_counter()
+    frames = [encode(m, i) for i, m in enumerate(msgs)]
+    t1 = time.perf_counter()
+    for f in frames:
+        decode(f)
+    t2 = time.perf_counter()
+
+    n = len(msgs)
+    size = sum(len(f) for f in frames) / n
+    max_hz = baud / 10.0 / size  # 8N1 = 10 bits per byte
+    print(
+        f"{name:6s} {size:7.1f} B/sample  "
+        f"enc {1e6 * (t1 - t0) / n:6.2f} us  dec {1e6 * (t2 - t1) / n:6.2f} us  "
+        f"max {max_hz:6.1f} Hz @ {baud}"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20000)
+    ap.add_argument("--baud", type=int, default=115200)
+    args = ap.parse_args()
+
+    msgs = [{"type": "sensors", "data": sample(i)} for i in range(args.n)]
+
+    bench(
+        "json",
+        lambda m, i: (json.dumps(m) + "\n").encode(),
+        lambda f: json.loads(f.decode()),
+        msgs,
+        args.baud,
+    )
+    bench(
+        "binary",
+        binproto.encode_msg,
+        lambda f: binproto.decode_frame(f[:-1]),
+        msgs,
+        args.baud,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# End-to-end serial path against pico_sim on CPython (pico_pty.py): PicoLink
+# on one side of a pty, the unmodified sim on the other.
+#
+#   python -m bench.pico_pty [--calls 500] [--hz 100] [--batch 1 5] [--seconds 5]
+#
+# Command RTT (heartbeat, one at a time and max_inflight at once), then the
+# sensor stream for each batch size: samples/s received against the asked
+# rate (single frames are capped at 50 Hz by the sim), drops/duplicates seen by the host, and the sim's own tick_stats.
+# Absolute numbers are for this box's CPython, not a Pico; the point is
+# comparing changes on either side of the link under load.
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from tcd1.actions.data_collect import start_stream, stop_stream
+from tcd1.actions.heartbeat import heartbeat
+from tcd1.actions.tick_stats import tick_stats
+from tcd1.pico_link import PicoLink
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def pct(xs: list, q: float) -> float:
+    xs = sorted(xs)
+    return xs[int(q * (len(xs) - 1))]
+
+
+async def rtt(pico: PicoLink, calls: int) -> None:
+    lat = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        await heartbeat(pico)
+        lat.append(1e6 * (time.perf_counter() - t0))
+    print(f"heartbeat serial     {calls:6d} calls  p50 {statistics.median(lat):8.0f} us  p99 {pct(lat, 0.99):8.0f} us")
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(heartbeat(pico) for _ in range(calls)))
+    dt = time.perf_counter() - t0
+    print(f"heartbeat concurrent {calls:6d} calls  {calls / dt:8.0f} calls/s")
+
+
+async def stream(pico: PicoLink, hz: float, batch: int, seconds: float) -> None:
+    await tick_stats(pico, reset=True)
+    st0 = dict(pico.metrics.stream.snapshot())
+    on = await start_stream(pico, hz, batch)
+    await asyncio.sleep(seconds)
+    await stop_stream(pico)
+    await asyncio.sleep(0.2)
+    st = pico.metrics.stream.snapshot()
+    ticks = await tick_stats(pico)
+
+    n = st["samples"] - st0["samples"]
+    print(
+        f"stream {hz:5.0f} Hz batch {batch:3d} (sim: {on.get('hz', hz):g} Hz)  {n / seconds:8.1f} samples/s  "
+        f"dropped {st['dropped'] - st0['dropped']}  dup {st['duplicates'] - st0['duplicates']}  "
+        f"sim late {ticks['late_ticks']}/{ticks['ticks']} overruns {ticks['overruns']} "
+        f"jitter {ticks['jitter_rms_us']} us work max {ticks['work_max_us']} us"
+    )
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--calls", type=int, default=500)
+    ap.add_argument("--hz", type=float, default=100.0)
+    ap.add_argument("--batch", type=int, nargs="+", default=[1, 5])
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--framing", choices=["bin", "json"], default="bin")
+    args = ap.parse_args()
+
+    link = os.path.join(tempfile.mkdtemp(), "ttyPICO")
+    sim = subprocess.Popen([sys.executable, os.path.join(HERE, "pico_pty.py"), "--link", link], stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(50):
+            if os.path.exists(link):
+                break
+            await asyncio.sleep(0.1)
+        pico = PicoLink(link, reconnect=False)
+        rx = asyncio.create_task(pico.rx_task())
+        await heartbeat(pico)  # ready
+        print("framing", await pico.negotiate_framing(args.framing))
+
+        await rtt(pico, args.calls)
+        for b in args.batch:
+            await stream(pico, args.hz, b, args.seconds)
+
+        rx.cancel()
+        await asyncio.gather(rx, return_exceptions=True)
+        pico.close()
+    finally:
+        sim.terminate()
+        sim.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
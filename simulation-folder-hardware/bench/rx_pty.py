@@ -0,0 +1,118 @@
+# PicoLink receive path: frames/s and per-frame latency over a pty pair.
+#
+#   python -m bench.rx_pty [--frames 20000] [--hz 200]
+#
+# "legacy" is the old rx loop (to_thread(readline) + 10 ms sleep when idle),
+# "fd" is the current add_reader path. A writer thread plays the Pico on the
+# pty master; each frame carries its send time so latency is send -> dispatch.
+
+import argparse
+import asyncio
+import json
+import os
+import pty
+import statistics
+import threading
+import time
+import tty
+from typing import Any, Dict
+
+from tcd1.pico_link import PicoLink
+
+
+class _Probe:
+    """Mixin recording dispatch times of bench frames."""
+
+    def _bench_init(self, n: int) -> None:
+        self.lat_us: list[float] = []
+        self.n_expected = n
+        self.all_rx = asyncio.Event()
+
+    def _dispatch(self, msg: Dict[str, Any], nbytes: int = 0) -> None:
+        super()._dispatch(msg, nbytes)  # type: ignore[misc]
+        if msg.get("type") == "sensors":
+            t_send = msg["data"].get("t_send_ns")
+            if t_send is not None:
+                self.lat_us.append((time.monotonic_ns() - t_send) / 1000.0)
+            if len(self.lat_us) >= self.n_expected:
+                self.all_rx.set()
+
+
+class FdLink(_Probe, PicoLink):
+    pass
+
+
+class LegacyLink(_Probe, PicoLink):
+    async def rx_task(self) -> None:
+        try:
+            while True:
+                line = await asyncio.to_thread(self.ser.readline)
+                if not line:
+                    await asyncio.sleep(0.01)
+                    continue
+                try:
+                    msg = json.loads(line.decode(errors="ignore"))
+                except Exception:
+                    continue
+                if isinstance(msg, dict):
+                    self._dispatch(msg)
+        except asyncio.CancelledError:
+            pass
+
+
+def writer(fd: int, n: int, hz: float) -> None:
+    period = 1.0 / hz if hz > 0 else 0.0
+    t_next = time.monotonic()
+    for i in range(n):
+        if period:
+            t_next += period
+            delay = t_next - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        data = {"sim_tick": i, "pump_pressure_bar": 1.0, "bus_voltage_v": 24.0, "t_send_ns": time.monotonic_ns()}
+        os.write(fd, (json.dumps({"type": "sensors", "data": data}) + "\n").encode())
+
+
+async def run(cls, n: int, hz: float) -> None:
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    link = cls(os.ttyname(slave))
+    link._bench_init(n)
+    rx = asyncio.create_task(link.rx_task())
+
+    t0 = time.perf_counter()
+    th = threading.Thread(target=writer, args=(master, n, hz), daemon=True)
+    th.start()
+    try:
+        await asyncio.wait_for(link.all_rx.wait(), timeout=max(10.0, 3.0 * n / max(hz, 1.0)))
+    except asyncio.TimeoutError:
+        pass
+    dt = time.perf_counter() - t0
+
+    rx.cancel()
+    await asyncio.gather(rx, return_exceptions=True)
+    link.close()
+    os.close(master)
+    os.close(slave)
+
+    lat = sorted(link.lat_us) or [float("nan")]
+    mode = "burst" if hz <= 0 else f"{hz:.0f} Hz"
+    print(
+        f"{cls.__name__:10s} {mode:>8s}  rx {len(link.lat_us):6d}/{n}  {len(link.lat_us) / dt:9.0f} frames/s  "
+        f"latency p50 {statistics.median(lat):8.1f} us  p99 {lat[int(0.99 * (len(lat) - 1))]:8.1f} us"
+    )
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--frames", type=int, default=20000)
+    ap.add_argument("--hz", type=float, default=200.0, help="paced rate for the latency run")
+    args = ap.parse_args()
+
+    for cls in (LegacyLink, FdLink):
+        await run(cls, args.frames, 0.0)
+        await run(cls, max(1, int(args.hz * 5)), args.hz)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
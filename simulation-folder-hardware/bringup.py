@@ -1,12 +1,17 @@
 import argparse
 import asyncio
+import json
 import time
 from typing import Optional
 
 from tcd1.config import FailCriteria, TestConfig
+from tcd1.daemon import DEFAULT_SOCKET
+from tcd1.daemon_link import DaemonLink
+from tcd1.discovery import find_port
 from tcd1.logger import CsvLogger
 from tcd1.pico_link import PicoLink
-from tcd1.safety import check_pico_stream, check_rig_limits, safe_stop_pico
+from tcd1.liveness import LivenessManager
+from tcd1.safety import check_link_health, check_pico_stream, check_rig_limits, safe_stop_pico
 from tcd1.actions.heartbeat import heartbeat
 from tcd1.actions.data_collect import start_stream, snapshot, stop_stream
 from tcd1.actions.drain_canister import drain_canister_to_sump
@@ -22,11 +27,7 @@ def default_fail() -> FailCriteria:
 
 
 async def wait_for_data(pico: PicoLink, t: float = 5.0) -> None:
-    t0 = time.monotonic()
-    while not pico.latest:
-        if time.monotonic() - t0 > t:
-            raise RuntimeError("No sensor data")
-        await asyncio.sleep(0.05)
+    await pico.wait_for(lambda s: True, t, label="sensor data")
 
 
 async def wait_pico_ready(pico: PicoLink, t: float = 5.0) -> None:
@@ -46,27 +47,25 @@ async def wait_pico_ready(pico: PicoLink, t: float = 5.0) -> None:
     raise RuntimeError(f"Pico not responding after {t:.1f}s (last error: {last_err!r})")
 
 
-async def heartbeat_task(pico: PicoLink, period_s: float = 0.5) -> None:
-    try:
-        while True:
-            try:
-                await heartbeat(pico)
-            except Exception:
-                pass
-            await asyncio.sleep(period_s)
-    except asyncio.CancelledError:
-        pass
-
-
 async def main() -> None:
     ap = argparse.ArgumentParser()
     ap.add_argument("--mode", choices=["monitor", "drain-canister", "drain-sump", "snapshot"], default="monitor")
     ap.add_argument("--port", default="auto")
     ap.add_argument("--baud", type=int, default=115200)
+    ap.add_argument("--daemon", nargs="?", const=DEFAULT_SOCKET, default="", help="Go through the rig daemon (optionally its socket path) instead of opening the port")
+    ap.add_argument("--rediscover", action="store_true", help="With --port auto: probe all ports instead of using the cached one")
+    ap.add_argument("--no-reconnect", action="store_true", help="Give up when the Pico serial port drops")
+    ap.add_argument("--pending-policy", choices=["fail", "retry"], default="fail", help="Calls in flight when the port drops: fail them or resend after reconnect")
+    ap.add_argument("--framing", choices=["bin", "json"], default="bin", help="Pico->Pi framing (falls back to json)")
     ap.add_argument("--ev", choices=["ev1", "ev2"], default="ev1")
     ap.add_argument("--dest", choices=["TANK1", "TANK2"], default="TANK2")
     ap.add_argument("--stream-hz", type=float, default=10.0)
+    ap.add_argument("--stream-batch", type=int, default=1, help="Samples per sensors_batch frame (1 = one frame per sample)")
+    ap.add_argument("--keyframe-s", type=float, default=0.0, help="Delta stream: full frame every N s, changed fields in between (0 = off)")
     ap.add_argument("--print-hz", type=float, default=2.0)
+    ap.add_argument("--quiet-s", type=float, default=1.0, help="Heartbeat only after this long without any controller traffic")
+    ap.add_argument("--sync-every", type=float, default=10.0, help="Heartbeat at least this often for clock sync (0 = only when quiet)")
+    ap.add_argument("--metrics-every", type=float, default=10.0, help="Monitor: print link metrics every N s (0 = off)")
     ap.add_argument("--logcsv", default="")
     ap.add_argument("--stable-eps", type=float, default=0.01)
     ap.add_argument("--stable-time", type=float, default=2.0)
@@ -74,13 +73,18 @@ async def main() -> None:
     ap.add_argument("--no-stream", action="store_true", help="Do not start streaming automatically")
     args = ap.parse_args()
 
-    port = PicoLink.auto_port() if args.port == "auto" else args.port
-    if not port:
-        raise RuntimeError("No Pico port found (use --port or check connection)")
-
-    pico = PicoLink(port, args.baud)
+    if args.daemon:
+        # port, framing, stream and clock sync belong to the daemon
+        pico = DaemonLink(args.daemon)
+        await pico.start()
+        sync_every = None
+    else:
+        port = await find_port(args.baud, use_cache=not args.rediscover) if args.port == "auto" else args.port
+        pico = PicoLink(port, args.baud, reconnect=not args.no_reconnect, pending_policy=args.pending_policy)
+        sync_every = args.sync_every or None
     rx = asyncio.create_task(pico.rx_task())
-    hb = asyncio.create_task(heartbeat_task(pico, 0.5))
+    live = LivenessManager(pico, quiet_s=args.quiet_s, sync_every_s=sync_every)
+    hb = asyncio.create_task(live.run())
 
     logger: Optional[CsvLogger] = CsvLogger(args.logcsv) if args.logcsv else None
     cfg = default_cfg()
@@ -95,10 +99,13 @@ async def main() -> None:
         if pico.hello:
             print("[HELLO]", pico.hello)
 
-        # Start stream unless disabled
-        if not args.no_stream:
+        if not args.daemon:
+            print("[FRAMING]", await pico.negotiate_framing(args.framing))
+
+        # Start stream unless disabled (the daemon already streams for everyone)
+        if not args.no_stream and not args.daemon:
             try:
-                await start_stream(pico, args.stream_hz)
+                await start_stream(pico, args.stream_hz, args.stream_batch, args.keyframe_s)
             except Exception:
                 pass
 
@@ -108,12 +115,18 @@ async def main() -> None:
         elif args.mode == "monitor":
             await wait_for_data(pico)
             period = 1.0 / max(0.2, args.print_hz)
+            next_metrics = time.monotonic() + args.metrics_every
             while True:
+                check_link_health(live)
                 check_pico_stream(pico, crit)
                 check_rig_limits(pico, crit)
                 print(pico.latest)
                 if logger:
-                    logger.log(pico.latest)
+                    ts, ts_err = pico.sample_time(pico.latest)
+                    logger.log({"ts": ts, "ts_err_ms": "" if ts_err is None else round(1000.0 * ts_err, 3), **pico.latest})
+                if args.metrics_every > 0 and time.monotonic() >= next_metrics:
+                    print("[METRICS]", json.dumps(pico.metrics_snapshot()))
+                    next_metrics += args.metrics_every
                 await asyncio.sleep(period)
 
         elif args.mode == "drain-canister":
@@ -144,13 +157,18 @@ async def main() -> None:
             print("[DONE]", res)
 
     finally:
-        # Stop stream if possible (optional)
-        try:
-            await stop_stream(pico)
-        except Exception:
-            pass
+        # Stop stream if possible (optional); a daemon client only stops what it started
+        if not args.daemon:
+            try:
+                await stop_stream(pico)
+            except Exception:
+                pass
 
-        await safe_stop_pico(pico)
+        if not args.daemon or args.mode.startswith("drain"):
+            await safe_stop_pico(pico)
+        if args.keyframe_s > 0:
+            print("[STREAM]", pico.stream_stats())
+        print("[LIVENESS]", live.report())
         if logger:
             logger.close()
         hb.cancel()
@@ -22,12 +22,20 @@ from typing import Any, Dict, Optional
 
 import can
 
+from bringup import default_fail
+from tcd1.config import FailCriteria
+from tcd1.daemon import DEFAULT_SOCKET
+from tcd1.daemon_link import DaemonLink
+from tcd1.discovery import find_port
 from tcd1.pico_link import PicoLink
 from tcd1.actions.heartbeat import heartbeat
 from tcd1.actions.data_collect import start_stream, stop_stream, snapshot
+from tcd1.actions.noise import set_noise
+from tcd1.actions.scenario import set_scenario
 from tcd1.actions.drain_canister import drain_canister_to_sump
 from tcd1.actions.drain_sump import drain_sump_to_tank
-from tcd1.safety import safe_stop_pico
+from tcd1.liveness import LivenessManager
+from tcd1.safety import check_link_health, check_pico_stream, check_rig_limits, safe_stop_pico
 
 
 # ---- CAN constants (match your sm_logic.py) ----
@@ -44,15 +52,19 @@ def clean_id(msg: can.Message) -> int:
     return msg.arbitration_id & 0x1FFFFFFF
 
 
-def heartbeat_row(latest: Dict[str, Any]) -> Dict[str, Any]:
+def heartbeat_row(latest: Dict[str, Any], ts: Optional[float] = None, ts_err: Optional[float] = None) -> Dict[str, Any]:
     """
     Heartbeat schema requested:
     Timestamp, canister mass, sump mass, pump voltage, pump current,
     dv voltage, dv current, ev1 status (boolean)
+
+    Timestamp is when the Pico sampled (ts, from PicoLink.sample_time) with
+    its error bound; without one it falls back to now.
     """
     bus_v = latest.get("bus_voltage_v")
     return {
-        "Timestamp": now_ts(),
+        "Timestamp": now_ts() if ts is None else ts,
+        "Timestamp_err_ms": "" if ts_err is None else round(1000.0 * ts_err, 3),
         "canister_mass": latest.get("canister_mass_kg"),
         "sump_mass": latest.get("sump_mass_kg"),
         "pump_voltage": latest.get("pump_voltage_v", bus_v),
@@ -66,6 +78,7 @@ def heartbeat_row(latest: Dict[str, Any]) -> Dict[str, Any]:
 class HeartbeatCsvLogger:
     FIELDNAMES = [
         "Timestamp",
+        "Timestamp_err_ms",
         "canister_mass",
         "sump_mass",
         "pump_voltage",
@@ -123,20 +136,11 @@ async def wait_pico_ready(pico: PicoLink, t: float = 5.0) -> None:
     raise RuntimeError(f"Pico not responding after {t:.1f}s (last error: {last_err!r})")
 
 
-async def heartbeat_keepalive_task(pico: PicoLink, period_s: float = 0.5) -> None:
-    """
-    Keepalive so PicoLink stays responsive and we detect failures quickly.
-    This is NOT the 10s CSV heartbeat log.
-    """
-    try:
-        while True:
-            try:
-                await heartbeat(pico)
-            except Exception:
-                pass
-            await asyncio.sleep(period_s)
-    except asyncio.CancelledError:
-        pass
+def check_step(pico, live: LivenessManager, crit: FailCriteria) -> None:
+    # before each Pico step: link alive, stream fresh, readings within limits
+    check_link_health(live)
+    check_pico_stream(pico, crit)
+    check_rig_limits(pico, crit)
 
 
 async def heartbeat_csv_task(
@@ -152,7 +156,7 @@ async def heartbeat_csv_task(
     try:
         while True:
             if pico.latest:
-                row = heartbeat_row(pico.latest)
+                row = heartbeat_row(pico.latest, *pico.sample_time(pico.latest))
 
                 if hb_csv:
                     hb_csv.log(row)
@@ -165,23 +169,6 @@ async def heartbeat_csv_task(
         pass
 
 
-async def wait_until(
-    pico: PicoLink,
-    predicate,
-    timeout_s: float,
-    poll_s: float = 0.05,
-    label: str = "condition",
-):
-    t0 = time.monotonic()
-    last = None
-    while time.monotonic() - t0 < timeout_s:
-        last = pico.latest
-        if last and predicate(last):
-            return last
-        await asyncio.sleep(poll_s)
-    raise RuntimeError(f"Timeout waiting for {label} after {timeout_s:.1f}s (last={last})")
-
-
 def can_send(channel: str, arb_id: int, data: bytes = b"") -> None:
     bus = can.interface.Bus(channel=channel, interface="socketcan", receive_own_messages=True)
     try:
@@ -220,9 +207,18 @@ async def main() -> None:
     ap = argparse.ArgumentParser()
 
     # Pico serial
-    ap.add_argument("--port", default="/dev/ttyACM0")
+    ap.add_argument("--port", default="/dev/ttyACM0", help="Serial port, or 'auto' to discover the Pico by hello")
     ap.add_argument("--baud", type=int, default=115200)
+    ap.add_argument("--daemon", nargs="?", const=DEFAULT_SOCKET, default="", help="Go through the rig daemon (optionally its socket path) instead of opening the port")
+    ap.add_argument("--rediscover", action="store_true", help="With --port auto: probe all ports instead of using the cached one")
+    ap.add_argument("--no-reconnect", action="store_true", help="Give up when the Pico serial port drops")
+    ap.add_argument("--pending-policy", choices=["fail", "retry"], default="fail", help="Calls in flight when the port drops: fail them or resend after reconnect")
+    ap.add_argument("--framing", choices=["bin", "json"], default="bin", help="Pico->Pi framing (falls back to json)")
     ap.add_argument("--stream-hz", type=float, default=10.0)
+    ap.add_argument("--stream-batch", type=int, default=1, help="Samples per sensors_batch frame (1 = one frame per sample)")
+    ap.add_argument("--keyframe-s", type=float, default=0.0, help="Delta stream: full frame every N s, changed fields in between (0 = off)")
+    ap.add_argument("--sim-seed", type=int, default=None, help="pico_sim only: reseed its sensor noise, for bit-identical telemetry across runs")
+    ap.add_argument("--sim-scenario", default="", help="pico_sim only: fault timeline to replay during the cycle (pressure_spikes, stream_pauses, voltage_sag, stress)")
 
     # Orchestration targets
     ap.add_argument("--ev", choices=["ev1", "ev2"], default="ev1")
@@ -234,6 +230,8 @@ async def main() -> None:
 
     # Logging (your key requirement)
     ap.add_argument("--heartbeat-period", type=float, default=10.0)
+    ap.add_argument("--quiet-s", type=float, default=1.0, help="Heartbeat only after this long without any controller traffic")
+    ap.add_argument("--sync-every", type=float, default=10.0, help="Heartbeat at least this often for clock sync (0 = only when quiet)")
     ap.add_argument("--heartbeat-csv", default="heartbeat.csv")
     ap.add_argument("--events-jsonl", default="events.jsonl")
 
@@ -253,10 +251,21 @@ async def main() -> None:
 
     hb_csv = HeartbeatCsvLogger(args.heartbeat_csv) if args.heartbeat_csv else None
     event_log = EventLogger(args.events_jsonl) if args.events_jsonl else None
-
-    pico = PicoLink(args.port, args.baud)
+    crit = default_fail()
+
+    if args.daemon:
+        # port, framing, stream and clock sync belong to the daemon
+        pico = DaemonLink(args.daemon)
+        await pico.start()
+        sync_every = None
+    else:
+        port = await find_port(args.baud, use_cache=not args.rediscover) if args.port == "auto" else args.port
+        pico = PicoLink(port, args.baud, reconnect=not args.no_reconnect, pending_policy=args.pending_policy)
+        sync_every = args.sync_every or None
     rx = asyncio.create_task(pico.rx_task())
-    keepalive = asyncio.create_task(heartbeat_keepalive_task(pico, 0.5))
+    # liveness from the stream itself; heartbeats only when quiet (NOT the 10s CSV heartbeat log)
+    live = LivenessManager(pico, quiet_s=args.quiet_s, sync_every_s=sync_every)
+    keepalive = asyncio.create_task(live.run())
     hb_task = asyncio.create_task(heartbeat_csv_task(pico, hb_csv, event_log, args.heartbeat_period))
 
     dispense_done = threading.Event()
@@ -271,12 +280,22 @@ async def main() -> None:
     try:
         await wait_pico_ready(pico, 5.0)
         print("[PICO] Ready")
+        if args.sim_seed is not None:
+            res = await set_noise(pico, args.sim_seed)
+            if event_log:
+                event_log.write({"ts": now_ts(), "kind": "event", "event": "sim_noise", "data": res})
+        if args.sim_scenario:
+            res = await set_scenario(pico, args.sim_scenario)
+            if event_log:
+                event_log.write({"ts": now_ts(), "kind": "event", "event": "sim_scenario", "data": res})
+        if not args.daemon:
+            print("[PICO] Framing:", await pico.negotiate_framing(args.framing))
 
-        # Start Pico streaming
-        try:
-            await start_stream(pico, args.stream_hz)
-        except Exception:
-            pass
+            # Start Pico streaming
+            try:
+                await start_stream(pico, args.stream_hz, args.stream_batch, args.keyframe_s)
+            except Exception:
+                pass
 
         # Snapshot at start
         try:
@@ -306,6 +325,7 @@ async def main() -> None:
         print("[FLOW] Sent dispense start (OPEN_VALVES). Waiting for completion...")
 
         while not dispense_done.is_set():
+            check_link_health(live)
             await asyncio.sleep(0.05)
 
         can_send(args.can, ID_CLOSE_VALVES, b"")
@@ -324,6 +344,7 @@ async def main() -> None:
         # -----------------------
         # (2) DRAIN CANISTER -> SUMP (PICO)
         # -----------------------
+        check_step(pico, live, crit)
         before1 = await snapshot(pico)
         t0 = now_ts()
 
@@ -335,8 +356,7 @@ async def main() -> None:
             stable_time_s=args.stable_time,
         )
 
-        await wait_until(
-            pico,
+        await pico.wait_for(
             predicate=lambda s: (s.get("canister_mass_kg") is not None)
             and (float(s["canister_mass_kg"]) <= args.canister_empty_kg),
             timeout_s=args.wait_empty_timeout,
@@ -362,8 +382,7 @@ async def main() -> None:
         print("[DONE drain_canister]", res1)
 
         # Wait until sump is non-empty (useful if updates lag)
-        await wait_until(
-            pico,
+        await pico.wait_for(
             predicate=lambda s: (s.get("sump_mass_kg") is not None)
             and (float(s["sump_mass_kg"]) > float(args.sump_empty) + 0.001),
             timeout_s=args.wait_sump_ready_timeout,
@@ -373,6 +392,7 @@ async def main() -> None:
         # -----------------------
         # (3) DRAIN SUMP -> TANK (PICO)
         # -----------------------
+        check_step(pico, live, crit)
         before2 = await snapshot(pico)
         t2 = now_ts()
 
@@ -407,10 +427,12 @@ async def main() -> None:
     finally:
         can_stop.set()
 
-        try:
-            await stop_stream(pico)
-        except Exception:
-            pass
+        if not args.daemon:
+            # the daemon's stream is shared with its other clients
+            try:
+                await stop_stream(pico)
+            except Exception:
+                pass
 
         await safe_stop_pico(pico)
 
@@ -419,6 +441,11 @@ async def main() -> None:
         rx.cancel()
         await asyncio.gather(hb_task, keepalive, rx, return_exceptions=True)
 
+        report = live.report()
+        print("[LIVENESS]", report)
+        if event_log:
+            event_log.write({"ts": now_ts(), "kind": "event", "event": "liveness", "data": report})
+
         pico.close()
 
         if hb_csv:
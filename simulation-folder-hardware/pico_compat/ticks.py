@@ -0,0 +1,40 @@
+# MicroPython's time.ticks_* on CPython, wrapping like the real ones
+# (TICKS_PERIOD = 2**30), so pico_sim's ticks_diff/ticks_add handling of the
+# wrap is exercised on the host too.
+
+import time
+
+TICKS_PERIOD = 1 << 30
+_MASK = TICKS_PERIOD - 1
+_HALF = TICKS_PERIOD // 2
+_t0_ns = time.monotonic_ns()
+
+
+def ticks_ms():
+    return ((time.monotonic_ns() - _t0_ns) // 1000000) & _MASK
+
+
+def ticks_us():
+    return ((time.monotonic_ns() - _t0_ns) // 1000) & _MASK
+
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & _MASK
+
+
+def ticks_diff(a, b):
+    return ((a - b + _HALF) & _MASK) - _HALF
+
+
+def sleep_ms(ms):
+    time.sleep(ms / 1000.0)
+
+
+def sleep_us(us):
+    time.sleep(us / 1000000.0)
+
+
+def install():
+    """Add the ticks_* / sleep_ms / sleep_us functions to CPython's time module."""
+    for name in ("ticks_ms", "ticks_us", "ticks_add", "ticks_diff", "sleep_ms", "sleep_us"):
+        setattr(time, name, globals()[name])
@@ -0,0 +1,44 @@
+# uasyncio on CPython: asyncio plus the MicroPython-only pieces pico_sim uses.
+
+import asyncio as _asyncio
+import errno as _errno
+from asyncio import *  # noqa: F401,F403
+
+
+def sleep_ms(ms):
+    return _asyncio.sleep(ms / 1000.0)
+
+
+class StreamReader:
+    """
+    uasyncio.StreamReader over a non-blocking stream with fileno(): read()
+    returns what is there, or waits in the event loop's selector until
+    something is. b"" at EOF (or EIO, a pty with its other side gone).
+    """
+
+    def __init__(self, s):
+        self.s = s
+
+    def _read(self, n):
+        try:
+            return self.s.read(n)
+        except BlockingIOError:
+            return None
+        except OSError as e:
+            if e.errno == _errno.EIO:
+                return b""
+            raise
+
+    async def read(self, n=-1):
+        while True:
+            data = self._read(n)
+            if data is not None:
+                return data
+            loop = _asyncio.get_running_loop()
+            fut = loop.create_future()
+            fd = self.s.fileno()
+            loop.add_reader(fd, lambda: fut.done() or fut.set_result(None))
+            try:
+                await fut
+            finally:
+                loop.remove_reader(fd)
@@ -0,0 +1,4 @@
+# ujson on CPython. MicroPython's dumps separates with ", " and ": ", the
+# same as CPython's defaults, so frames are the same size on the wire.
+
+from json import dumps, loads  # noqa: F401
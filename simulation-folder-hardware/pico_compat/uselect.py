@@ -0,0 +1,3 @@
+# uselect on CPython: select.poll takes objects with fileno(), like uselect.poll.
+
+from select import POLLERR, POLLHUP, POLLIN, POLLOUT, poll  # noqa: F401
@@ -0,0 +1,101 @@
+# Run the unmodified pico_sim/main.py on CPython behind a pseudo-terminal, so
+# PicoLink, bringup.py and orchestrate_cycle.py talk to it like a Pico on a
+# serial port, no hardware needed.
+#
+#   python pico_pty.py [--link /tmp/ttyPICO]
+#   python bringup.py --port /tmp/ttyPICO
+#
+# pico_compat/ stands in for uasyncio, ujson, uselect and time.ticks_*. The
+# sim's stdin/stdout are the pty master; the slave (the "serial port") is
+# held open here, so the host can connect and reconnect at will. Output the
+# host isn't reading is dropped once the pty buffer is full, the way the
+# Pico's USB CDC drops it, so the sim never blocks on a slow host. There is
+# no baud limit, as on the real USB CDC link.
+
+import argparse
+import os
+import pty
+import runpy
+import signal
+import sys
+import tty
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PICO_SIM = os.path.join(HERE, "pico_sim")
+PICO_COMPAT = os.path.join(HERE, "pico_compat")
+
+
+class PtyOut:
+    """sys.stdout for the sim: str or bytes to the pty master, never blocking."""
+
+    def __init__(self, fd: int):
+        self.fd = fd
+        self.dropped_bytes = 0
+
+    @property
+    def buffer(self) -> "PtyOut":
+        return self
+
+    def write(self, data) -> int:
+        if isinstance(data, str):
+            data = data.encode()
+        view = memoryview(data)
+        while view:
+            try:
+                n = os.write(self.fd, view)
+            except BlockingIOError:
+                # host not reading: drop the rest, like the CDC tx buffer
+                self.dropped_bytes += len(view)
+                break
+            view = view[n:]
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+
+def open_pty(link: str) -> tuple:
+    master, slave = pty.openpty()
+    tty.setraw(slave)  # no echo or newline translation, like a serial port
+    os.set_blocking(master, False)
+    path = os.ttyname(slave)
+    if link:
+        if os.path.islink(link):
+            os.unlink(link)
+        os.symlink(path, link)
+    return master, slave, path
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--link", default="/tmp/ttyPICO", help="Symlink to the pty slave, for --port ('' = none)")
+    args = ap.parse_args()
+
+    master, slave, path = open_pty(args.link)
+    # terminate like Ctrl-C, so the symlink is removed
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"[PTY] pico_sim on {path}" + (f" ({args.link})" if args.link else ""), file=sys.stderr, flush=True)
+
+    sys.path[:0] = [PICO_COMPAT, PICO_SIM]
+    import ticks
+
+    ticks.install()
+    sys.stdin = os.fdopen(master, "rb", buffering=0, closefd=False)
+    out = PtyOut(master)
+    sys.stdout = out
+    try:
+        runpy.run_path(os.path.join(PICO_SIM, "main.py"), run_name="__main__")
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        sys.stdout = sys.__stdout__
+        if out.dropped_bytes:
+            print(f"[PTY] dropped {out.dropped_bytes} bytes nobody read", file=sys.stderr)
+        if args.link and os.path.islink(args.link) and os.readlink(args.link) == path:
+            os.unlink(args.link)
+        os.close(slave)
+        os.close(master)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import struct
+
+# Binary framing (negotiated via set_framing, see commands.py).
+# Frame before COBS: kind(u8) seq(u16) payload crc16(u16), little endian.
+# On the wire: COBS(frame) + b"\x00".
+# Keep the layout in sync with tcd1/binproto.py on the Pi.
+
+KIND_SENSORS = 0x01
+KIND_JSON = 0x02
+KIND_SENSORS_BATCH = 0x03
+KIND_SENSORS_DELTA = 0x04
+
+# fixed float fields of a sensors frame, in wire order
+SENSOR_FIELDS = (
+    "pump_pressure_bar",
+    "bus_voltage_v",
+    "canister_mass_kg",
+    "sump_mass_kg",
+    "tank1_mass_kg",
+    "tank2_mass_kg",
+    "pump_current_a",
+    "dv_current_a",
+    "stream_hz",
+)
+SENSOR_FMT = "<II9fB"  # sim_tick, t_ms, floats, job code (+ scenario: u8 len + bytes)
+
+# per-tick columns of a sensors_batch frame (stream_hz/job/scenario are per batch)
+BATCH_FIELDS = SENSOR_FIELDS[:-1]
+BATCH_FMT = "<IIIHBBf"  # tick0, t0_ms, t1_ms, dtick, n, job code, stream_hz (+ n floats per column, scenario)
+
+# sensors_delta: sim_tick(u32) t_ms(u32) mask(u16) then f32 per set SENSOR_FIELDS bit,
+# job code if bit 9, scenario (u8 len + bytes) if bit 10
+DELTA_JOB_BIT = 1 << 9
+DELTA_SCENARIO_BIT = 1 << 10
+
+JOB_CODES = ("", "drain_canister_to_sump", "drain_sump_to_tank")
+
+
+def _make_crc_table():
+    tbl = []
+    for i in range(256):
+        c = i << 8
+        for _ in range(8):
+            c = ((c << 1) ^ 0x1021) if (c & 0x8000) else (c << 1)
+        tbl.append(c & 0xFFFF)
+    return tbl
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def crc16(data, crc=0xFFFF):
+    # CRC-16/CCITT-FALSE
+    tbl = _CRC_TABLE
+    for b in data:
+        crc = ((crc << 8) & 0xFFFF) ^ tbl[((crc >> 8) ^ b) & 0xFF]
+    return crc
+
+
+def cobs_encode(data):
+    out = bytearray(len(data) + len(data) // 254 + 2)
+    code_i = 0
+    o = 1
+    code = 1
+    for b in data:
+        if b == 0:
+            out[code_i] = code
+            code_i = o
+            o += 1
+            code = 1
+        else:
+            out[o] = b
+            o += 1
+            code += 1
+            if code == 0xFF:
+                out[code_i] = code
+                code_i = o
+                o += 1
+                code = 1
+    out[code_i] = code
+    return bytes(out[:o])
+
+
+def job_code(job_type):
+    try:
+        return JOB_CODES.index(job_type)
+    except ValueError:
+        return 0xFF
+
+
+def pack_sensors(d):
+    scen = str(d.get("scenario", "")).encode()[:255]
+    return struct.pack(
+        SENSOR_FMT,
+        int(d["sim_tick"]) & 0xFFFFFFFF,
+        int(d.get("t_ms", 0)) & 0xFFFFFFFF,
+        d["pump_pressure_bar"],
+        d["bus_voltage_v"],
+        d["canister_mass_kg"],
+        d["sump_mass_kg"],
+        d["tank1_mass_kg"],
+        d["tank2_mass_kg"],
+        d["pump_current_a"],
+        d["dv_current_a"],
+        d["stream_hz"],
+        job_code(d.get("job", "")),
+    ) + bytes((len(scen),)) + scen
+
+
+def pack_batch(msg):
+    n = msg["n"]
+    cols = msg["cols"]
+    scen = str(msg.get("scenario", "")).encode()[:255]
+    out = [struct.pack(
+        BATCH_FMT,
+        int(msg["tick0"]) & 0xFFFFFFFF,
+        int(msg.get("t0_ms", 0)) & 0xFFFFFFFF,
+        int(msg.get("t1_ms", 0)) & 0xFFFFFFFF,
+        msg["dtick"],
+        n,
+        job_code(msg.get("job", "")),
+        msg["stream_hz"],
+    )]
+    fmt = "<%df" % n
+    for f in BATCH_FIELDS:
+        out.append(struct.pack(fmt, *cols[f][:n]))
+    out.append(bytes((len(scen),)))
+    out.append(scen)
+    return b"".join(out)
+
+
+def pack_delta(d):
+    mask = 0
+    vals = []
+    i = 0
+    for f in SENSOR_FIELDS:
+        if f in d:
+            mask |= 1 << i
+            vals.append(d[f])
+        i += 1
+    tail = b""
+    if "job" in d:
+        mask |= DELTA_JOB_BIT
+        tail += bytes((job_code(d["job"]),))
+    if "scenario" in d:
+        mask |= DELTA_SCENARIO_BIT
+        scen = str(d["scenario"]).encode()[:255]
+        tail += bytes((len(scen),)) + scen
+    head = struct.pack(
+        "<IIH",
+        int(d.get("sim_tick", 0)) & 0xFFFFFFFF,
+        int(d.get("t_ms", 0)) & 0xFFFFFFFF,
+        mask,
+    )
+    return head + struct.pack("<%df" % len(vals), *vals) + tail
+
+
+class FrameEncoder:
+    def __init__(self):
+        self.seq = 0
+
+    def frame(self, kind, payload):
+        body = struct.pack("<BH", kind, self.seq) + payload
+        self.seq = (self.seq + 1) & 0xFFFF
+        return cobs_encode(body + struct.pack("<H", crc16(body))) + b"\x00"
+
+    def encode(self, msg, dumps):
+        if msg.get("type") == "sensors":
+            return self.frame(KIND_SENSORS, pack_sensors(msg["data"]))
+        if msg.get("type") == "sensors_delta":
+            return self.frame(KIND_SENSORS_DELTA, pack_delta(msg["data"]))
+        if msg.get("type") == "sensors_batch":
+            return self.frame(KIND_SENSORS_BATCH, pack_batch(msg))
+        return self.frame(KIND_JSON, dumps(msg).encode())
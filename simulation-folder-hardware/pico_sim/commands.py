@@ -1,6 +1,7 @@
 import time
+import proto
 from proto import send_msg
-from faults import add_fault, clear_faults, set_scenario
+from faults import SCENARIOS, add_fault, clear_faults, define_scenario, set_scenario
 
 class CommandDispatcher:
     def __init__(self, state):
@@ -12,9 +13,19 @@ class CommandDispatcher:
             "start_stream", "stop_stream", "snapshot",
             "drain_canister_to_sump", "drain_sump_to_tank",
             "set_fault", "clear_faults",
-            "reset_sim", "set_deterministic", "set_scenario",
+            "reset_sim", "set_deterministic", "tick_stats", "set_scenario", "define_scenario", "set_noise",
+            "hello", "set_framing", "bin_frames", "sensors_batch", "sensors_delta",
         ]
 
+    def hello(self):
+        return {
+            "fw": "micropython-sim",
+            "proto": 2,
+            "device": "pico",
+            "noise_seed": self.s.noise.seed,
+            "features": self.features(),
+        }
+
     def _ok(self, cid, result=None):
         send_msg({"type": "cmd_result", "id": cid, "ok": True, "result": result or {}})
 
@@ -42,12 +53,16 @@ class CommandDispatcher:
         self.s.stream_enabled = False
         self.s.stream_hz = 10.0
         self.s.stream_pause_until_ms = 0
+        self.s.stream_batch = 1
+        self.s.batch = None
+        self.s.delta.configure(0, None)
 
         self.s.sim_tick = 0
+        self.s.noise.reseed(self.s.noise.seed)
         self.s.job = None
         self.s._stable_start_ms = None
 
-        self.s.faults = []
+        clear_faults(self.s)
         set_scenario(self.s, "none")
 
     async def handle_cmd(self, cid, name, args):
@@ -55,6 +70,22 @@ class CommandDispatcher:
             if name == "heartbeat":
                 self._ok(cid, {"ts_ms": time.ticks_ms()})
 
+            elif name == "hello":
+                self._ok(cid, self.hello())
+
+            elif name == "set_framing":
+                mode = str(args.get("mode", "json"))
+                if mode not in ("json", "bin"):
+                    raise ValueError("framing must be json or bin")
+                if mode == "json":
+                    # switch first so the ack itself is plain JSON
+                    proto.set_framing(mode)
+                    self._ok(cid, {"framing": mode})
+                else:
+                    # ack in the old framing, everything after is binary
+                    self._ok(cid, {"framing": mode})
+                    proto.set_framing(mode)
+
             elif name == "safe_stop":
                 self.s.job = None
                 self.s.stream_enabled = False
@@ -66,9 +97,23 @@ class CommandDispatcher:
 
             elif name == "start_stream":
                 hz = float(args.get("hz", 10.0))
-                self.s.stream_hz = max(0.2, min(50.0, hz))
+                batch = max(1, min(50, int(args.get("batch", 1))))
+                # one frame per sample is capped at 50 Hz; batches can carry every tick
+                max_hz = self.s.tick_hz if batch > 1 else 50.0
+                self.s.stream_hz = max(0.2, min(max_hz, hz))
+                self.s.stream_batch = batch
+                self.s.batch = None
+
+                # keyframe_s > 0: full frame every keyframe_s, deltas in between
+                keyframe_s = float(args.get("keyframe_s", 0.0))
+                every = max(1, int(round(keyframe_s * self.s.stream_hz))) if keyframe_s > 0 else 0
+                deadband = args.get("deadband") or {}
+                if not isinstance(deadband, dict):
+                    deadband = {}
+                self.s.delta.configure(every, {str(k): float(v) for k, v in deadband.items()})
+
                 self.s.stream_enabled = True
-                self._ok(cid, {"stream": "on", "hz": self.s.stream_hz})
+                self._ok(cid, {"stream": "on", "hz": self.s.stream_hz, "batch": batch, "keyframe_every": every})
 
             elif name == "stop_stream":
                 self.s.stream_enabled = False
@@ -131,10 +176,44 @@ class CommandDispatcher:
                 self.s.deterministic = bool(args.get("enabled", True))
                 self._ok(cid, {"deterministic": self.s.deterministic})
 
+            elif name == "tick_stats":
+                # tick lateness/jitter and overruns since boot or the last reset
+                sched = self.s.sched
+                if sched is None:
+                    raise ValueError("tick scheduler not running")
+                st = sched.stats()
+                st["sim_tick"] = self.s.sim_tick
+                if args.get("reset", False):
+                    sched.reset_stats()
+                self._ok(cid, st)
+
+            elif name == "set_noise":
+                # seed restarts every stream; sigma {key: 1-sigma} overrides io_config defaults
+                sigma = args.get("sigma") or {}
+                if not isinstance(sigma, dict):
+                    raise ValueError("sigma must be a dict of key: sigma")
+                if sigma:
+                    self.s.noise.set_sigma(sigma)
+                self.s.noise.reseed(int(args.get("seed", self.s.noise.seed)))
+                self._ok(cid, {"seed": self.s.noise.seed, "sigma": self.s.noise.sigma})
+
             elif name == "set_scenario":
                 scen = str(args.get("name", "none"))
                 set_scenario(self.s, scen)
-                self._ok(cid, {"scenario": self.s.scenario_name})
+                self._ok(cid, {"scenario": self.s.scenario_name, "period_ms": self.s.scenario_period_ms, "events": len(self.s.scenario)})
+
+            elif name == "define_scenario":
+                # events [[at_s, type, duration_s, value?], ...]; start=True also runs it
+                scen = str(args.get("name", ""))
+                if not scen or scen == "none":
+                    raise ValueError("define_scenario needs a name other than none")
+                events = args.get("events") or []
+                if not isinstance(events, list):
+                    raise ValueError("events must be a list of [at_s, type, duration_s, value?]")
+                table = define_scenario(scen, events, float(args.get("period_s", 0.0)), int(args.get("repeat", 0)))
+                if args.get("start", False):
+                    set_scenario(self.s, scen)
+                self._ok(cid, {"scenario": scen, "period_ms": table["period_ms"], "events": len(table["events"]), "scenarios": list(SCENARIOS)})
 
             else:
                 self._err(cid, "unknown command: " + str(name))
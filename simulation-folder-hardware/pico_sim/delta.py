@@ -0,0 +1,42 @@
+# Delta/keyframe stream: a full "sensors" keyframe every
+# keyframe_every frames, otherwise "sensors_delta" with only the fields that
+# moved more than their deadband since they were last sent.
+
+ALWAYS = ("sim_tick", "t_ms")
+
+class DeltaEncoder:
+    def __init__(self):
+        self.configure(0, None)
+
+    def configure(self, keyframe_every, deadbands):
+        # keyframe_every <= 0 disables deltas (every frame is a full frame)
+        self.keyframe_every = int(keyframe_every)
+        self.deadbands = deadbands or {}
+        self.sent = {}
+        self.n = 0
+
+    def encode(self, d):
+        if self.keyframe_every <= 0:
+            return {"type": "sensors", "data": d}
+
+        if self.n % self.keyframe_every == 0 or not self.sent:
+            self.n = 1
+            self.sent = dict(d)
+            return {"type": "sensors", "data": d}
+
+        self.n += 1
+        sent = self.sent
+        dbs = self.deadbands
+        changed = {}
+        for k, v in d.items():
+            old = sent.get(k)
+            if k in ALWAYS or old is None:
+                changed[k] = v
+            elif isinstance(v, float):
+                if abs(v - old) > dbs.get(k, 0.0):
+                    changed[k] = v
+            elif v != old:
+                changed[k] = v
+        for k, v in changed.items():
+            sent[k] = v
+        return {"type": "sensors_delta", "data": changed}
@@ -1,52 +1,181 @@
 import time
 
+# fault type -> (SimState attribute it overrides each tick, value when none is given)
+FAULTS = {
+    "pressure_high": ("pump_pressure_bar", 4.2),
+    "pressure_low": ("pump_pressure_bar", 0.1),
+    "voltage_high": ("bus_voltage_v", 30.0),
+    "voltage_low": ("bus_voltage_v", 18.0),
+    "stream_pause": (None, None),
+}
+
+# an active fault is a reused slot [type, end_ms, attr, value]
+_TYPE = 0
+_END = 1
+_ATTR = 2
+_VALUE = 3
+
+
 def add_fault(state, ftype, duration_s=3.0, value=None):
+    ftype = str(ftype)
     end_ms = time.ticks_add(time.ticks_ms(), int(duration_s * 1000))
-    f = {"type": str(ftype), "end_ms": end_ms}
+    attr, default = FAULTS.get(ftype, (None, None))
     if value is not None:
         try:
-            f["value"] = float(value)
+            value = float(value)
         except Exception:
-            pass
-    state.faults.append(f)
+            value = None
+    if value is None:
+        value = default
+
+    # one slot per type: re-adding moves it to the back (last added wins)
+    faults = state.faults
+    slot = None
+    for i in range(len(faults)):
+        if faults[i][_TYPE] == ftype:
+            slot = faults.pop(i)
+            break
+    if slot is None:
+        slot = [ftype, end_ms, attr, value]
+    else:
+        slot[_END] = end_ms
+        slot[_VALUE] = value
+    faults.append(slot)
+
+    if not state._fault_pending or time.ticks_diff(end_ms, state._fault_next_end_ms) < 0:
+        state._fault_next_end_ms = end_ms
+    state._fault_pending = True
 
     if ftype == "stream_pause":
         state.stream_pause_until_ms = end_ms
 
+
 def clear_faults(state):
     state.faults = []
+    state._fault_pending = False
+    state._fault_next_end_ms = 0
     state.stream_pause_until_ms = 0
 
+
+def _expire(state, t):
+    # only runs when the earliest end has passed, not every tick
+    faults = state.faults
+    nxt = None
+    i = len(faults) - 1
+    while i >= 0:
+        end = faults[i][_END]
+        if time.ticks_diff(end, t) <= 0:
+            faults.pop(i)
+        elif nxt is None or time.ticks_diff(end, nxt) < 0:
+            nxt = end
+        i -= 1
+    state._fault_pending = nxt is not None
+    state._fault_next_end_ms = nxt or 0
+
+
 def apply_faults(state):
+    if not state._fault_pending:
+        return
     t = time.ticks_ms()
-    state.faults = [f for f in state.faults if time.ticks_diff(f["end_ms"], t) > 0]
+    if time.ticks_diff(state._fault_next_end_ms, t) <= 0:
+        _expire(state, t)
 
     for f in state.faults:
-        ft = f["type"]
-        if ft == "pressure_high":
-            state.pump_pressure_bar = f.get("value", 4.2)
-        elif ft == "pressure_low":
-            state.pump_pressure_bar = f.get("value", 0.1)
-        elif ft == "voltage_high":
-            state.bus_voltage_v = f.get("value", 30.0)
-        elif ft == "voltage_low":
-            state.bus_voltage_v = f.get("value", 18.0)
-        elif ft == "stream_pause":
-            pass
+        if f[_ATTR] is not None:
+            setattr(state, f[_ATTR], f[_VALUE])
+
+
+# -----------------------------------------------------------------------------
+# Scenarios: named, time-ordered event tables replayed against the tick.
+#
+# An event is (at_ms, fault type, duration_s, value or None), at_ms from the
+# start of the scenario (or of the current period). period_ms > 0 replays the
+# table every period_ms, repeat times (0 = until another scenario is set).
+# -----------------------------------------------------------------------------
+
+def make_scenario(events, period_s=0.0, repeat=0):
+    """
+    Scenario table from [(at_s, type, duration_s[, value]), ...]; any order,
+    sorted here once so the tick only ever looks at the next event.
+    """
+    table = []
+    for ev in events:
+        value = ev[3] if len(ev) > 3 else None
+        table.append((int(float(ev[0]) * 1000), str(ev[1]), float(ev[2]), None if value is None else float(value)))
+    table.sort(key=lambda e: e[0])
+    period_ms = int(float(period_s) * 1000)
+    if period_ms > 0 and table and table[-1][0] >= period_ms:
+        raise ValueError("scenario events must start before period_s")
+    return {"events": table, "period_ms": period_ms, "repeat": int(repeat)}
+
+
+# built-ins, sized against bringup.default_fail() (0.5-3.0 bar, 20-28 V, 1 s sensor gap)
+SCENARIOS = {
+    "none": make_scenario([]),
+    # short over-pressure spike every 5 s
+    "pressure_spikes": make_scenario([(1.0, "pressure_high", 0.3)], period_s=5.0),
+    # telemetry drops out for longer than max_sensor_gap_s every 10 s
+    "stream_pauses": make_scenario([(2.0, "stream_pause", 1.5)], period_s=10.0),
+    # bus sags below the limit and recovers through a shallower dip
+    "voltage_sag": make_scenario([(1.0, "voltage_low", 2.0, 18.0), (3.0, "voltage_low", 1.0, 21.0)], period_s=15.0),
+    # all of the above on one 20 s loop
+    "stress": make_scenario([
+        (1.0, "pressure_high", 0.3),
+        (4.0, "voltage_low", 1.5, 18.0),
+        (7.0, "pressure_low", 0.5),
+        (10.0, "stream_pause", 1.5),
+        (14.0, "voltage_high", 0.5),
+        (17.0, "pressure_high", 0.2, 5.0),
+    ], period_s=20.0),
+}
+
+
+def define_scenario(name, events, period_s=0.0, repeat=0):
+    SCENARIOS[str(name)] = make_scenario(events, period_s, repeat)
+    return SCENARIOS[str(name)]
+
 
 def set_scenario(state, name):
-    state.scenario_name = str(name)
+    name = str(name)
+    scen = SCENARIOS.get(name)
+    if scen is None:
+        raise ValueError("unknown scenario: " + name)
+    state.scenario_name = name
     state.scenario_start_ms = time.ticks_ms()
-    state._scenario_fired = set()
-    state._scenario_last_elapsed = None
+    state.scenario = scen["events"]
+    state.scenario_period_ms = scen["period_ms"]
+    state.scenario_repeat = scen["repeat"]
+    state._scenario_i = 0
+    state._scenario_base_ms = state.scenario_start_ms
+    state._scenario_pass = 0
 
-    # Leave scenarios empty for now (you said you want to skip fault injection initially)
-    state.scenario = []
-    state.scenario_period_ms = 0
 
 def _scenario_elapsed_ms(state):
-    return time.ticks_diff(time.ticks_ms(), state.scenario_start_ms)
+    return time.ticks_diff(time.ticks_ms(), state._scenario_base_ms)
+
 
 def apply_scenario(state, add_fault_fn):
-    # No-op until you enable scenarios
-    return
+    # cursor over a sorted table: a tick with nothing due is one compare
+    events = state.scenario
+    if not events:
+        return
+    elapsed = _scenario_elapsed_ms(state)
+    i = state._scenario_i
+    n = len(events)
+    while True:
+        while i < n and events[i][0] <= elapsed:
+            ev = events[i]
+            add_fault_fn(state, ev[1], ev[2], ev[3])
+            i += 1
+        period = state.scenario_period_ms
+        if i < n or period <= 0 or elapsed < period:
+            break
+        # period over: next pass, unless repeat is used up
+        state._scenario_pass += 1
+        if state.scenario_repeat and state._scenario_pass >= state.scenario_repeat:
+            state.scenario = []
+            break
+        state._scenario_base_ms = time.ticks_add(state._scenario_base_ms, period)
+        elapsed -= period
+        i = 0
+    state._scenario_i = i
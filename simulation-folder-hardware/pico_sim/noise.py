@@ -0,0 +1,92 @@
+import math
+from array import array
+
+# samples generated per refill of a sensor's buffer (kept small for Pico RAM)
+BLOCK = 64
+
+# 1-sigma noise per sensors_dict key, from rig-ui io_config.yaml accuracy
+# specs read as a 3-sigma bound (accuracy_percent of full scale):
+#   pump_pressure_bar  pressure_sensor_2  0.5 % of the 0-3 bar working range
+#                      = 0.015 bar (of its 10000 kPa full scale it would be
+#                      +-0.5 bar on a ~1 bar signal, tripping pressure_min_bar)
+#   bus_voltage_v      voltage_sensor_1   0.5 % of 500 V     = 2.5 V
+#   *_mass_kg          load_cell_1/2      0.03 % of 300 kg   = 0.09 kg
+DEFAULT_SIGMA = {
+    "pump_pressure_bar": 0.015 / 3.0,
+    "bus_voltage_v": 2.5 / 3.0,
+    "canister_mass_kg": 0.09 / 3.0,
+    "sump_mass_kg": 0.09 / 3.0,
+}
+
+_M32 = 0xFFFFFFFF
+
+
+def _fnv1a(s):
+    # stable across runs and ports, unlike hash()
+    h = 0x811C9DC5
+    for c in s.encode():
+        h = ((h ^ c) * 0x01000193) & _M32
+    return h
+
+
+class NoiseStream:
+    """
+    Seeded gaussian noise for one sensor (xorshift32 + Box-Muller), made
+    BLOCK samples at a time into a float array and clipped to +-3 sigma.
+    Same seed and key, same sequence, on MicroPython and CPython alike.
+    """
+
+    def __init__(self, seed, key, sigma, block=BLOCK):
+        self.sigma = float(sigma)
+        self._x = ((seed * 0x9E3779B1) ^ _fnv1a(key)) & _M32 or 1
+        self._buf = array("f", [0.0] * (block + (block & 1)))
+        self._i = len(self._buf)
+
+    def _u(self):
+        x = self._x
+        x ^= (x << 13) & _M32
+        x ^= x >> 17
+        x ^= (x << 5) & _M32
+        self._x = x
+        # 24 bits in (0, 1): never 0, so log() is safe
+        return ((x >> 8) + 0.5) / 16777216.0
+
+    def _refill(self):
+        buf = self._buf
+        s = self.sigma
+        lim = 3.0 * s
+        for i in range(0, len(buf), 2):
+            r = s * math.sqrt(-2.0 * math.log(self._u()))
+            a = 6.283185307179586 * self._u()
+            buf[i] = min(lim, max(-lim, r * math.cos(a)))
+            buf[i + 1] = min(lim, max(-lim, r * math.sin(a)))
+        self._i = 0
+
+    def next(self):
+        if self._i >= len(self._buf):
+            self._refill()
+        v = self._buf[self._i]
+        self._i += 1
+        return v
+
+
+class SensorNoise:
+    """One NoiseStream per key; reseed() restarts every stream."""
+
+    def __init__(self, seed=1, sigma=None):
+        self.sigma = dict(DEFAULT_SIGMA)
+        if sigma:
+            self.sigma.update(sigma)
+        self.reseed(seed)
+
+    def reseed(self, seed):
+        self.seed = int(seed)
+        self._streams = {k: NoiseStream(self.seed, k, s) for k, s in self.sigma.items()}
+
+    def set_sigma(self, sigma):
+        self.sigma.update({str(k): float(v) for k, v in sigma.items()})
+        self.reseed(self.seed)
+
+    def get(self, key):
+        st = self._streams.get(key)
+        return st.next() if st is not None and st.sigma > 0.0 else 0.0
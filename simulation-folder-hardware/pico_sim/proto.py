@@ -2,48 +2,98 @@ import ujson as json
 import sys
 import uasyncio as asyncio
 import uselect
+from binproto import FrameEncoder
+
+# "json" = newline-delimited JSON (default, always used for hello)
+# "bin"  = COBS framed binary (binproto.py), only after the Pi asks for it
+_framing = "json"
+_encoder = FrameEncoder()
+_out = getattr(sys.stdout, "buffer", sys.stdout)
+_in = getattr(sys.stdin, "buffer", sys.stdin)
+
+RX_CHUNK = 256      # most bytes taken per wake-up
+RX_MAX_LINE = 4096  # longest command line kept while waiting for its newline
+
+def framing():
+    return _framing
+
+def set_framing(mode):
+    global _framing
+    if mode not in ("json", "bin"):
+        raise ValueError("framing must be json or bin")
+    _framing = mode
 
 def send_msg(msg):
-    # newline-delimited JSON
-    sys.stdout.write(json.dumps(msg) + "\n")
+    if _framing == "bin":
+        _out.write(_encoder.encode(msg, json.dumps))
+    else:
+        # newline-delimited JSON
+        sys.stdout.write(json.dumps(msg) + "\n")
     try:
         sys.stdout.flush()
     except Exception:
         pass
 
+def _parse_cmd(line):
+    try:
+        msg = json.loads(line)
+    except Exception:
+        return None
+    if not isinstance(msg, dict) or msg.get("type") != "cmd":
+        return None
+    cid = msg.get("id")
+    if not isinstance(cid, int):
+        return None
+    args = msg.get("args", {})
+    if not isinstance(args, dict):
+        args = {}
+    return cid, msg.get("name", ""), args
+
+def _read_available(poller, first):
+    # stdin.read(n) blocks for all n bytes, so after the first byte take
+    # only what poll says is already there
+    buf = [first]
+    n = 1
+    while n < RX_CHUNK and poller.poll(0):
+        c = _in.read(1)
+        if not c:
+            break
+        buf.append(c)
+        n += 1
+    chunk = buf[0][:0].join(buf)
+    return chunk.encode() if isinstance(chunk, str) else chunk
+
 async def serial_rx_task(dispatcher):
+    # sleeps in the scheduler's poller until stdin has data (no idle
+    # polling), takes what has arrived, and keeps a partial line in
+    # `pending` until the rest comes
+    reader = asyncio.StreamReader(_in)
     poller = uselect.poll()
-    poller.register(sys.stdin, uselect.POLLIN)
+    poller.register(_in, uselect.POLLIN)
+    pending = b""
 
     while True:
-        ev = poller.poll(0)
-        if not ev:
-            await asyncio.sleep_ms(10)
-            continue
-
-        line = sys.stdin.readline()
-        if not line:
-            await asyncio.sleep_ms(10)
-            continue
-
-        try:
-            msg = json.loads(line)
-        except Exception:
-            continue
-
-        if not isinstance(msg, dict):
+        first = await reader.read(1)
+        if not first:
+            # stdin closed: nothing to wait on
+            await asyncio.sleep_ms(100)
             continue
+        chunk = _read_available(poller, first)
 
-        if msg.get("type") != "cmd":
-            continue
-
-        cid = msg.get("id")
-        name = msg.get("name", "")
-        args = msg.get("args", {})
-
-        if not isinstance(cid, int):
-            continue
-        if not isinstance(args, dict):
-            args = {}
+        start = 0
+        while True:
+            i = chunk.find(b"\n", start)
+            if i < 0:
+                break
+            line = pending + chunk[start:i] if pending else chunk[start:i]
+            pending = b""
+            start = i + 1
+            cmd = _parse_cmd(line)
+            if cmd is not None:
+                await dispatcher.handle_cmd(cmd[0], cmd[1], cmd[2])
 
-        await dispatcher.handle_cmd(cid, name, args)
+        if start < len(chunk):
+            pending += chunk[start:]
+            if len(pending) > RX_MAX_LINE:
+                # no newline in sight: drop it rather than grow without bound
+                pending = b""
@@ -0,0 +1,88 @@
+import uasyncio as asyncio
+import time
+
+# ticks run back to back when behind; further behind than this, the
+# schedule jumps ahead and the missed ticks are counted as dropped
+MAX_CATCHUP = 5
+
+
+class TickSchedule:
+    """
+    Fixed-rate ticks at absolute deadlines (t0 + n * period), so the tick
+    rate does not drift with the work done per tick. A late tick runs as
+    soon as it can and the next deadline stays where it was (catch-up).
+    Lateness and work time are kept in us for tick_stats.
+    """
+
+    def __init__(self, tick_hz=100.0, max_catchup=MAX_CATCHUP):
+        self.period_us = int(1000000 / tick_hz)
+        self.max_catchup = int(max_catchup)
+        self._next = time.ticks_add(time.ticks_us(), self.period_us)
+        self._start = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.ticks = 0
+        self.late_ticks = 0     # started a full period or more after their deadline
+        self.overruns = 0       # tick work took longer than a period
+        self.dropped = 0        # skipped when more than max_catchup behind
+        self.late_max_us = 0
+        self.late_sum_us = 0
+        self.late_sq_ms = 0.0   # sum of (late/1000)^2, for rms jitter
+        self.work_max_us = 0
+        self.work_sum_us = 0
+
+    async def wait(self):
+        # sleep to the next deadline; returns how late (us) the tick starts
+        wait_us = time.ticks_diff(self._next, time.ticks_us())
+        if wait_us > 0:
+            await asyncio.sleep_ms((wait_us + 999) // 1000)
+        else:
+            # behind: still let the other tasks in between ticks
+            await asyncio.sleep_ms(0)
+        now = time.ticks_us()
+        late = time.ticks_diff(now, self._next)
+        if late < 0:
+            late = 0
+
+        behind = late // self.period_us
+        if behind > self.max_catchup:
+            # too far behind (e.g. a long blocking write): resync, don't burst
+            self.dropped += behind
+            self._next = time.ticks_add(self._next, behind * self.period_us)
+            late -= behind * self.period_us
+        elif behind > 0:
+            self.late_ticks += 1
+
+        self.ticks += 1
+        if late > self.late_max_us:
+            self.late_max_us = late
+        self.late_sum_us += late
+        self.late_sq_ms += (late / 1000.0) ** 2
+        self._next = time.ticks_add(self._next, self.period_us)
+        self._start = time.ticks_us()
+        return late
+
+    def done(self):
+        # call at the end of the tick's work
+        work = time.ticks_diff(time.ticks_us(), self._start)
+        if work > self.work_max_us:
+            self.work_max_us = work
+        self.work_sum_us += work
+        if work > self.period_us:
+            self.overruns += 1
+
+    def stats(self):
+        n = max(1, self.ticks)
+        return {
+            "period_us": self.period_us,
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "overruns": self.overruns,
+            "dropped": self.dropped,
+            "late_mean_us": self.late_sum_us // n,
+            "late_max_us": self.late_max_us,
+            "jitter_rms_us": int(1000.0 * (self.late_sq_ms / n) ** 0.5),
+            "work_mean_us": self.work_sum_us // n,
+            "work_max_us": self.work_max_us,
+        }
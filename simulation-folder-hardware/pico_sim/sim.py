@@ -1,7 +1,8 @@
-import uasyncio as asyncio
 import time
 from proto import send_msg
+from binproto import BATCH_FIELDS
 from faults import apply_faults, apply_scenario, add_fault
+from sched import TickSchedule
 
 def _ms_since(t0):
     return time.ticks_diff(time.ticks_ms(), t0)
@@ -26,11 +27,63 @@ def check_stable(state, job, dm, dt_s):
         state._stable_start_ms = None
     return False
 
+def ticks_per_sample(state):
+    return int(max(1, round(state.tick_hz / max(0.2, state.stream_hz))))
+
+def batch_sample(state):
+    # columnar buffers are allocated once per batch size, then reused
+    k = state.stream_batch
+    b = state.batch
+    if b is None or b["k"] != k:
+        b = {"k": k, "n": 0, "tick0": 0, "cols": {f: [0.0] * k for f in BATCH_FIELDS}}
+        state.batch = b
+
+    d = state.sensors_dict()
+    i = b["n"]
+    if i == 0:
+        b["tick0"] = state.sim_tick
+        b["t0_ms"] = d["t_ms"]
+    cols = b["cols"]
+    for f in BATCH_FIELDS:
+        cols[f][i] = d[f]
+    b["n"] = i + 1
+
+    if b["n"] >= k:
+        b["n"] = 0
+        send_msg({
+            "type": "sensors_batch",
+            "tick0": b["tick0"],
+            "t0_ms": b["t0_ms"],
+            "t1_ms": d["t_ms"],
+            "dtick": ticks_per_sample(state),
+            "n": k,
+            "stream_hz": d["stream_hz"],
+            "job": d["job"],
+            "scenario": d["scenario"],
+            "cols": cols,
+        })
+
+def stream_sample(state):
+    # called on every tick boundary, so each Nth tick is sent exactly once
+    if not state.stream_enabled or state.sim_tick % ticks_per_sample(state) != 0:
+        return
+    if time.ticks_diff(state.stream_pause_until_ms, time.ticks_ms()) > 0:
+        return
+    if state.stream_batch > 1:
+        batch_sample(state)
+    else:
+        send_msg(state.delta.encode(state.sensors_dict()))
+
 async def sim_tick_task(state, tick_hz=100.0):
+    # sim time advances dt_s per tick; the schedule keeps ticks on real deadlines
     dt_s = 1.0 / tick_hz
-    tick_ms = int(1000 / tick_hz)
+    state.tick_hz = tick_hz
+    sched = TickSchedule(tick_hz)
+    state.sched = sched
 
     while True:
+        await sched.wait()
+
         # nominal values each tick; faults may override
         state.bus_voltage_v = 24.0
         state.pump_pressure_bar = 1.0
@@ -90,25 +143,10 @@ async def sim_tick_task(state, tick_hz=100.0):
 
         state.clamp_nonneg()
 
-        # scenario currently no-op; faults may still be set manually later
+        # scenario events due this tick become faults; faults override the nominals
         apply_scenario(state, add_fault)
         apply_faults(state)
 
         state.sim_tick += 1
-        await asyncio.sleep_ms(tick_ms)
-
-async def sensor_stream_task(state, tick_hz=100.0):
-    while True:
-        if not state.stream_enabled:
-            await asyncio.sleep_ms(50)
-            continue
-
-        if time.ticks_diff(state.stream_pause_until_ms, time.ticks_ms()) > 0:
-            await asyncio.sleep_ms(50)
-            continue
-
-        ticks_per_msg = int(max(1, round(tick_hz / max(0.2, state.stream_hz))))
-        if (state.sim_tick % ticks_per_msg) == 0:
-            send_msg({"type": "sensors", "data": state.sensors_dict()})
-
-        await asyncio.sleep_ms(5)
+        stream_sample(state)
+        sched.done()
@@ -1,9 +1,13 @@
-import math
 import time
+from delta import DeltaEncoder
+from noise import SensorNoise
 
 def now_ms():
     return time.ticks_ms()
 
+def _no_noise(key):
+    return 0.0
+
 class SimState:
     def __init__(self):
         # masses (kg)
@@ -24,19 +28,29 @@ class SimState:
         self.stream_enabled = False
         self.stream_hz = 10.0
         self.stream_pause_until_ms = 0
+        self.stream_batch = 1  # >1: send sensors_batch frames of this many samples
+        self.batch = None      # sensors_batch being filled (sim.py)
+        self.tick_hz = 100.0
+        self.sched = None       # TickSchedule of sim_tick_task (sched.py)
+        self.delta = DeltaEncoder()  # keyframe/delta mode, off unless start_stream asks
 
         # deterministic behavior controls
-        self.deterministic = True
+        self.deterministic = True  # seeded sensor noise on (off: noiseless readings)
+        self.noise = SensorNoise(seed=1)
         self.sim_tick = 0  # fixed-step sim clock tick counter
 
         # faults and scenario (faults.py)
         self.faults = []
+        self._fault_pending = False
+        self._fault_next_end_ms = 0
         self.scenario_name = ""
         self.scenario_start_ms = now_ms()
         self.scenario = []
         self.scenario_period_ms = 0
-        self._scenario_fired = set()
-        self._scenario_last_elapsed = None
+        self.scenario_repeat = 0
+        self._scenario_i = 0
+        self._scenario_base_ms = self.scenario_start_ms
+        self._scenario_pass = 0
 
         # active job (sim.py)
         self.job = None
@@ -49,22 +63,20 @@ class SimState:
         self.tank2_mass_kg = max(0.0, self.tank2_mass_kg)
 
     def sensors_dict(self):
-        # Deterministic, repeatable wiggle (no randomness)
+        # seeded noise: the n-th reading is the same in every run with the same seed
         if self.deterministic:
-            n_p = 0.01 * math.sin(self.sim_tick * 0.05)
-            n_v = 0.02 * math.sin(self.sim_tick * 0.03)
+            n = self.noise.get
         else:
-            n_p = 0.0
-            n_v = 0.0
+            n = _no_noise
 
         return {
             # REQUIRED: your Pi safety reads these
-            "pump_pressure_bar": float(self.pump_pressure_bar + n_p),
-            "bus_voltage_v": float(self.bus_voltage_v + n_v),
+            "pump_pressure_bar": float(self.pump_pressure_bar + n("pump_pressure_bar")),
+            "bus_voltage_v": float(self.bus_voltage_v + n("bus_voltage_v")),
 
             # Helpful extras for logs/plots
-            "canister_mass_kg": float(self.canister_mass_kg),
-            "sump_mass_kg": float(self.sump_mass_kg),
+            "canister_mass_kg": max(0.0, float(self.canister_mass_kg + n("canister_mass_kg"))),
+            "sump_mass_kg": max(0.0, float(self.sump_mass_kg + n("sump_mass_kg"))),
             "tank1_mass_kg": float(self.tank1_mass_kg),
             "tank2_mass_kg": float(self.tank2_mass_kg),
             "pump_current_a": float(self.pump_current_a),
@@ -73,5 +85,7 @@ class SimState:
             "stream_hz": float(self.stream_hz),
             "job": self.job["type"] if self.job else "",
             "sim_tick": int(self.sim_tick),
+            # device clock at sampling; the Pi maps it to host time
+            "t_ms": time.ticks_ms(),
             "scenario": self.scenario_name,
         }
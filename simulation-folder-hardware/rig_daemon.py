@@ -0,0 +1,77 @@
+# rig_daemon.py
+#
+# Holds the one PicoLink and shares it over a Unix socket, so bringup
+# (--daemon), orchestrate_cycle (--daemon), dashboards and exporters can
+# run against the same rig at once. See tcd1/daemon.py for the protocol.
+
+import argparse
+import asyncio
+import json
+import time
+
+from tcd1.actions.data_collect import start_stream
+from tcd1.daemon import DEFAULT_SOCKET, RigDaemon
+from tcd1.discovery import find_port
+from tcd1.liveness import LivenessManager
+from tcd1.pico_link import PicoLink
+from tcd1.safety import safe_stop_pico
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--socket", default=DEFAULT_SOCKET)
+    ap.add_argument("--port", default="auto")
+    ap.add_argument("--baud", type=int, default=115200)
+    ap.add_argument("--rediscover", action="store_true", help="With --port auto: probe all ports instead of using the cached one")
+    ap.add_argument("--pending-policy", choices=["fail", "retry"], default="fail", help="Calls in flight when the port drops: fail them or resend after reconnect")
+    ap.add_argument("--framing", choices=["bin", "json"], default="bin", help="Pico->Pi framing (falls back to json)")
+    ap.add_argument("--stream-hz", type=float, default=10.0)
+    ap.add_argument("--stream-batch", type=int, default=1, help="Samples per sensors_batch frame (1 = one frame per sample)")
+    ap.add_argument("--keyframe-s", type=float, default=0.0, help="Delta stream: full frame every N s, changed fields in between (0 = off)")
+    ap.add_argument("--client-queue", type=int, default=256, help="Samples buffered per client before the oldest are dropped")
+    ap.add_argument("--quiet-s", type=float, default=1.0, help="Heartbeat only after this long without any controller traffic")
+    ap.add_argument("--sync-every", type=float, default=10.0, help="Heartbeat at least this often for clock sync (0 = only when quiet)")
+    ap.add_argument("--status-every", type=float, default=30.0, help="Print client/link status every N s (0 = off)")
+    args = ap.parse_args()
+
+    port = await find_port(args.baud, use_cache=not args.rediscover) if args.port == "auto" else args.port
+    pico = PicoLink(port, args.baud, pending_policy=args.pending_policy)
+    rx = asyncio.create_task(pico.rx_task())
+    live = LivenessManager(pico, quiet_s=args.quiet_s, sync_every_s=args.sync_every or None)
+    hb = asyncio.create_task(live.run())
+    # the daemon owns the stream and restarts it after a client's safe_stop/reset_sim
+    daemon = RigDaemon(
+        pico, args.socket, queue_max=args.client_queue,
+        stream=lambda: start_stream(pico, args.stream_hz, args.stream_batch, args.keyframe_s),
+    )
+
+    try:
+        await pico.call("heartbeat", {}, 5.0)
+        print("[FRAMING]", await pico.negotiate_framing(args.framing))
+
+        await daemon.start()
+        print(f"[DAEMON] serving {pico.port} on {args.socket}")
+        server = asyncio.create_task(daemon.serve_forever())
+        try:
+            while True:
+                await asyncio.sleep(args.status_every if args.status_every > 0 else 3600.0)
+                if args.status_every > 0:
+                    st = daemon.status()
+                    st["liveness"] = live.state
+                    print(f"[DAEMON {time.strftime('%H:%M:%S')}]", json.dumps(st))
+        finally:
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+
+    finally:
+        await daemon.aclose()
+        await safe_stop_pico(pico)
+        print("[LIVENESS]", live.report())
+        hb.cancel()
+        rx.cancel()
+        await asyncio.gather(hb, rx, return_exceptions=True)
+        pico.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,9 +1,24 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from tcd1.pico_link import PicoLink
 
 
-async def start_stream(pico: PicoLink, hz: float) -> Dict[str, Any]:
-    return await pico.call("start_stream", {"hz": float(hz)}, 3.0)
+async def start_stream(
+    pico: PicoLink,
+    hz: float,
+    batch: int = 1,
+    keyframe_s: float = 0.0,
+    deadband: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    args: Dict[str, Any] = {"hz": float(hz)}
+    if batch > 1:
+        # sensors_batch frames of `batch` samples (lets hz go up to the tick rate)
+        args["batch"] = int(batch)
+    if keyframe_s > 0:
+        # full frame every keyframe_s, sensors_delta (changed fields only) in between
+        args["keyframe_s"] = float(keyframe_s)
+        if deadband:
+            args["deadband"] = {k: float(v) for k, v in deadband.items()}
+    return await pico.call("start_stream", args, 3.0)
 
 
 async def stop_stream(pico: PicoLink) -> Dict[str, Any]:
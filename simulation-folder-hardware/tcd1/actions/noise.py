@@ -0,0 +1,10 @@
+from typing import Dict, Any, Optional
+from tcd1.pico_link import PicoLink
+
+
+async def set_noise(pico: PicoLink, seed: int, sigma: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    # pico_sim only: reseed sensor noise (same seed, same readings); sigma overrides per key
+    args: Dict[str, Any] = {"seed": int(seed)}
+    if sigma:
+        args["sigma"] = {k: float(v) for k, v in sigma.items()}
+    return await pico.call("set_noise", args, 3.0)
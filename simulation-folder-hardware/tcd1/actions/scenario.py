@@ -0,0 +1,21 @@
+from typing import Any, Dict, List, Optional, Sequence
+from tcd1.pico_link import PicoLink
+
+
+async def set_scenario(pico: PicoLink, name: str) -> Dict[str, Any]:
+    # pico_sim only: replay a named fault timeline ("none" stops it)
+    return await pico.call("set_scenario", {"name": str(name)}, 3.0)
+
+
+async def define_scenario(
+    pico: PicoLink,
+    name: str,
+    events: Sequence[Sequence[Any]],
+    period_s: float = 0.0,
+    repeat: int = 0,
+    start: bool = False,
+) -> Dict[str, Any]:
+    # pico_sim only: events [(at_s, fault type, duration_s[, value]), ...]; period_s > 0 loops it
+    ev: List[List[Any]] = [[float(e[0]), str(e[1]), float(e[2])] + ([float(e[3])] if len(e) > 3 and e[3] is not None else []) for e in events]
+    args: Dict[str, Any] = {"name": str(name), "events": ev, "period_s": float(period_s), "repeat": int(repeat), "start": bool(start)}
+    return await pico.call("define_scenario", args, 3.0)
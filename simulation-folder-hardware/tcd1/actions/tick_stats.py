@@ -0,0 +1,7 @@
+from typing import Dict, Any
+from tcd1.pico_link import PicoLink
+
+
+async def tick_stats(pico: PicoLink, reset: bool = False) -> Dict[str, Any]:
+    # pico_sim only: tick lateness/jitter (us), overruns and dropped ticks; reset starts a new window
+    return await pico.call("tick_stats", {"reset": bool(reset)}, 3.0)
@@ -0,0 +1,287 @@
+import json
+import struct
+from typing import Any, Dict, Optional
+
+# Host side of the Pico binary framing. Layout must match pico_sim/binproto.py:
+#   frame  = kind(u8) seq(u16) payload crc16(u16)   (little endian)
+#   wire   = COBS(frame) + b"\x00"
+
+FEATURE = "bin_frames"
+DELIM = b"\x00"
+
+KIND_SENSORS = 0x01
+KIND_JSON = 0x02
+KIND_SENSORS_BATCH = 0x03
+KIND_SENSORS_DELTA = 0x04
+
+SENSOR_FIELDS = (
+    "pump_pressure_bar",
+    "bus_voltage_v",
+    "canister_mass_kg",
+    "sump_mass_kg",
+    "tank1_mass_kg",
+    "tank2_mass_kg",
+    "pump_current_a",
+    "dv_current_a",
+    "stream_hz",
+)
+# sim_tick, t_ms (device ticks_ms), floats, job code
+SENSOR_STRUCT = struct.Struct("<II9fB")
+
+# sensors_batch: tick0, t0_ms, t1_ms (first/last sample), dtick, n, job code,
+# stream_hz, then n f32 per column
+BATCH_FIELDS = SENSOR_FIELDS[:-1]
+BATCH_STRUCT = struct.Struct("<IIIHBBf")
+
+# sensors_delta: sim_tick, t_ms, mask, then f32 per set SENSOR_FIELDS bit,
+# job code if bit 9, scenario (u8 len + bytes) if bit 10
+DELTA_STRUCT = struct.Struct("<IIH")
+DELTA_JOB_BIT = 1 << 9
+DELTA_SCENARIO_BIT = 1 << 10
+
+JOB_CODES = ("", "drain_canister_to_sump", "drain_sump_to_tank")
+
+_HEADER = struct.Struct("<BH")
+_CRC = struct.Struct("<H")
+
+
+class FrameError(ValueError):
+    pass
+
+
+def _make_crc_table() -> list[int]:
+    tbl = []
+    for i in range(256):
+        c = i << 8
+        for _ in range(8):
+            c = ((c << 1) ^ 0x1021) if (c & 0x8000) else (c << 1)
+        tbl.append(c & 0xFFFF)
+    return tbl
+
+
+_CRC_TABLE = _make_crc_table()
+
+
+def crc16(data: bytes, crc: int = 0xFFFF) -> int:
+    # CRC-16/CCITT-FALSE
+    tbl = _CRC_TABLE
+    for b in data:
+        crc = ((crc << 8) & 0xFFFF) ^ tbl[((crc >> 8) ^ b) & 0xFF]
+    return crc
+
+
+def cobs_encode(data: bytes) -> bytes:
+    out = bytearray()
+    for block in data.split(b"\x00"):
+        while len(block) >= 254:
+            out.append(0xFF)
+            out += block[:254]
+            block = block[254:]
+        out.append(len(block) + 1)
+        out += block
+    return bytes(out)
+
+
+def cobs_decode(data: bytes) -> bytes:
+    if 0 in data:
+        raise FrameError("zero byte inside COBS frame")
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        code = data[i]
+        end = i + code
+        if end > n:
+            raise FrameError("truncated COBS frame")
+        out += data[i + 1:end]
+        i = end
+        if code < 0xFF and i < n:
+            out.append(0)
+    return bytes(out)
+
+
+def pack_sensors(d: Dict[str, Any]) -> bytes:
+    job = d.get("job", "")
+    scen = str(d.get("scenario", "")).encode()[:255]
+    return SENSOR_STRUCT.pack(
+        int(d["sim_tick"]) & 0xFFFFFFFF,
+        int(d.get("t_ms", 0)) & 0xFFFFFFFF,
+        *(float(d[k]) for k in SENSOR_FIELDS),
+        JOB_CODES.index(job) if job in JOB_CODES else 0xFF,
+    ) + bytes((len(scen),)) + scen
+
+
+def unpack_sensors(payload: bytes) -> Dict[str, Any]:
+    n = SENSOR_STRUCT.size
+    if len(payload) < n + 1:
+        raise FrameError("short sensors payload")
+    vals = SENSOR_STRUCT.unpack_from(payload)
+    scen_len = payload[n]
+    job = vals[-1]
+    d: Dict[str, Any] = dict(zip(SENSOR_FIELDS, vals[2:-1]))
+    d["job"] = _job_name(job)
+    d["sim_tick"] = vals[0]
+    d["t_ms"] = vals[1]
+    d["scenario"] = payload[n + 1:n + 1 + scen_len].decode(errors="ignore")
+    return d
+
+
+def _job_name(code: int) -> str:
+    return JOB_CODES[code] if code < len(JOB_CODES) else "?"
+
+
+def pack_batch(msg: Dict[str, Any]) -> bytes:
+    n = int(msg["n"])
+    job = msg.get("job", "")
+    scen = str(msg.get("scenario", "")).encode()[:255]
+    out = [BATCH_STRUCT.pack(
+        int(msg["tick0"]) & 0xFFFFFFFF,
+        int(msg.get("t0_ms", 0)) & 0xFFFFFFFF,
+        int(msg.get("t1_ms", 0)) & 0xFFFFFFFF,
+        int(msg["dtick"]),
+        n,
+        JOB_CODES.index(job) if job in JOB_CODES else 0xFF,
+        float(msg["stream_hz"]),
+    )]
+    col = struct.Struct(f"<{n}f")
+    for f in BATCH_FIELDS:
+        out.append(col.pack(*msg["cols"][f][:n]))
+    out.append(bytes((len(scen),)))
+    out.append(scen)
+    return b"".join(out)
+
+
+def unpack_batch(payload: bytes) -> Dict[str, Any]:
+    hdr = BATCH_STRUCT.size
+    if len(payload) < hdr:
+        raise FrameError("short sensors_batch payload")
+    tick0, t0_ms, t1_ms, dtick, n, job, hz = BATCH_STRUCT.unpack_from(payload)
+    col = struct.Struct(f"<{n}f")
+    end = hdr + col.size * len(BATCH_FIELDS)
+    if len(payload) < end + 1:
+        raise FrameError("short sensors_batch payload")
+
+    cols = {}
+    off = hdr
+    for f in BATCH_FIELDS:
+        cols[f] = list(col.unpack_from(payload, off))
+        off += col.size
+    scen_len = payload[end]
+    return {
+        "type": "sensors_batch",
+        "tick0": tick0,
+        "t0_ms": t0_ms,
+        "t1_ms": t1_ms,
+        "dtick": dtick,
+        "n": n,
+        "stream_hz": hz,
+        "job": _job_name(job),
+        "scenario": payload[end + 1:end + 1 + scen_len].decode(errors="ignore"),
+        "cols": cols,
+    }
+
+
+def pack_delta(d: Dict[str, Any]) -> bytes:
+    mask = 0
+    vals = []
+    for i, f in enumerate(SENSOR_FIELDS):
+        if f in d:
+            mask |= 1 << i
+            vals.append(float(d[f]))
+    tail = b""
+    if "job" in d:
+        mask |= DELTA_JOB_BIT
+        tail += bytes((JOB_CODES.index(d["job"]) if d["job"] in JOB_CODES else 0xFF,))
+    if "scenario" in d:
+        mask |= DELTA_SCENARIO_BIT
+        scen = str(d["scenario"]).encode()[:255]
+        tail += bytes((len(scen),)) + scen
+    head = DELTA_STRUCT.pack(
+        int(d.get("sim_tick", 0)) & 0xFFFFFFFF,
+        int(d.get("t_ms", 0)) & 0xFFFFFFFF,
+        mask,
+    )
+    return head + struct.pack(f"<{len(vals)}f", *vals) + tail
+
+
+def unpack_delta(payload: bytes) -> Dict[str, Any]:
+    if len(payload) < DELTA_STRUCT.size:
+        raise FrameError("short sensors_delta payload")
+    tick, t_ms, mask = DELTA_STRUCT.unpack_from(payload)
+    fields = [f for i, f in enumerate(SENSOR_FIELDS) if mask & (1 << i)]
+    col = struct.Struct(f"<{len(fields)}f")
+    off = DELTA_STRUCT.size
+    if len(payload) < off + col.size:
+        raise FrameError("short sensors_delta payload")
+
+    d: Dict[str, Any] = dict(zip(fields, col.unpack_from(payload, off)))
+    d["sim_tick"] = tick
+    d["t_ms"] = t_ms
+    off += col.size
+    try:
+        if mask & DELTA_JOB_BIT:
+            d["job"] = _job_name(payload[off])
+            off += 1
+        if mask & DELTA_SCENARIO_BIT:
+            n = payload[off]
+            d["scenario"] = payload[off + 1:off + 1 + n].decode(errors="ignore")
+    except IndexError as e:
+        raise FrameError("short sensors_delta payload") from e
+    return d
+
+
+def encode_frame(kind: int, seq: int, payload: bytes) -> bytes:
+    body = _HEADER.pack(kind, seq & 0xFFFF) + payload
+    return cobs_encode(body + _CRC.pack(crc16(body))) + DELIM
+
+
+def encode_msg(msg: Dict[str, Any], seq: int) -> bytes:
+    if msg.get("type") == "sensors":
+        return encode_frame(KIND_SENSORS, seq, pack_sensors(msg["data"]))
+    if msg.get("type") == "sensors_delta":
+        return encode_frame(KIND_SENSORS_DELTA, seq, pack_delta(msg["data"]))
+    if msg.get("type") == "sensors_batch":
+        return encode_frame(KIND_SENSORS_BATCH, seq, pack_batch(msg))
+    return encode_frame(KIND_JSON, seq, json.dumps(msg).encode())
+
+
+def decode_frame(raw: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Decode one COBS frame (without the trailing delimiter) into the same
+    message dict the JSON protocol would have produced, plus "seq".
+    Raises FrameError on corrupt frames.
+    """
+    frame = cobs_decode(raw)
+    if len(frame) < _HEADER.size + _CRC.size:
+        raise FrameError("short frame")
+
+    body = frame[:-_CRC.size]
+    (crc,) = _CRC.unpack_from(frame, len(body))
+    if crc16(body) != crc:
+        raise FrameError("crc mismatch")
+
+    kind, seq = _HEADER.unpack_from(body)
+    payload = body[_HEADER.size:]
+
+    if kind == KIND_SENSORS:
+        return {"type": "sensors", "seq": seq, "data": unpack_sensors(payload)}
+
+    if kind == KIND_SENSORS_DELTA:
+        return {"type": "sensors_delta", "seq": seq, "data": unpack_delta(payload)}
+
+    if kind == KIND_SENSORS_BATCH:
+        msg = unpack_batch(payload)
+        msg["seq"] = seq
+        return msg
+
+    if kind == KIND_JSON:
+        try:
+            msg = json.loads(payload.decode(errors="ignore"))
+        except ValueError as e:
+            raise FrameError("bad json payload") from e
+        if not isinstance(msg, dict):
+            return None
+        msg["seq"] = seq
+        return msg
+
+    raise FrameError(f"unknown frame kind 0x{kind:02x}")
@@ -0,0 +1,113 @@
+import asyncio
+import selectors
+import time
+from typing import Any, Callable, Coroutine, Optional
+
+
+def _loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def monotonic() -> float:
+    """
+    Monotonic seconds on the running event loop's clock: time.monotonic()
+    on a normal loop, simulated time on a VirtualTimeLoop. Use this instead
+    of time.monotonic() for anything compared against asyncio timeouts.
+    """
+    loop = _loop()
+    return loop.time() if loop is not None else time.monotonic()
+
+
+def wall() -> float:
+    """Wall-clock time (epoch s) that advances with monotonic()."""
+    loop = _loop()
+    if isinstance(loop, VirtualTimeLoop):
+        return loop.wall()
+    return time.time()
+
+
+class LoopClock:
+    """
+    The clock SystemController and friends take as clock=...; the default
+    follows the running loop, tests can pass anything with the same two
+    methods (e.g. a manually stepped clock).
+    """
+
+    monotonic = staticmethod(monotonic)
+    time = staticmethod(wall)
+
+
+CLOCK = LoopClock()
+
+
+class _VirtualSelector(selectors.DefaultSelector):
+    """
+    Polls for real I/O without blocking; when nothing is ready and the loop
+    would have slept until its next timer, moves the virtual clock there.
+    """
+
+    def __init__(self, advance: Callable[[float], None]):
+        super().__init__()
+        self._advance = advance
+
+    def select(self, timeout: Optional[float] = None):
+        if timeout is None:
+            # no timers at all: only real I/O can wake us
+            return super().select(None)
+        events = super().select(0)
+        if not events and timeout > 0:
+            self._advance(timeout)
+        return events
+
+
+class VirtualTimeLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop on simulated time. Whenever every task is waiting on a timer
+    (asyncio.sleep, wait_for timeouts, call_later) the clock jumps to the
+    earliest one instead of sleeping, so a simulation runs as fast as the
+    CPU allows while every timeout, stable-time window and stream period
+    keeps its length in loop time.
+
+    Only for code that lives entirely on this loop (InProcessControllerLink);
+    a subprocess, serial port or thread keeps real time and would see the
+    loop's clock race ahead of it.
+    """
+
+    def __init__(self):
+        self._vt0 = self._vt = time.monotonic()
+        self._wall0 = time.time()
+        super().__init__(_VirtualSelector(self._advance))
+
+    def _advance(self, dt: float) -> None:
+        self._vt += dt
+
+    def time(self) -> float:
+        return self._vt
+
+    def wall(self) -> float:
+        return self._wall0 + (self._vt - self._vt0)
+
+    def elapsed(self) -> float:
+        return self._vt - self._vt0
+
+
+def run(main: Coroutine[Any, Any, Any], virtual: bool = False) -> Any:
+    """
+    asyncio.run(main), on a VirtualTimeLoop when virtual is set; prints how
+    much simulated time went by in how much real time.
+    """
+    if not virtual:
+        return asyncio.run(main)
+
+    t0 = time.perf_counter()
+    with asyncio.Runner(loop_factory=VirtualTimeLoop) as runner:
+        loop = runner.get_loop()
+        try:
+            return runner.run(main)
+        finally:
+            real = time.perf_counter() - t0
+            sim = loop.elapsed()
+            print(f"[CLOCK] virtual {sim:.1f} s in {real:.2f} s real ({sim / max(real, 1e-9):.0f}x)")
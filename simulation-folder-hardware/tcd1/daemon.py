@@ -0,0 +1,253 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+DEFAULT_SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), "tcd1_rig.sock")
+
+# answered by the daemon itself, never forwarded to the controller
+DAEMON_CMDS = ("daemon_status",)
+
+# the daemon owns the stream: these are per client (subscribe/unsubscribe)
+# instead of going to the controller, where they would stop every client
+CLIENT_STREAM_CMDS = ("start_stream", "stop_stream")
+
+# forwarded, but they stop the controller's stream; the daemon restarts it
+STREAM_STOPPING_CMDS = ("safe_stop", "reset_sim")
+
+
+def _line(obj: Dict[str, Any]) -> bytes:
+    return (json.dumps(obj) + "\n").encode()
+
+
+class _Client:
+    """
+    One connected client. Samples go into a bounded deque (oldest dropped
+    when the client can't keep up); command replies are never dropped and
+    go out ahead of queued samples.
+    """
+
+    def __init__(self, cid: int, writer: asyncio.StreamWriter, queue_max: int):
+        self.cid = cid
+        self.writer = writer
+        self.subscribed = True
+        self.samples: Deque[bytes] = deque(maxlen=max(1, queue_max))
+        self.replies: List[bytes] = []
+        self.wake = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.cmds = 0
+
+    def push_sample(self, line: bytes) -> None:
+        if len(self.samples) == self.samples.maxlen:
+            self.dropped += 1
+        self.samples.append(line)
+        self.wake.set()
+
+    def push_reply(self, line: bytes) -> None:
+        self.replies.append(line)
+        self.wake.set()
+
+    async def tx_loop(self) -> None:
+        while True:
+            await self.wake.wait()
+            self.wake.clear()
+            chunks = self.replies + list(self.samples)
+            self.replies = []
+            self.samples.clear()
+            if not chunks:
+                continue
+            self.writer.write(b"".join(chunks))
+            self.sent += len(chunks)
+            # only this client's writer waits here; the link keeps feeding the deque
+            await self.writer.drain()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "id": self.cid,
+            "subscribed": self.subscribed,
+            "queued": len(self.samples),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "cmds": self.cmds,
+        }
+
+
+class RigDaemon:
+    """
+    Owns one controller link (PicoLink / SubprocessControllerLink) and
+    serves it to local clients over a Unix socket, JSON lines both ways:
+
+        client -> daemon  {"type": "cmd", "id", "name", "args", "timeout_s"}
+                          {"type": "subscribe", "on": bool}
+        daemon -> client  {"type": "hello", ...} on connect
+                          {"type": "sensors", "data", "ts", "ts_err"}
+                          {"type": "cmd_result", "id", "ok", "result"|"error"}
+
+    Every sample is encoded once and fanned out to all subscribers. Commands
+    from all clients go through the link's single call path; each reply
+    carries the id the client chose.
+
+    With stream given (a coroutine function starting the stream with the
+    daemon's own settings), the daemon owns the stream: start() runs it,
+    a client's start_stream/stop_stream only (un)subscribes that client,
+    and after a client's safe_stop or reset_sim it runs again, so one
+    client stopping the rig never freezes the others' samples.
+    """
+
+    def __init__(
+        self,
+        link: Any,
+        path: str = DEFAULT_SOCKET,
+        queue_max: int = 256,
+        default_timeout_s: float = 5.0,
+        stream: Optional[Callable[[], Awaitable[Any]]] = None,
+    ):
+        self.link = link
+        self.stream = stream
+        self.stream_restarts = 0
+        self.path = path
+        self.queue_max = int(queue_max)
+        self.default_timeout_s = float(default_timeout_s)
+        self.clients: Dict[int, _Client] = {}
+        self.samples_out = 0
+        self._next_client = 1
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._t_start = time.monotonic()
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            try:
+                _, w = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                os.unlink(self.path)  # stale socket from a crashed daemon
+            else:
+                w.close()
+                raise RuntimeError(f"rig daemon already running on {self.path}")
+
+        if self.stream is not None:
+            await self.stream()
+        self._server = await asyncio.start_unix_server(self._serve_client, path=self.path)
+        self.link.waiters.listeners.append(self._on_sample)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    def _on_sample(self, sample: Dict[str, Any]) -> None:
+        if not self.clients:
+            return
+        ts, ts_err = self.link.sample_time(sample)
+        line = _line({"type": "sensors", "data": sample, "ts": ts, "ts_err": ts_err})
+        self.samples_out += 1
+        for c in self.clients.values():
+            if c.subscribed:
+                c.push_sample(line)
+
+    def _hello(self) -> Dict[str, Any]:
+        return {"type": "hello", "daemon": True, "pid": os.getpid(), "link": getattr(self.link, "hello", None) or {}}
+
+    def status(self) -> Dict[str, Any]:
+        snap = getattr(self.link, "metrics_snapshot", None)
+        return {
+            "uptime_s": round(time.monotonic() - self._t_start, 1),
+            "samples_out": self.samples_out,
+            "stream_restarts": self.stream_restarts,
+            "clients": [c.stats() for c in self.clients.values()],
+            "link": snap() if snap else {},
+        }
+
+    async def _run_cmd(self, client: _Client, msg: Dict[str, Any]) -> None:
+        cid = msg.get("id")
+        name = str(msg.get("name", ""))
+        args = msg.get("args") or {}
+        client.cmds += 1
+        try:
+            if name == "daemon_status":
+                res = self.status()
+            elif name in CLIENT_STREAM_CMDS and self.stream is not None:
+                client.subscribed = name == "start_stream"
+                res = {"stream": "on" if client.subscribed else "off", "daemon": True}
+            else:
+                timeout_s = float(msg.get("timeout_s") or self.default_timeout_s)
+                try:
+                    res = await self.link.call(name, args, timeout_s)
+                finally:
+                    if name in STREAM_STOPPING_CMDS and self.stream is not None:
+                        await self._restart_stream()
+            reply = {"type": "cmd_result", "id": cid, "ok": True, "result": res}
+        except asyncio.TimeoutError:
+            reply = {"type": "cmd_result", "id": cid, "ok": False, "error": f"timeout: {name}"}
+        except Exception as e:
+            reply = {"type": "cmd_result", "id": cid, "ok": False, "error": str(e)}
+        client.push_reply(_line(reply))
+
+    async def _restart_stream(self) -> None:
+        try:
+            await self.stream()
+            self.stream_restarts += 1
+        except Exception as e:
+            # the command's own reply still goes out; liveness reports the stall
+            print(f"[DAEMON] stream restart failed: {e!r}")
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = _Client(self._next_client, writer, self.queue_max)
+        self._next_client += 1
+        self.clients[client.cid] = client
+        client.push_reply(_line(self._hello()))
+        tx = asyncio.create_task(client.tx_loop())
+        cmds: set = set()
+        try:
+            while not tx.done():
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    msg = json.loads(line.decode(errors="ignore"))
+                except Exception:
+                    continue
+                if not isinstance(msg, dict):
+                    continue
+
+                t = msg.get("type")
+                if t == "cmd":
+                    task = asyncio.create_task(self._run_cmd(client, msg))
+                    cmds.add(task)
+                    task.add_done_callback(cmds.discard)
+                elif t == "subscribe":
+                    client.subscribed = bool(msg.get("on", True))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.pop(client.cid, None)
+            # commands already sent to the controller still run to completion
+            tx.cancel()
+            await asyncio.gather(tx, return_exceptions=True)
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def aclose(self) -> None:
+        try:
+            self.link.waiters.listeners.remove(self._on_sample)
+        except ValueError:
+            pass
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for c in list(self.clients.values()):
+            try:
+                c.writer.close()
+            except Exception:
+                pass
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from serial.tools import list_ports
+
+from tcd1.pico_link import PicoCommandError, PicoLink
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "tcd1", "pico_ports.json")
+
+HelloMatch = Callable[[Dict[str, Any]], bool]
+
+
+@dataclass
+class Discovered:
+    port: str
+    hello: Dict[str, Any] = field(default_factory=dict)
+    serial_number: Optional[str] = None
+    cached: bool = False
+
+    @property
+    def features(self) -> List[str]:
+        feats = self.hello.get("features", [])
+        return feats if isinstance(feats, list) else []
+
+
+def _is_pico(hello: Dict[str, Any]) -> bool:
+    # legacy firmware (no hello command) gets device "pico" from probe_port
+    # only after answering a real heartbeat
+    return hello.get("device") == "pico"
+
+
+def _load_cache(path: str) -> Dict[str, Any]:
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path: str, cache: Dict[str, Any]) -> None:
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(cache, f, indent=2)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # cache is an optimization only
+
+
+def candidate_ports() -> list:
+    """USB serial ports, most Pico-looking first."""
+    ports = [p for p in list_ports.comports() if p.vid is not None or PicoLink.port_score(p) > 0]
+    ports.sort(key=PicoLink.port_score, reverse=True)
+    return ports
+
+
+async def probe_port(port: str, baud: int = 115200, timeout_s: float = 1.5) -> Optional[Dict[str, Any]]:
+    """
+    Ask one port for a hello. Returns the hello dict, or None if nothing on
+    that port answered. Firmware without the hello command (it answers
+    with a command error) must then answer a heartbeat with its ts_ms;
+    it gets {"device": "pico", "legacy": True}, anything else {}, since
+    any device that echoes an error back is not a Pico.
+    """
+    try:
+        link = PicoLink(port, baud, reconnect=False)
+    except Exception:
+        return None
+
+    rx = asyncio.create_task(link.rx_task())
+    try:
+        try:
+            res = await link.call("hello", {}, timeout_s)
+            return {"type": "hello", **res}
+        except PicoCommandError:
+            try:
+                hb = await link.call("heartbeat", {}, timeout_s)
+            except Exception:
+                return {}
+            return {"device": "pico", "legacy": True} if isinstance(hb.get("ts_ms"), int) else {}
+        except Exception:
+            # the boot hello may still have arrived on its own
+            return link.hello or None
+    finally:
+        rx.cancel()
+        await asyncio.gather(rx, return_exceptions=True)
+        link.close()
+
+
+async def discover_pico(
+    baud: int = 115200,
+    timeout_s: float = 1.5,
+    match: HelloMatch = _is_pico,
+    cache_path: Optional[str] = DEFAULT_CACHE,
+    use_cache: bool = True,
+) -> Optional[Discovered]:
+    """
+    Find the Pico: a device whose USB serial number is in the cache is
+    returned without probing; otherwise every candidate port is probed in
+    parallel and the first one whose hello satisfies match wins.
+    """
+    ports = candidate_ports()
+    cache = _load_cache(cache_path) if cache_path else {}
+
+    if use_cache:
+        for p in ports:
+            hit = cache.get(p.serial_number) if p.serial_number else None
+            # entries from before hellos were checked may not be a Pico at all
+            if hit is not None and match(hit.get("hello") or {}):
+                return Discovered(p.device, hit.get("hello", {}), p.serial_number, cached=True)
+
+    async def probe(p) -> tuple:
+        return p, await probe_port(p.device, baud, timeout_s)
+
+    tasks = [asyncio.create_task(probe(p)) for p in ports]
+    found: Optional[Discovered] = None
+    try:
+        for fut in asyncio.as_completed(tasks):
+            p, hello = await fut
+            if hello is not None and match(hello):
+                found = Discovered(p.device, hello, p.serial_number)
+                break
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # a legacy match is only as good as one heartbeat: probe it again next time
+    if found is not None and found.serial_number and cache_path and not found.hello.get("legacy"):
+        cache[found.serial_number] = {"device": found.port, "hello": found.hello, "ts": time.time()}
+        _save_cache(cache_path, cache)
+    return found
+
+
+async def find_port(baud: int = 115200, use_cache: bool = True) -> str:
+    found = await discover_pico(baud, use_cache=use_cache)
+    if found is None:
+        raise RuntimeError("No Pico port found (use --port or check connection)")
+    src = "cache" if found.cached else "hello"
+    print(f"[DISCOVERY] Pico on {found.port} (serial {found.serial_number or '?'}, via {src})")
+    return found.port
+
+
+def forget(serial_number: str, cache_path: str = DEFAULT_CACHE) -> None:
+    cache = _load_cache(cache_path)
+    if cache.pop(serial_number, None) is not None:
+        _save_cache(cache_path, cache)
@@ -0,0 +1,144 @@
+import bisect
+from array import array
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from tcd1 import clock
+
+
+class ChannelRing:
+    """
+    Fixed-capacity ring of (host_ts, device_tick, value) for one sensor key.
+
+    Storage is three preallocated arrays, so memory is capacity * 24 bytes no
+    matter how long the run is. Samples must arrive in host_ts order, which
+    lets window queries bisect instead of scanning.
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("capacity must be > 0")
+        self.capacity = int(capacity)
+        self.ts = array("d", bytes(8 * self.capacity))
+        self.ticks = array("q", bytes(8 * self.capacity))
+        self.values = array("d", bytes(8 * self.capacity))
+        self._head = 0  # next write slot
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def append(self, value: float, ts: float, tick: int = -1) -> None:
+        i = self._head
+        self.values[i] = value
+        self.ts[i] = ts
+        self.ticks[i] = tick
+        self._head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def last(self) -> Optional[Tuple[float, int, float]]:
+        if not self.count:
+            return None
+        i = (self._head - 1) % self.capacity
+        return self.ts[i], self.ticks[i], self.values[i]
+
+    def _segments(self) -> Iterator[Tuple[int, int]]:
+        # physical [start, end) ranges, oldest first
+        start = (self._head - self.count) % self.capacity
+        if start + self.count <= self.capacity:
+            yield start, start + self.count
+        else:
+            yield start, self.capacity
+            yield 0, self._head
+
+    def window(self, seconds: float, now: Optional[float] = None) -> Tuple[array, array, array]:
+        """
+        (ts, ticks, values) of the samples with ts >= now - seconds, oldest
+        first. Copies only the selected slice.
+        """
+        t_min = (clock.monotonic() if now is None else now) - float(seconds)
+        ts, ticks, vals = array("d"), array("q"), array("d")
+        for a, b in self._segments():
+            i = bisect.bisect_left(self.ts, t_min, a, b)
+            ts += self.ts[i:b]
+            ticks += self.ticks[i:b]
+            vals += self.values[i:b]
+        return ts, ticks, vals
+
+    def last_n(self, n: int) -> Tuple[array, array, array]:
+        n = max(0, min(int(n), self.count))
+        ts, ticks, vals = array("d"), array("q"), array("d")
+        skip = self.count - n
+        for a, b in self._segments():
+            i = a + min(skip, b - a)
+            skip -= i - a
+            a = i
+            ts += self.ts[a:b]
+            ticks += self.ticks[a:b]
+            vals += self.values[a:b]
+        return ts, ticks, vals
+
+    def stats(self, seconds: float, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        n/mean/min/max over the window plus the least-squares slope in
+        units per second (None with fewer than two samples).
+        """
+        ts, _, vals = self.window(seconds, now)
+        n = len(vals)
+        if not n:
+            return {"n": 0, "mean": None, "min": None, "max": None, "slope": None}
+
+        mean = sum(vals) / n
+        slope = None
+        if n > 1:
+            t0 = ts[0]
+            mt = sum(ts) / n - t0
+            sxx = sxy = 0.0
+            for t, v in zip(ts, vals):
+                dt = t - t0 - mt
+                sxx += dt * dt
+                sxy += dt * (v - mean)
+            slope = sxy / sxx if sxx > 0 else None
+
+        return {"n": n, "mean": mean, "min": min(vals), "max": max(vals), "slope": slope}
+
+
+class SensorHistory:
+    """
+    One ChannelRing per numeric sensor key, created on first sight.
+    Bools are stored as 0/1, strings are skipped.
+    """
+
+    SKIP_KEYS = ("sim_tick", "ts", "t_ms")
+
+    def __init__(self, capacity: int = 30000):
+        self.capacity = int(capacity)
+        self.channels: Dict[str, ChannelRing] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.channels
+
+    def __getitem__(self, key: str) -> ChannelRing:
+        return self.channels[key]
+
+    def append(self, data: Dict[str, Any], ts: float, tick: Optional[int] = None) -> None:
+        if tick is None:
+            t = data.get("sim_tick")
+            tick = int(t) if isinstance(t, (int, float)) else -1
+
+        for k, v in data.items():
+            if k in self.SKIP_KEYS or not isinstance(v, (int, float)):
+                continue
+            ring = self.channels.get(k)
+            if ring is None:
+                ring = self.channels[k] = ChannelRing(self.capacity)
+            ring.append(float(v), ts, tick)
+
+    def stats(self, key: str, seconds: float, now: Optional[float] = None) -> Dict[str, Any]:
+        ring = self.channels.get(key)
+        if ring is None:
+            return {"n": 0, "mean": None, "min": None, "max": None, "slope": None}
+        return ring.stats(seconds, now)
+
+    def nbytes(self) -> int:
+        return sum(24 * r.capacity for r in self.channels.values())
@@ -0,0 +1,202 @@
+import bisect
+import json
+from typing import Any, Dict, Optional
+
+from tcd1 import clock
+
+
+def _log_edges(lo: float, hi: float, ratio: float) -> list[float]:
+    edges = []
+    e = lo
+    while e < hi:
+        edges.append(e)
+        e *= ratio
+    edges.append(hi)
+    return edges
+
+
+class Histogram:
+    """
+    Log-bucketed histogram of durations in ms. Fixed memory, O(log buckets)
+    per record; percentiles interpolate inside a bucket (edges 25% apart).
+    """
+
+    EDGES_MS = _log_edges(0.05, 60000.0, 1.25)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.EDGES_MS) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(self.EDGES_MS, ms)] += 1
+        self.n += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.n:
+            return None
+        edges = self.EDGES_MS
+        rank = q * self.n
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                lo = edges[i - 1] if i > 0 else 0.0
+                hi = edges[i] if i < len(edges) else self.max
+                return min(lo + (hi - lo) * (rank - seen) / c, self.max)
+            seen += c
+        return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        if not self.n:
+            return {"n": 0}
+        return {
+            "n": self.n,
+            "mean": round(self.total / self.n, 3),
+            "p50": round(self.percentile(0.50), 3),
+            "p90": round(self.percentile(0.90), 3),
+            "p99": round(self.percentile(0.99), 3),
+            "max": round(self.max, 3),
+        }
+
+
+class StreamMetrics:
+    """
+    Sensor frame arrival: inter-arrival histogram, jitter (RFC 3550 style
+    smoothed deviation from the mean interval), late frames (arrived more
+    than LATE_FACTOR intervals after the previous one), dropped samples
+    from gaps in the sender counter (sim_tick, or ts when there is none)
+    and duplicates (counter did not move).
+    """
+
+    LATE_FACTOR = 2.0
+    GAP_FACTOR = 1.5
+
+    def __init__(self):
+        self.frames = 0
+        self.samples = 0
+        self.dropped = 0
+        self.late = 0
+        self.duplicates = 0
+        self.jitter_ms = 0.0
+        self.interarrival = Histogram()
+        self._last_rx: Optional[float] = None
+        self._mean_ia: Optional[float] = None
+        self._last_tick: Optional[float] = None
+        self._step: Optional[float] = None
+        self._t0 = clock.monotonic()
+
+    def reset_counter(self) -> None:
+        # sender restarted or changed rate: don't count the jump as a gap
+        self._last_tick = None
+        self._step = None
+        self._mean_ia = None
+
+    def on_frame(self, now: float, first: float, last: Optional[float] = None, step: Optional[float] = None, n: int = 1) -> None:
+        """
+        One received frame carrying n samples with sender counter values
+        first..last. step is the counter increment per sample when the frame
+        says so (batches); otherwise it is learned from the stream.
+        """
+        last = first if last is None else last
+        prev = self._last_tick
+        if prev is not None and first == prev:
+            # same sample again: not a new arrival
+            self.duplicates += 1
+            return
+
+        self.frames += 1
+        self.samples += n
+        self._last_tick = last
+        self._arrival(now)
+
+        if prev is None:
+            return
+        gap = first - prev
+        if gap < 0:
+            self.reset_counter()
+            self._last_tick = last
+            return
+
+        if step is None:
+            ref = self._step
+            if ref is None or gap < ref:
+                self._step = gap
+                return
+            if gap <= self.GAP_FACTOR * ref:
+                self._step = ref + (gap - ref) / 16.0
+                return
+            step = ref
+        if step > 0 and gap >= self.GAP_FACTOR * step:
+            self.dropped += int(round(gap / step)) - 1
+
+    def _arrival(self, now: float) -> None:
+        last_rx = self._last_rx
+        self._last_rx = now
+        if last_rx is None:
+            return
+
+        ia = now - last_rx
+        self.interarrival.record(1000.0 * ia)
+        mean = self._mean_ia
+        if mean is None:
+            self._mean_ia = ia
+            return
+        if ia > self.LATE_FACTOR * mean:
+            self.late += 1
+        else:
+            self._mean_ia = mean + (ia - mean) / 16.0
+        self.jitter_ms += (1000.0 * abs(ia - mean) - self.jitter_ms) / 16.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        dt = clock.monotonic() - self._t0
+        return {
+            "frames": self.frames,
+            "samples": self.samples,
+            "rate_hz": round(self.frames / dt, 2) if dt > 0 else 0.0,
+            "interarrival_ms": self.interarrival.snapshot(),
+            "jitter_ms": round(self.jitter_ms, 3),
+            "late": self.late,
+            "dropped": self.dropped,
+            "duplicates": self.duplicates,
+        }
+
+
+class LinkMetrics:
+    """
+    Always-on counters of a controller link: per-command RTT histograms,
+    timeouts and error replies, plus StreamMetrics for the sensor stream.
+    snapshot() is plain data, to_json() a one-line dump of it.
+    """
+
+    def __init__(self):
+        self.rtt: Dict[str, Histogram] = {}
+        self.timeouts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.stream = StreamMetrics()
+
+    def record_rtt(self, name: str, seconds: float) -> None:
+        h = self.rtt.get(name)
+        if h is None:
+            h = self.rtt[name] = Histogram()
+        h.record(1000.0 * seconds)
+
+    def record_timeout(self, name: str) -> None:
+        self.timeouts[name] = self.timeouts.get(name, 0) + 1
+
+    def record_error(self, name: str) -> None:
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "rtt_ms": {k: h.snapshot() for k, h in self.rtt.items()},
+            "timeouts": dict(self.timeouts),
+            "errors": dict(self.errors),
+            "stream": self.stream.snapshot(),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot())
@@ -1,11 +1,20 @@
 import asyncio
 import json
+import os
 import time
-from typing import Any, Dict, Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
 
 import serial
 from serial.tools import list_ports
 
+from tcd1 import binproto
+from tcd1.history import SensorHistory
+from tcd1.metrics import LinkMetrics
+from tcd1.stream_delta import DeltaReassembler
+from tcd1.timesync import ClockSync
+from tcd1.waiters import Predicate, SensorWaiters
+
 
 class PicoCommandError(RuntimeError):
     pass
@@ -15,43 +24,154 @@ class PicoProtocolError(RuntimeError):
     pass
 
 
+class PicoLinkDown(PicoProtocolError):
+    pass
+
+
+@dataclass
+class TxStats:
+    msgs: int = 0
+    writes: int = 0
+    max_queue_depth: int = 0
+    # name -> [count, total_s, max_s], enqueue -> written to the port
+    send_latency: Dict[str, list] = field(default_factory=dict)
+
+    def record(self, name: str, latency_s: float) -> None:
+        st = self.send_latency.setdefault(name, [0, 0.0, 0.0])
+        st[0] += 1
+        st[1] += latency_s
+        st[2] = max(st[2], latency_s)
+
+    def snapshot(self, queue_depth: int) -> Dict[str, Any]:
+        return {
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "msgs": self.msgs,
+            "writes": self.writes,
+            "coalesced": self.msgs - self.writes,
+            "send_latency_ms": {
+                k: {"n": n, "avg": 1000.0 * tot / n, "max": 1000.0 * mx}
+                for k, (n, tot, mx) in self.send_latency.items()
+            },
+        }
+
+
+@dataclass
+class ReconnectStats:
+    reconnects: int = 0
+    failed_attempts: int = 0
+    # link down -> port reopened and stream restored
+    total_downtime_s: float = 0.0
+    last_downtime_s: Optional[float] = None
+    max_downtime_s: float = 0.0
+    last_error: str = ""
+
+    def record(self, downtime_s: float) -> None:
+        self.reconnects += 1
+        self.total_downtime_s += downtime_s
+        self.last_downtime_s = downtime_s
+        self.max_downtime_s = max(self.max_downtime_s, downtime_s)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "reconnects": self.reconnects,
+            "failed_attempts": self.failed_attempts,
+            "total_downtime_s": round(self.total_downtime_s, 3),
+            "last_downtime_s": None if self.last_downtime_s is None else round(self.last_downtime_s, 3),
+            "max_downtime_s": round(self.max_downtime_s, 3),
+            "last_error": self.last_error,
+        }
+
+
 class PicoLink:
-    def __init__(self, port: str, baud: int = 115200):
+    RX_BUF_MAX = 64 * 1024
+    RECONNECT_BACKOFF_S = (0.2, 5.0)  # first retry, cap (doubling in between)
+    PENDING_POLICIES = ("fail", "retry")
+    # never wait for an inflight slot behind other calls
+    WINDOW_EXEMPT = ("safe_stop",)
+
+    def __init__(
+        self,
+        port: str,
+        baud: int = 115200,
+        history_len: int = 30000,
+        max_inflight: int = 8,
+        reconnect: bool = True,
+        pending_policy: str = "fail",
+    ):
+        if pending_policy not in self.PENDING_POLICIES:
+            raise ValueError(f"pending_policy must be one of {self.PENDING_POLICIES}")
+        self.port = port
+        self.baud = baud
         self.ser = serial.Serial(port, baudrate=baud, timeout=0.2)
+        # on a dropped port: reopen with backoff, re-hello and restore the stream.
+        # pending calls either fail right away ("fail") or are resent ("retry")
+        self.reconnect = reconnect
+        self.pending_policy = pending_policy
+        self.reconnect_stats = ReconnectStats()
+        self._up = asyncio.Event()
+        self._up.set()
+        self._closed = False
+        self._sent: Dict[int, Dict[str, Any]] = {}
+        self._stream_args: Optional[Dict[str, Any]] = None
+        self._framing_pref: Optional[str] = None
+        self._resume_task: Optional[asyncio.Task] = None
         self.last_rx_monotonic = time.monotonic()
         self.latest: Dict[str, Any] = {}
-        self._tx_lock = asyncio.Lock()
+        # per-key time series (host rx time + sim_tick), bounded by history_len
+        self.history = SensorHistory(history_len)
+        self.waiters = SensorWaiters()
+        self.metrics = LinkMetrics()
+        # device ticks_ms -> host time, fed by heartbeat round trips
+        self.clock = ClockSync()
+        # rebuilds full samples from keyframe + sensors_delta streams
+        self.stream = DeltaReassembler()
+        # single writer task drains _txq; calls beyond max_inflight wait for a slot
+        # (inside their timeout_s; safe_stop never waits)
+        self._txq: "asyncio.Queue[Tuple[bytes, float, str, Any]]" = asyncio.Queue()
+        self._tx_task: Optional[asyncio.Task] = None
+        self._inflight = asyncio.Semaphore(max(1, max_inflight))
+        self.tx_stats = TxStats()
         self._pending: Dict[int, asyncio.Future] = {}
         self._next_id = 1
 
         self.hello: Dict[str, Any] = {}
         self._hello_event = asyncio.Event()
 
+        # "json" until negotiate_framing() switches the Pico to binary frames
+        self.framing = "json"
+        self._framing_cid: Optional[int] = None
+        self.rx_bad_frames = 0
+        self.rx_seq_gaps = 0
+        self._last_seq: Optional[int] = None
+        self._rxbuf = bytearray()
+
     @staticmethod
     def list_ports() -> list[str]:
         return [p.device for p in list_ports.comports()]
 
+    @staticmethod
+    def port_score(p) -> int:
+        txt = f"{p.description} {p.manufacturer} {p.product} {p.hwid}".lower()
+        s = 0
+        if "pico" in txt:
+            s += 10
+        if "raspberry" in txt:
+            s += 5
+        if "usb" in txt:
+            s += 1
+        if "acm" in p.device.lower():
+            s += 2
+        return s
+
     @staticmethod
     def auto_port() -> Optional[str]:
         ports = list_ports.comports()
 
-        def score(p) -> int:
-            txt = f"{p.description} {p.manufacturer} {p.product} {p.hwid}".lower()
-            s = 0
-            if "pico" in txt:
-                s += 10
-            if "raspberry" in txt:
-                s += 5
-            if "usb" in txt:
-                s += 1
-            if "acm" in p.device.lower():
-                s += 2
-            return s
-
         best = None
         best_s = 0
         for p in ports:
-            sc = score(p)
+            sc = PicoLink.port_score(p)
             if sc > best_s:
                 best_s = sc
                 best = p.device
@@ -64,31 +184,120 @@ class PicoLink:
         return cid
 
     async def send(self, msg: Dict[str, Any]) -> None:
+        """
+        Queue a message for the writer task. Whatever is queued when the
+        writer wakes up goes out as one write.
+        """
+        if self._tx_task is None or self._tx_task.done():
+            self._tx_task = asyncio.create_task(self._tx_loop())
         data = (json.dumps(msg) + "\n").encode()
-        async with self._tx_lock:
-            await asyncio.to_thread(self.ser.write, data)
-            await asyncio.to_thread(self.ser.flush)
+        name = str(msg.get("name", msg.get("type", "")))
+        self._txq.put_nowait((data, time.monotonic(), name, msg.get("id")))
+        self.tx_stats.max_queue_depth = max(self.tx_stats.max_queue_depth, self._txq.qsize())
+
+    def _write(self, data: bytes) -> None:
+        self.ser.write(data)
+        self.ser.flush()
+
+    async def _tx_loop(self) -> None:
+        q = self._txq
+        try:
+            while True:
+                batch = [await q.get()]
+                if not self._up.is_set():
+                    # link down: drop it, _reconnect() resends whatever is still pending
+                    continue
+                while not q.empty():
+                    batch.append(q.get_nowait())
+
+                try:
+                    await asyncio.to_thread(self._write, b"".join(b[0] for b in batch))
+                except Exception as e:
+                    if self.reconnect and self.pending_policy == "retry":
+                        continue  # resent from _sent once the port is back
+                    # nothing in this batch reached the Pico; fail its callers now
+                    for _, _, _, cid in batch:
+                        fut = self._pending.get(cid)
+                        if fut and not fut.done():
+                            fut.set_exception(PicoProtocolError(f"serial write failed: {e!r}"))
+                    continue
+
+                now = time.monotonic()
+                st = self.tx_stats
+                st.writes += 1
+                st.msgs += len(batch)
+                for _, t_enq, name, _ in batch:
+                    st.record(name, now - t_enq)
+        except asyncio.CancelledError:
+            pass
+
+    def tx_snapshot(self) -> Dict[str, Any]:
+        return self.tx_stats.snapshot(self._txq.qsize())
 
     async def call(self, name: str, args: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
-        cid = self._cmd_id()
-        fut = asyncio.get_running_loop().create_future()
-        self._pending[cid] = fut
-        await self.send({"type": "cmd", "id": cid, "name": name, "args": args})
+        return await self._call_id(self._cmd_id(), name, args, timeout_s)
+
+    async def _call_id(self, cid: int, name: str, args: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+        if name in ("start_stream", "stop_stream"):
+            self.metrics.stream.reset_counter()
 
+        # timeout_s covers waiting for an inflight slot as well as the reply
+        deadline = time.monotonic() + timeout_s
+        windowed = name not in self.WINDOW_EXEMPT
+        if windowed:
+            try:
+                await asyncio.wait_for(self._inflight.acquire(), timeout_s)
+            except asyncio.TimeoutError:
+                self.metrics.record_timeout(name)
+                raise
         try:
-            resp = await asyncio.wait_for(fut, timeout_s)
+            fut = asyncio.get_running_loop().create_future()
+            msg = {"type": "cmd", "id": cid, "name": name, "args": args}
+            self._pending[cid] = fut
+            self._sent[cid] = msg
+            t0 = time.monotonic()
+            try:
+                await self.send(msg)
+                resp = await asyncio.wait_for(fut, max(0.0, deadline - t0))
+            except asyncio.TimeoutError:
+                self.metrics.record_timeout(name)
+                raise
+            finally:
+                self._pending.pop(cid, None)
+                self._sent.pop(cid, None)
+            t1 = time.monotonic()
+            self.metrics.record_rtt(name, t1 - t0)
         finally:
-            self._pending.pop(cid, None)
+            if windowed:
+                self._inflight.release()
 
         if not isinstance(resp, dict):
+            self.metrics.record_error(name)
             raise PicoCommandError("Malformed cmd_result")
 
         if not resp.get("ok", False):
+            self.metrics.record_error(name)
             raise PicoCommandError(resp.get("error", "command failed"))
 
         result = resp.get("result", {})
+        if name == "heartbeat" and isinstance(result, dict) and "ts_ms" in result:
+            self.clock.add(t0, t1, result["ts_ms"])
+
+        # remembered so a reconnect can restore the stream
+        if name == "start_stream":
+            self._stream_args = dict(args)
+        elif name in ("stop_stream", "safe_stop", "reset_sim"):
+            self._stream_args = None
+
         return result if isinstance(result, dict) else {}
 
+    async def wait_for(self, predicate: Predicate, timeout_s: float, label: str = "condition") -> Dict[str, Any]:
+        """
+        Wait until a sensors sample satisfies predicate; checked on every
+        incoming sample. Raises SensorWaitTimeout carrying the last sample.
+        """
+        return await self.waiters.wait(predicate, timeout_s, label)
+
     async def wait_hello(self, timeout_s: float = 5.0) -> Dict[str, Any]:
         try:
             await asyncio.wait_for(self._hello_event.wait(), timeout_s)
@@ -96,46 +305,388 @@ class PicoLink:
             raise PicoProtocolError("No hello from Pico (firmware handshake missing?)") from e
         return self.hello
 
-    async def rx_task(self) -> None:
-        try:
-            while True:
-                line = await asyncio.to_thread(self.ser.readline)
-                if not line:
-                    await asyncio.sleep(0.01)
-                    continue
+    async def features(self, timeout_s: float = 2.0) -> list[str]:
+        """
+        Feature list from the hello. If the boot hello was missed, ask for it
+        again (older firmware without the hello command just returns []).
+        """
+        if not self.hello.get("features"):
+            try:
+                res = await self.call("hello", {}, timeout_s)
+            except (PicoCommandError, asyncio.TimeoutError):
+                return []
+            self.hello = {"type": "hello", **res}
+            self._hello_event.set()
+        feats = self.hello.get("features", [])
+        return feats if isinstance(feats, list) else []
 
+    async def negotiate_framing(self, prefer: str = "bin", timeout_s: float = 2.0) -> str:
+        """
+        Switch the Pico -> Pi direction to binary frames if both ends support
+        it. JSON stays the fallback; commands Pi -> Pico are always JSON.
+        """
+        self._framing_pref = prefer
+        if prefer != "bin" or binproto.FEATURE not in await self.features(timeout_s):
+            if self.framing != "json":
                 try:
-                    msg = json.loads(line.decode(errors="ignore"))
+                    await self.call("set_framing", {"mode": "json"}, timeout_s)
                 except Exception:
-                    continue
+                    pass
+            return self.framing
 
-                if not isinstance(msg, dict):
-                    continue
+        cid = self._cmd_id()
+        self._framing_cid = cid
+        try:
+            await self._call_id(cid, "set_framing", {"mode": "bin"}, timeout_s)
+        except Exception:
+            # we may have missed the ack; ask for JSON again (acked in JSON)
+            self.framing = "json"
+            try:
+                await self.call("set_framing", {"mode": "json"}, timeout_s)
+            except Exception:
+                pass
+        finally:
+            self._framing_cid = None
+        return self.framing
+
+    def sample_time(self, data: Dict[str, Any]) -> Tuple[float, Optional[float]]:
+        """
+        (wall time, error bound in s) of when the Pico took a sample, from its
+        t_ms stamp. Before the first heartbeat, or for samples without a
+        stamp, this is the current time with an unknown (None) bound.
+        """
+        t_ms = data.get("t_ms")
+        if t_ms is None or not self.clock.synced:
+            return time.time(), None
+        return self.clock.to_wall(t_ms)
+
+    def stream_stats(self) -> Dict[str, Any]:
+        return self.stream.stats()
 
-                t = msg.get("type")
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        snap = self.metrics.snapshot()
+        snap["framing"] = self.framing
+        snap["rx_seq_gaps"] = self.rx_seq_gaps
+        snap["rx_bad_frames"] = self.rx_bad_frames
+        snap["tx"] = self.tx_snapshot()
+        snap["reconnect"] = self.reconnect_stats.snapshot()
+        snap["clock"] = self.clock.snapshot()
+        return snap
 
-                if t == "hello":
-                    self.hello = msg
-                    self._hello_event.set()
+    def _dispatch(self, msg: Dict[str, Any], nbytes: int = 0) -> None:
+        t = msg.get("type")
 
-                elif t == "sensors":
-                    data = msg.get("data", {})
-                    if isinstance(data, dict):
-                        self.latest = data
-                        self.last_rx_monotonic = time.monotonic()
+        if t == "hello":
+            self.hello = msg
+            self._hello_event.set()
 
-                elif t == "cmd_result":
-                    cid = msg.get("id")
-                    fut = self._pending.get(cid)
-                    if isinstance(cid, int) and fut and not fut.done():
-                        fut.set_result(msg)
+        elif t == "sensors":
+            data = msg.get("data", {})
+            if isinstance(data, dict):
+                self._ingest(self.stream.keyframe(data, nbytes))
 
-                elif t == "log":
-                    m = msg.get("msg", "")
-                    print(f"[PICO] {m}")
+        elif t == "sensors_delta":
+            data = msg.get("data", {})
+            if isinstance(data, dict):
+                full = self.stream.delta(data, nbytes)
+                if full is not None:
+                    self._ingest(full)
+
+        elif t == "sensors_batch":
+            self._ingest_batch(msg)
+
+        elif t == "cmd_result":
+            cid = msg.get("id")
+            if cid is not None and cid == self._framing_cid and msg.get("ok"):
+                # everything after this ack arrives binary framed
+                self.framing = (msg.get("result") or {}).get("framing", self.framing)
+                self._last_seq = None
+
+            fut = self._pending.get(cid)
+            if isinstance(cid, int) and fut and not fut.done():
+                fut.set_result(msg)
+
+        elif t == "log":
+            m = msg.get("msg", "")
+            print(f"[PICO] {m}")
+
+    def _ingest(self, data: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        self.latest = data
+        self.last_rx_monotonic = now
+        self.history.append(data, now)
+        tick = data.get("sim_tick")
+        if isinstance(tick, (int, float)):
+            self.metrics.stream.on_frame(now, tick)
+        self.waiters.notify(data)
+
+    def _ingest_batch(self, msg: Dict[str, Any]) -> None:
+        """
+        Unpack K columnar samples into history. Only the last one was just
+        sampled; earlier ones get rx time backdated by their tick offset,
+        timed by the device's own stamps of the first and last sample.
+        """
+        try:
+            n = int(msg["n"])
+            cols = msg["cols"]
+            tick0 = int(msg["tick0"])
+            dtick = int(msg.get("dtick", 1))
+            hz = float(msg.get("stream_hz") or 0.0)
+            t0_ms = msg.get("t0_ms")
+            # device stamps of the first/last sample; the rest are spread evenly
+            span_ms = (int(msg["t1_ms"]) - int(t0_ms)) % self.clock.period if t0_ms is not None else 0
+        except (KeyError, TypeError, ValueError):
+            return
+        if n <= 0 or not isinstance(cols, dict):
+            return
+
+        last = tick0 + (n - 1) * dtick
+        if t0_ms is not None and n > 1:
+            # real tick period: stream_hz is only what was asked for, dtick is rounded
+            tick_s = span_ms / 1000.0 / (last - tick0)
+        else:
+            tick_s = 1.0 / (hz * dtick) if hz > 0 else 0.0
+        now = time.monotonic()
+        const = {"stream_hz": hz, "job": msg.get("job", ""), "scenario": msg.get("scenario", "")}
+        sample: Dict[str, Any] = {}
+        for i in range(n):
+            sample = {k: v[i] for k, v in cols.items()}
+            sample.update(const)
+            tick = sample["sim_tick"] = tick0 + i * dtick
+            if t0_ms is not None:
+                sample["t_ms"] = (int(t0_ms) + span_ms * i // max(1, n - 1)) % self.clock.period
+            self.history.append(sample, now - (last - tick) * tick_s)
+            self.waiters.notify(sample)
+
+        self.latest = sample
+        self.last_rx_monotonic = now
+        self.metrics.stream.on_frame(now, tick0, last, dtick, n)
+
+    def _decode_bin(self, raw: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            msg = binproto.decode_frame(raw)
+        except binproto.FrameError:
+            self.rx_bad_frames += 1
+            return None
+        if msg is None:
+            return None
+
+        seq = msg.get("seq")
+        if self._last_seq is not None and seq != (self._last_seq + 1) & 0xFFFF:
+            self.rx_seq_gaps += 1
+            self.stream.gap()
+        self._last_seq = seq
+        return msg
+
+    def _dispatch_line(self, line: bytes) -> bool:
+        try:
+            msg = json.loads(line.decode(errors="ignore"))
+        except Exception:
+            return False
+        if not isinstance(msg, dict):
+            return False
+        self._dispatch(msg, len(line) + 1)
+        return True
+
+    def _feed(self, data: bytes) -> None:
+        """
+        Split everything complete out of the rx buffer. The framing can flip
+        mid-buffer (set_framing ack), so it is re-checked per frame.
+        """
+        buf = self._rxbuf
+        buf += data
+        n = len(buf)
+        pos = 0
+        while pos < n:
+            if self.framing == "bin":
+                end = buf.find(binproto.DELIM, pos)
+                if end < 0:
+                    # Pico rebooted back into JSON (hello etc.)
+                    nl = buf.find(b"\n", pos) if buf[pos] == 0x7B else -1
+                    if nl >= 0 and self._dispatch_line(bytes(buf[pos:nl])):
+                        self.framing = "json"
+                        pos = nl + 1
+                        continue
+                    break
+                if end > pos:
+                    msg = self._decode_bin(bytes(buf[pos:end]))
+                    if msg is not None:
+                        self._dispatch(msg, end - pos + 1)
+                pos = end + 1
+            else:
+                end = buf.find(b"\n", pos)
+                zero = buf.find(binproto.DELIM, pos, end if end >= 0 else n)
+                if zero >= 0:
+                    # Pico is still binary framed (e.g. left over from an earlier run);
+                    # reparse from pos, a leading partial frame just fails its CRC
+                    self.framing = "bin"
+                    self._last_seq = None
+                    continue
+                if end < 0:
+                    break
+                if not self._dispatch_line(bytes(buf[pos:end])):
+                    # garbled line, maybe a sensors_delta
+                    self.stream.gap()
+                pos = end + 1
+
+        del buf[:pos]
+        if len(buf) > self.RX_BUF_MAX:
+            # no delimiter in sight: line noise, drop it
+            self.rx_bad_frames += 1
+            self.stream.gap()
+            buf.clear()
+
+    async def rx_task(self) -> None:
+        try:
+            while True:
+                try:
+                    await self._rx_port()
+                except (OSError, serial.SerialException, PicoProtocolError) as e:
+                    if self._closed:
+                        return
+                    if not self.reconnect:
+                        print(f"[PICO] link down: {e!r}")
+                        self._link_down(e)
+                        return
+                    await self._reconnect(e)
 
         except asyncio.CancelledError:
             pass
 
+    async def _rx_port(self) -> None:
+        try:
+            fd = self.ser.fileno()
+        except Exception:
+            fd = None  # pyserial on Windows has no fd
+
+        if fd is not None:
+            try:
+                await self._rx_fd(fd)
+                return
+            except NotImplementedError:
+                pass  # Proactor loop: no add_reader
+
+        # fallback: one thread hop per chunk (not per line)
+        while True:
+            data = await asyncio.to_thread(self.ser.read, max(1, self.ser.in_waiting))
+            if data:
+                self._feed(data)
+
+    def _link_down(self, err: Exception) -> None:
+        self._up.clear()
+        self.reconnect_stats.last_error = repr(err)
+        try:
+            self.ser.close()
+        except Exception:
+            pass
+
+        if self.reconnect and self.pending_policy == "retry":
+            return
+        for cid, fut in list(self._pending.items()):
+            if not fut.done():
+                fut.set_exception(PicoLinkDown(f"serial link lost: {err!r}"))
+
+    def _reopen(self) -> None:
+        try:
+            self.ser = serial.Serial(self.port, baudrate=self.baud, timeout=0.2)
+        except (OSError, serial.SerialException):
+            # re-enumerated under another name (ttyACM0 -> ttyACM1)?
+            alt = self.auto_port()
+            if not alt or alt == self.port:
+                raise
+            self.ser = serial.Serial(alt, baudrate=self.baud, timeout=0.2)
+            self.port = alt
+
+    async def _reconnect(self, err: Exception) -> None:
+        """
+        Reopen the port with exponential backoff. Receive state starts over
+        in JSON (the Pico may have rebooted); _resume() then redoes the
+        handshake, framing and stream in the background so rx keeps running.
+        """
+        t_down = time.monotonic()
+        print(f"[PICO] link down: {err!r}, reconnecting")
+        self._link_down(err)
+
+        delay, cap = self.RECONNECT_BACKOFF_S
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await asyncio.to_thread(self._reopen)
+                break
+            except (OSError, serial.SerialException) as e:
+                self.reconnect_stats.failed_attempts += 1
+                self.reconnect_stats.last_error = repr(e)
+                delay = min(cap, 2 * delay)
+
+        self._rxbuf.clear()
+        self.framing = "json"
+        self._last_seq = None
+        self.hello = {}
+        self._hello_event.clear()
+        self.stream = DeltaReassembler()
+        self.metrics.stream.reset_counter()
+        self.clock.reset()
+
+        # calls still waiting (retry policy, or issued while down) go out
+        # first and in id order; anything queued meanwhile is a duplicate
+        while not self._txq.empty():
+            self._txq.get_nowait()
+        self._up.set()
+        for cid in sorted(self._sent):
+            fut = self._pending.get(cid)
+            if fut is not None and not fut.done():
+                await self.send(self._sent[cid])
+
+        print(f"[PICO] reopened {self.port}")
+        self._resume_task = asyncio.create_task(self._resume(t_down))
+
+    async def _resume(self, t_down: float) -> None:
+        try:
+            await self.features()
+            if self._framing_pref is not None:
+                await self.negotiate_framing(self._framing_pref)
+            if self._stream_args is not None:
+                await self.call("start_stream", self._stream_args, 3.0)
+        except Exception as e:
+            print(f"[PICO] resume after reconnect incomplete: {e!r}")
+        downtime = time.monotonic() - t_down
+        self.reconnect_stats.record(downtime)
+        print(f"[PICO] link restored after {downtime:.2f}s")
+
+    async def _rx_fd(self, fd: int) -> None:
+        """
+        Read the serial fd straight from the event loop: the callback drains
+        whatever the driver has and _feed() splits all frames in one pass.
+        """
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+
+        def on_readable() -> None:
+            try:
+                data = os.read(fd, 65536)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                if not done.done():
+                    done.set_exception(e)
+                return
+            if not data:
+                if not done.done():
+                    done.set_exception(PicoProtocolError("serial port closed"))
+                return
+            self._feed(data)
+
+        os.set_blocking(fd, False)
+        loop.add_reader(fd, on_readable)
+        try:
+            await done
+        finally:
+            loop.remove_reader(fd)
+
     def close(self) -> None:
+        self._closed = True
+        if self._tx_task is not None:
+            self._tx_task.cancel()
+        if self._resume_task is not None:
+            self._resume_task.cancel()
         self.ser.close()
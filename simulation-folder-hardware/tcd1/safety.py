@@ -1,5 +1,6 @@
 import time
 from tcd1.config import FailCriteria
+from tcd1.liveness import LivenessManager
 from tcd1.pico_link import PicoLink
 
 
@@ -8,6 +9,11 @@ def check_pico_stream(pico: PicoLink, crit: FailCriteria) -> None:
         raise RuntimeError("Sensor stream timeout")
 
 
+def check_link_health(live: LivenessManager) -> None:
+    if live.state == "lost":
+        raise RuntimeError(f"Pico link lost (nothing received for {live.idle_s():.1f}s)")
+
+
 def check_rig_limits(pico: PicoLink, crit: FailCriteria) -> None:
     s = pico.latest or {}
 
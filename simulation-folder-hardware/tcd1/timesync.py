@@ -0,0 +1,127 @@
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+class ClockSync:
+    """
+    Maps the Pico's ticks_ms to host time, NTP style.
+
+    Each heartbeat gives (host send, device ticks_ms, host receive); the
+    device stamp is assumed to sit in the middle of the round trip, so the
+    offset of one exchange is known to +-RTT/2. The model is
+        host = dev + offset + drift * (dev - ref)
+    fitted over the low-RTT exchanges of a sliding window. Drift is only
+    fitted once the window spans MIN_SPAN_S of device time; until then it
+    is 0 and the error bound grows by DRIFT_BOUND per second of
+    extrapolation.
+    """
+
+    TICKS_PERIOD = 1 << 30  # MicroPython ticks_ms wraps here
+    WINDOW = 32
+    MIN_SPAN_S = 20.0
+    DRIFT_BOUND = 100e-6  # |drift| assumed before it is fitted
+    RESOLUTION_S = 0.001
+    STEP_RESET_S = 1.0  # an exchange this far off the model means the Pico restarted
+
+    def __init__(self, period: int = TICKS_PERIOD):
+        self.period = int(period)
+        self._wall_off = time.time() - time.monotonic()
+        self.resets = 0
+        self.reset()
+
+    def reset(self) -> None:
+        self._samples: Deque[Tuple[float, float, float]] = deque(maxlen=self.WINDOW)  # dev_s, host_mid, rtt
+        self._last_raw: Optional[int] = None
+        self._last_dev = 0.0
+        self._ref = 0.0
+        self.offset = 0.0
+        self.drift = 0.0
+        self.fitted = False
+        self.err_s = 0.0
+
+    @property
+    def synced(self) -> bool:
+        return bool(self._samples)
+
+    def _unwrap(self, raw: int) -> float:
+        raw = int(raw) % self.period
+        if self._last_raw is None:
+            self._last_raw = raw
+            self._last_dev = raw / 1000.0
+            return self._last_dev
+        # signed distance to the newest stamp seen, within half a period
+        d = (raw - self._last_raw) % self.period
+        if d >= self.period // 2:
+            d -= self.period
+        dev = self._last_dev + d / 1000.0
+        if d > 0:
+            self._last_raw = raw
+            self._last_dev = dev
+        return dev
+
+    def add(self, t_send: float, t_recv: float, dev_ms: int) -> None:
+        """One exchange; t_send/t_recv are host time.monotonic()."""
+        rtt = max(0.0, t_recv - t_send)
+        mid = 0.5 * (t_send + t_recv)
+        if self._samples and abs(self._predict(self._unwrap(dev_ms)) - mid) > self.STEP_RESET_S + rtt:
+            self.resets += 1
+            self.reset()
+        self._samples.append((self._unwrap(dev_ms), mid, rtt))
+        self._fit()
+
+    def _predict(self, dev: float) -> float:
+        return dev + self.offset + self.drift * (dev - self._ref)
+
+    def _fit(self) -> None:
+        samples = self._samples
+        best = min(s[2] for s in samples)
+        use = [s for s in samples if s[2] <= 2.0 * best + 0.002]
+        self._ref = use[0][0]
+
+        span = use[-1][0] - use[0][0]
+        if len(use) >= 3 and span >= self.MIN_SPAN_S:
+            n = len(use)
+            mx = sum(s[0] - self._ref for s in use) / n
+            my = sum(s[1] - s[0] for s in use) / n
+            sxx = sxy = 0.0
+            for dev, mid, _ in use:
+                dx = dev - self._ref - mx
+                sxx += dx * dx
+                sxy += dx * (mid - dev - my)
+            self.drift = sxy / sxx
+            self.offset = my - self.drift * mx
+            self.fitted = True
+        else:
+            dev, mid, _ = min(use, key=lambda s: s[2])
+            self.drift = 0.0
+            self.offset = mid - dev
+            self._ref = dev
+            self.fitted = False
+
+        resid = max(abs(self._predict(dev) - mid) for dev, mid, _ in use)
+        self.err_s = 0.5 * best + self.RESOLUTION_S + resid
+
+    def to_host(self, dev_ms: int) -> Tuple[float, float]:
+        """(host monotonic time, error bound in s) of a device ticks_ms stamp."""
+        dev = self._unwrap(dev_ms)
+        err = self.err_s
+        if not self.fitted:
+            err += self.DRIFT_BOUND * abs(dev - self._samples[-1][0])
+        return self._predict(dev), err
+
+    def to_wall(self, dev_ms: int) -> Tuple[float, float]:
+        t, err = self.to_host(dev_ms)
+        return t + self._wall_off, err
+
+    def snapshot(self) -> Dict[str, Any]:
+        if not self._samples:
+            return {"synced": False, "samples": 0, "resets": self.resets}
+        return {
+            "synced": True,
+            "samples": len(self._samples),
+            "rtt_min_ms": round(1000.0 * min(s[2] for s in self._samples), 3),
+            "drift_ppm": round(1e6 * self.drift, 2) if self.fitted else None,
+            "err_ms": round(1000.0 * self.err_s, 3),
+            "resets": self.resets,
+        }
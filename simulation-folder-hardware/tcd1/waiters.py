@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any, Callable, Dict, Optional
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+class SensorWaitTimeout(RuntimeError):
+    def __init__(self, label: str, timeout_s: float, last: Optional[Dict[str, Any]]):
+        super().__init__(f"Timeout waiting for {label} after {timeout_s:.1f}s (last={last})")
+        self.label = label
+        self.last = last
+
+
+class SensorWaiters:
+    """
+    Pending "wait until the stream shows X" conditions of a link. The link
+    calls notify() for every sensor sample; waiters whose predicate holds
+    are woken right there instead of polling latest on a timer.
+
+    listeners get every sample too (fan-out, e.g. the rig daemon); they
+    run inline on the rx path and must not block.
+    """
+
+    def __init__(self):
+        self.last: Optional[Dict[str, Any]] = None
+        self._waiters: list[tuple[Predicate, asyncio.Future]] = []
+        self.listeners: list[Callable[[Dict[str, Any]], None]] = []
+
+    def notify(self, sample: Dict[str, Any]) -> None:
+        self.last = sample
+        for cb in self.listeners:
+            cb(sample)
+        if not self._waiters:
+            return
+
+        keep = []
+        for pred, fut in self._waiters:
+            if fut.done():
+                continue
+            try:
+                hit = pred(sample)
+            except Exception as e:
+                fut.set_exception(e)
+                continue
+            if hit:
+                fut.set_result(sample)
+            else:
+                keep.append((pred, fut))
+        self._waiters = keep
+
+    async def wait(self, predicate: Predicate, timeout_s: float, label: str = "condition") -> Dict[str, Any]:
+        last = self.last
+        if last and predicate(last):
+            return last
+
+        fut = asyncio.get_running_loop().create_future()
+        entry = (predicate, fut)
+        self._waiters.append(entry)
+        try:
+            return await asyncio.wait_for(fut, timeout_s)
+        except asyncio.TimeoutError:
+            raise SensorWaitTimeout(label, timeout_s, self.last) from None
+        finally:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
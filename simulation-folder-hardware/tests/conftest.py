@@ -0,0 +1,6 @@
+import os
+import sys
+
+# tests import tcd1 (and pico_sim) from this tree, the way the scripts do
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
@@ -0,0 +1,173 @@
+import os
+import pty
+import random
+
+import pytest
+
+from tcd1 import binproto
+from tcd1.pico_link import PicoLink
+
+
+def _f32(rng):
+    # exactly representable in f32, so round trips compare with ==
+    return rng.randint(-40000, 40000) / 64.0
+
+
+def _sensors(rng, tick):
+    d = {f: _f32(rng) for f in binproto.SENSOR_FIELDS}
+    d.update(sim_tick=tick, t_ms=rng.randrange(1 << 32), job=rng.choice(binproto.JOB_CODES), scenario=rng.choice(["", "stress"]))
+    return {"type": "sensors", "data": d}
+
+
+def _batch(rng, tick):
+    n = rng.randint(1, 20)
+    return {
+        "type": "sensors_batch",
+        "tick0": tick,
+        "t0_ms": rng.randrange(1 << 32),
+        "t1_ms": rng.randrange(1 << 32),
+        "dtick": rng.randint(1, 10),
+        "n": n,
+        "stream_hz": 50.0,
+        "job": rng.choice(binproto.JOB_CODES),
+        "scenario": rng.choice(["", "pressure_spikes"]),
+        "cols": {f: [_f32(rng) for _ in range(n)] for f in binproto.BATCH_FIELDS},
+    }
+
+
+def _delta(rng, tick):
+    d = {f: _f32(rng) for f in binproto.SENSOR_FIELDS if rng.random() < 0.5}
+    d.update(sim_tick=tick, t_ms=rng.randrange(1 << 32))
+    if rng.random() < 0.5:
+        d["job"] = rng.choice(binproto.JOB_CODES)
+    if rng.random() < 0.5:
+        d["scenario"] = rng.choice(["", "voltage_sag"])
+    return {"type": "sensors_delta", "data": d}
+
+
+def _json(rng, tick):
+    return {"type": "cmd_result", "id": tick, "ok": True, "result": {"ts_ms": rng.randrange(1 << 30), "note": "a\x00b"}}
+
+
+MAKERS = (_sensors, _batch, _delta, _json)
+
+
+def _frames(rng, n):
+    msgs = [MAKERS[i % len(MAKERS)](rng, i) for i in range(n)]
+    return msgs, [binproto.encode_msg(m, seq) for seq, m in enumerate(msgs)]
+
+
+def test_cobs_round_trip_fuzz():
+    rng = random.Random(1)
+    for data in (b"", b"\x00", b"\x00" * 300, bytes(range(1, 256)) * 3, b"\x01" * 254, b"\x01" * 255):
+        enc = binproto.cobs_encode(data)
+        assert 0 not in enc
+        assert binproto.cobs_decode(enc) == data
+    for _ in range(500):
+        n = rng.randint(0, 700)
+        # mostly zero, mostly non-zero and uniform payloads
+        p0 = rng.choice([0.0, 0.01, 0.5, 0.99])
+        data = bytes(0 if rng.random() < p0 else rng.randint(1, 255) for _ in range(n))
+        enc = binproto.cobs_encode(data)
+        assert 0 not in enc
+        assert binproto.cobs_decode(enc) == data
+
+
+def test_cobs_rejects_zero_and_truncation():
+    enc = binproto.cobs_encode(b"\x01\x02\x00\x03")
+    with pytest.raises(binproto.FrameError):
+        binproto.cobs_decode(enc[:2] + b"\x00" + enc[3:])
+    with pytest.raises(binproto.FrameError):
+        binproto.cobs_decode(enc[:-1])
+
+
+def test_encode_decode_round_trip():
+    rng = random.Random(2)
+    msgs, frames = _frames(rng, 400)
+    for seq, (msg, wire) in enumerate(zip(msgs, frames)):
+        assert wire.endswith(binproto.DELIM)
+        assert binproto.DELIM not in wire[:-1]
+        out = binproto.decode_frame(wire[:-1])
+        assert out.pop("seq") == seq
+        assert out == msg
+
+
+def test_seq_wraps_at_16_bits():
+    wire = binproto.encode_msg({"type": "log", "msg": "x"}, 0x10001)
+    assert binproto.decode_frame(wire[:-1])["seq"] == 1
+
+
+def test_flipped_bit_rejected():
+    rng = random.Random(3)
+    _, frames = _frames(rng, 8)
+    for wire in frames:
+        raw = wire[:-1]
+        for i in range(len(raw)):
+            for bit in range(8):
+                bad = bytearray(raw)
+                bad[i] ^= 1 << bit
+                with pytest.raises(binproto.FrameError):
+                    binproto.decode_frame(bytes(bad))
+
+
+def test_truncated_frame_rejected():
+    rng = random.Random(4)
+    _, frames = _frames(rng, 8)
+    for wire in frames:
+        raw = wire[:-1]
+        for k in range(len(raw)):
+            with pytest.raises(binproto.FrameError):
+                binproto.decode_frame(raw[:k])
+
+
+def test_concatenated_frames_split_on_delimiter():
+    rng = random.Random(5)
+    msgs, frames = _frames(rng, 50)
+    parts = b"".join(frames).split(binproto.DELIM)
+    assert parts[-1] == b""
+    out = [binproto.decode_frame(p) for p in parts[:-1]]
+    assert [m.pop("seq") for m in out] == list(range(50))
+    assert out == msgs
+
+
+@pytest.fixture
+def link():
+    master, slave = pty.openpty()
+    pico = PicoLink(os.ttyname(slave), reconnect=False)
+    pico.framing = "bin"
+    yield pico
+    pico.close()
+    os.close(slave)
+    os.close(master)
+
+
+def _sample(tick):
+    d = {f: 1.0 for f in binproto.SENSOR_FIELDS}
+    d.update(sim_tick=tick, t_ms=10 * tick)
+    return {"type": "sensors", "data": d}
+
+
+def test_link_resyncs_after_corrupt_frame(link):
+    frames = [binproto.encode_msg(_sample(t), t) for t in range(7)]
+    bad = bytearray(frames[2])
+    bad[5] ^= 0x10
+    frames[2] = bytes(bad)
+    # a frame cut short (delimiter lost) runs into the next one: both go
+    frames[4] = frames[4][:7]
+
+    stream = b"".join(frames)
+    # arrives in arbitrary chunks
+    for i in range(0, len(stream), 13):
+        link._feed(stream[i:i + 13])
+
+    assert link.rx_bad_frames == 2
+    assert link.latest["sim_tick"] == 6
+    assert list(link.history["pump_pressure_bar"].last_n(10)[1]) == [0, 1, 3, 6]
+    assert not link._rxbuf
+
+
+def test_link_drops_leading_partial_frame(link):
+    wire = binproto.encode_msg(_sample(7), 7)
+    link._feed(b"\x13\x37garbage" + binproto.DELIM + wire)
+    assert link.rx_bad_frames == 1
+    assert link.latest["sim_tick"] == 7
@@ -0,0 +1,114 @@
+import asyncio
+import os
+import tempfile
+import time
+
+from tcd1.daemon import RigDaemon
+from tcd1.daemon_link import DaemonLink
+from tcd1.waiters import SensorWaiters
+
+
+class FakeLink:
+    """Controller link whose stream stops on safe_stop, like the Pico's."""
+
+    def __init__(self):
+        self.waiters = SensorWaiters()
+        self.hello = {"device": "pico"}
+        self.streaming = False
+        self.tick = 0
+        self.calls = []
+
+    async def call(self, name, args, timeout_s):
+        self.calls.append(name)
+        if name == "start_stream":
+            self.streaming = True
+        elif name in ("stop_stream", "safe_stop", "reset_sim"):
+            self.streaming = False
+        return {"ok": True}
+
+    def sample_time(self, sample):
+        return time.time(), None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(0.005)
+            if self.streaming:
+                self.tick += 1
+                self.waiters.notify({"sim_tick": self.tick, "pump_pressure_bar": 1.0})
+
+
+async def _two_clients(stop_cmd):
+    link = FakeLink()
+    path = os.path.join(tempfile.mkdtemp(), "rig.sock")
+    daemon = RigDaemon(link, path, stream=lambda: link.call("start_stream", {"hz": 100.0}, 1.0))
+    await daemon.start()
+    server = asyncio.create_task(daemon.serve_forever())
+    feed = asyncio.create_task(link.run())
+
+    a, b = DaemonLink(path), DaemonLink(path)
+    rx = [asyncio.create_task(a.rx_task()), asyncio.create_task(b.rx_task())]
+    try:
+        await a.wait_for(lambda s: True, 2.0)
+        await b.call(stop_cmd, {}, 1.0)
+        tick = a.latest["sim_tick"]
+        # a still gets fresh samples after b stopped the rig
+        s = await a.wait_for(lambda s: s["sim_tick"] > tick + 10, 2.0)
+        assert s["sim_tick"] > tick + 10
+        return link, daemon, a, b
+    finally:
+        for t in rx + [feed, server]:
+            t.cancel()
+        await asyncio.gather(*rx, feed, server, return_exceptions=True)
+        a.close()
+        b.close()
+        await daemon.aclose()
+
+
+def test_safe_stop_from_one_client_keeps_stream_for_others():
+    link, daemon, _, _ = asyncio.run(_two_clients("safe_stop"))
+    assert link.calls.count("safe_stop") == 1
+    assert daemon.stream_restarts == 1
+    assert link.streaming
+
+
+def test_reset_sim_restarts_stream():
+    link, daemon, _, _ = asyncio.run(_two_clients("reset_sim"))
+    assert daemon.stream_restarts == 1
+
+
+def test_client_stop_stream_only_unsubscribes_that_client():
+    link, daemon, _, b = asyncio.run(_two_clients("stop_stream"))
+    assert "stop_stream" not in link.calls
+    assert daemon.stream_restarts == 0
+    assert link.streaming
+
+
+def test_daemon_link_freshness_counts_only_samples():
+    async def run():
+        link = FakeLink()
+        path = os.path.join(tempfile.mkdtemp(), "rig.sock")
+        daemon = RigDaemon(link, path)
+        await daemon.start()
+        server = asyncio.create_task(daemon.serve_forever())
+        a = DaemonLink(path)
+        await a.start()
+        rx = asyncio.create_task(a.rx_task())
+        try:
+            t0 = a.last_rx_monotonic
+            await asyncio.sleep(0.05)
+            # replies (and the hello) do not count as a sign of stream life
+            await a.call("heartbeat", {}, 1.0)
+            assert a.last_rx_monotonic == t0
+            await a.call("start_stream", {}, 1.0)
+            feed = asyncio.create_task(link.run())
+            await a.wait_for(lambda s: True, 2.0)
+            assert a.last_rx_monotonic > t0
+            feed.cancel()
+        finally:
+            rx.cancel()
+            server.cancel()
+            await asyncio.gather(rx, server, return_exceptions=True)
+            a.close()
+            await daemon.aclose()
+
+    asyncio.run(run())
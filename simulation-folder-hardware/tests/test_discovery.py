@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+from tcd1 import discovery
+from tcd1.pico_link import PicoCommandError
+
+
+class FakeLink:
+    """PicoLink stand-in answering from a {command: result or exception} table."""
+
+    answers = {}
+
+    def __init__(self, port, baud=115200, reconnect=True):
+        self.port = port
+        self.hello = {}
+
+    async def rx_task(self):
+        await asyncio.sleep(3600)
+
+    async def call(self, name, args, timeout_s):
+        res = self.answers[self.port].get(name, PicoCommandError("unknown command: " + name))
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    def close(self):
+        pass
+
+
+def _ports(monkeypatch, answers):
+    FakeLink.answers = answers
+    monkeypatch.setattr(discovery, "PicoLink", FakeLink)
+    ports = [SimpleNamespace(device=d, serial_number="sn-" + d) for d in answers]
+    monkeypatch.setattr(discovery, "candidate_ports", lambda: ports)
+
+
+def test_is_pico_needs_device_pico():
+    assert discovery._is_pico({"device": "pico"})
+    assert not discovery._is_pico({})
+    assert not discovery._is_pico({"device": "gps"})
+
+
+def test_device_answering_with_errors_is_not_a_pico(monkeypatch, tmp_path):
+    _ports(monkeypatch, {"/dev/ttyUSB0": {}})
+    cache = str(tmp_path / "ports.json")
+    assert asyncio.run(discovery.discover_pico(cache_path=cache)) is None
+    assert discovery._load_cache(cache) == {}
+
+
+def test_hello_match_is_cached(monkeypatch, tmp_path):
+    _ports(monkeypatch, {"/dev/ttyUSB0": {}, "/dev/ttyACM0": {"hello": {"device": "pico", "fw": "x"}}})
+    cache = str(tmp_path / "ports.json")
+    found = asyncio.run(discovery.discover_pico(cache_path=cache))
+    assert found.port == "/dev/ttyACM0"
+    assert "sn-/dev/ttyACM0" in discovery._load_cache(cache)
+
+
+def test_legacy_firmware_needs_heartbeat_and_is_not_cached(monkeypatch, tmp_path):
+    _ports(monkeypatch, {"/dev/ttyACM0": {"heartbeat": {"ts_ms": 1234}}})
+    cache = str(tmp_path / "ports.json")
+    found = asyncio.run(discovery.discover_pico(cache_path=cache))
+    assert found.port == "/dev/ttyACM0"
+    assert found.hello.get("legacy")
+    assert discovery._load_cache(cache) == {}
+
+
+def test_stale_non_pico_cache_entry_is_probed_again(monkeypatch, tmp_path):
+    _ports(monkeypatch, {"/dev/ttyUSB0": {}})
+    cache = str(tmp_path / "ports.json")
+    discovery._save_cache(cache, {"sn-/dev/ttyUSB0": {"device": "/dev/ttyUSB0", "hello": {}}})
+    assert asyncio.run(discovery.discover_pico(cache_path=cache)) is None
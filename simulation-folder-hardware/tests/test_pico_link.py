@@ -0,0 +1,87 @@
+import asyncio
+import json
+import os
+import pty
+import time
+
+import pytest
+
+from tcd1 import binproto
+from tcd1.pico_link import PicoLink
+
+
+def _sent_names(master):
+    names = []
+    try:
+        data = os.read(master, 65536)
+    except BlockingIOError:
+        return names
+    for line in data.splitlines():
+        names.append(json.loads(line)["name"])
+    return names
+
+
+def test_window_wait_counts_against_timeout_and_safe_stop_skips_it():
+    master, slave = pty.openpty()
+    os.set_blocking(master, False)
+
+    async def main():
+        pico = PicoLink(os.ttyname(slave), reconnect=False, max_inflight=1)
+        try:
+            # the Pico never answers: this call holds the only slot for 5 s
+            stuck = asyncio.create_task(pico.call("drain_sump_to_tank", {}, 5.0))
+            await asyncio.sleep(0.05)
+
+            t0 = time.monotonic()
+            with pytest.raises(asyncio.TimeoutError):
+                await pico.call("heartbeat", {}, 0.2)
+            assert time.monotonic() - t0 < 1.0
+            assert pico.metrics.timeouts["heartbeat"] == 1
+
+            # safe_stop goes out at once, slot or not
+            with pytest.raises(asyncio.TimeoutError):
+                await pico.call("safe_stop", {}, 0.2)
+            assert _sent_names(master) == ["drain_sump_to_tank", "safe_stop"]
+
+            stuck.cancel()
+            await asyncio.gather(stuck, return_exceptions=True)
+            # the slot is given back
+            assert not pico._inflight.locked()
+        finally:
+            pico.close()
+
+    try:
+        asyncio.run(main())
+    finally:
+        os.close(slave)
+        os.close(master)
+
+
+@pytest.fixture
+def link():
+    master, slave = pty.openpty()
+    pico = PicoLink(os.ttyname(slave), reconnect=False)
+    yield pico
+    pico.close()
+    os.close(slave)
+    os.close(master)
+
+
+def test_batch_samples_spaced_by_device_ticks(link):
+    # asked for 30 Hz off a 100 Hz tick: every 3rd tick goes out, 30 ms apart, not 33
+    n = 5
+    link._ingest_batch({
+        "type": "sensors_batch",
+        "tick0": 300,
+        "t0_ms": 3000,
+        "t1_ms": 3120,
+        "dtick": 3,
+        "n": n,
+        "stream_hz": 30.0,
+        "cols": {f: [float(i) for i in range(n)] for f in binproto.BATCH_FIELDS},
+    })
+    ts, ticks, _ = link.history["pump_pressure_bar"].last_n(n)
+    assert list(ticks) == [300, 303, 306, 309, 312]
+    assert ts[-1] == link.last_rx_monotonic
+    assert [b - a for a, b in zip(ts, ts[1:])] == pytest.approx([0.030] * 4)
+    assert link.latest["t_ms"] == 3120
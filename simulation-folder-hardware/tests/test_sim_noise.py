@@ -0,0 +1,55 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+from bringup import default_fail
+from tcd1.safety import check_rig_limits
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(HERE, "pico_compat"), os.path.join(HERE, "pico_sim")]
+
+import ticks  # noqa: E402
+
+ticks.install()
+
+import commands  # noqa: E402
+from state import SimState  # noqa: E402
+
+N = 20000
+
+
+def _trips(state):
+    crit = default_fail()
+    trips = 0
+    lo = hi = None
+    for _ in range(N):
+        d = state.sensors_dict()
+        p = d["pump_pressure_bar"]
+        lo = p if lo is None else min(lo, p)
+        hi = p if hi is None else max(hi, p)
+        try:
+            check_rig_limits(SimpleNamespace(latest=d), crit)
+        except RuntimeError:
+            trips += 1
+    # noise stays well inside the limits, not just on them
+    assert lo > crit.pressure_min_bar + 0.25
+    assert hi < crit.pressure_max_bar - 0.25
+    return trips
+
+
+def test_seeded_noise_never_trips_limits_at_idle():
+    for seed in (1, 2, 3):
+        s = SimState()
+        s.noise.reseed(seed)
+        assert _trips(s) == 0
+
+
+def test_seeded_noise_never_trips_limits_after_safe_stop(monkeypatch):
+    replies = []
+    monkeypatch.setattr(commands, "send_msg", replies.append)
+    s = SimState()
+    s.noise.reseed(7)
+    asyncio.run(commands.CommandDispatcher(s).handle_cmd(1, "safe_stop", {}))
+    assert replies[0]["ok"]
+    assert _trips(s) == 0
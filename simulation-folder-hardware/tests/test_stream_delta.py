@@ -0,0 +1,151 @@
+import json
+import os
+import pty
+import random
+import sys
+
+import pytest
+
+from tcd1 import binproto
+from tcd1.pico_link import PicoLink
+from tcd1.stream_delta import DeltaReassembler
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(HERE, "pico_sim")]
+
+from delta import DeltaEncoder  # noqa: E402
+
+DEADBANDS = {"pump_pressure_bar": 0.02, "tank1_mass_kg": 0.001}
+
+
+def _samples(n, seed=0):
+    rng = random.Random(seed)
+    d = {f: 1.0 for f in binproto.SENSOR_FIELDS}
+    out = []
+    for tick in range(n):
+        d = dict(d, sim_tick=tick, t_ms=10 * tick)
+        # pressure wanders, tank fills in steps, the rest holds still
+        d["pump_pressure_bar"] = round(d["pump_pressure_bar"] + rng.uniform(-0.05, 0.05), 3)
+        if tick % 7 == 0:
+            d["tank1_mass_kg"] += 0.25
+        out.append(d)
+    return out
+
+
+def _encoder(keyframe_every=10):
+    enc = DeltaEncoder()
+    enc.configure(keyframe_every, DEADBANDS)
+    return enc
+
+
+def test_rebuilds_full_samples_within_deadband():
+    enc, rx = _encoder(), DeltaReassembler()
+    for d in _samples(200):
+        msg = enc.encode(d)
+        if msg["type"] == "sensors":
+            full = rx.keyframe(msg["data"])
+        else:
+            full = rx.delta(msg["data"])
+        assert set(full) == set(d)
+        for k, v in d.items():
+            assert abs(full[k] - v) <= DEADBANDS.get(k, 0.0)
+
+
+def test_delta_before_first_keyframe_is_dropped():
+    rx = DeltaReassembler()
+    assert rx.delta({"sim_tick": 1, "pump_pressure_bar": 1.5}, 20) is None
+    assert rx.delta({"sim_tick": 2}, 10) is None
+    assert rx.keyframe({"sim_tick": 3, "pump_pressure_bar": 1.0}, 100)["sim_tick"] == 3
+    assert rx.delta({"sim_tick": 4}, 10) == {"sim_tick": 4, "pump_pressure_bar": 1.0}
+    st = rx.stats()
+    assert st["orphan_deltas"] == 2
+    # orphans never made it into a sample, so they don't count as sent
+    assert (st["key_frames"], st["delta_frames"], st["bytes"]) == (1, 1, 110)
+
+
+def test_gap_drops_deltas_until_next_keyframe():
+    rx = DeltaReassembler()
+    rx.keyframe({"sim_tick": 0, "a": 1.0, "b": 1.0})
+    rx.delta({"sim_tick": 1, "a": 2.0})
+    # the frame carrying b=5.0 is lost; the sender won't repeat b until it moves
+    rx.gap()
+    assert rx.delta({"sim_tick": 3, "a": 3.0}) is None
+    assert rx.keyframe({"sim_tick": 4, "a": 3.0, "b": 5.0})["b"] == 5.0
+    assert rx.delta({"sim_tick": 5}) == {"sim_tick": 5, "a": 3.0, "b": 5.0}
+    st = rx.stats()
+    assert (st["gaps"], st["orphan_deltas"], st["delta_frames"]) == (1, 1, 2)
+
+
+def test_stats_counts_bytes_saved():
+    rx = DeltaReassembler()
+    assert rx.stats()["saved_pct"] == 0.0
+    for i in range(10):
+        if i % 5 == 0:
+            rx.keyframe({"sim_tick": i}, 100)
+        else:
+            rx.delta({"sim_tick": i}, 20)
+    assert rx.stats() == {
+        "key_frames": 2,
+        "delta_frames": 8,
+        "orphan_deltas": 0,
+        "gaps": 0,
+        "bytes": 360,
+        "bytes_full_equiv": 1000,
+        "saved_pct": 64.0,
+    }
+
+
+@pytest.fixture
+def link():
+    master, slave = pty.openpty()
+    pico = PicoLink(os.ttyname(slave), reconnect=False)
+    yield pico
+    pico.close()
+    os.close(slave)
+    os.close(master)
+
+
+def _wire(framing, msgs):
+    if framing == "bin":
+        return [binproto.encode_msg(m, seq) for seq, m in enumerate(msgs)]
+    return [json.dumps(m).encode() + b"\n" for m in msgs]
+
+
+@pytest.mark.parametrize("framing", ["bin", "json"])
+@pytest.mark.parametrize("lost", ["keyframe", "delta"])
+def test_link_never_ingests_stale_state(link, framing, lost):
+    samples = _samples(120, seed=1)
+    enc = _encoder(keyframe_every=10)
+    msgs = [enc.encode(d) for d in samples]
+    kind = "sensors" if lost == "keyframe" else "sensors_delta"
+    # lose the second keyframe, or the first delta that moved the tank
+    drop = [i for i, m in enumerate(msgs) if m["type"] == kind and (kind == "sensors" or "tank1_mass_kg" in m["data"])][1]
+    if lost == "delta":
+        assert samples[drop]["tank1_mass_kg"] != samples[drop - 1]["tank1_mass_kg"]
+
+    frames = _wire(framing, msgs)
+    if framing == "bin":
+        del frames[drop]
+    else:
+        # bytes lost in transit: the line no longer parses
+        frames[drop] = frames[drop][:len(frames[drop]) // 2] + b"\n"
+    link.framing = framing
+
+    seen = []
+    real_ingest = link._ingest
+
+    def ingest(data):
+        seen.append(dict(data))
+        real_ingest(data)
+
+    link._ingest = ingest
+    for f in frames:
+        link._feed(f)
+
+    ticks = [d["sim_tick"] for d in seen]
+    next_key = next(i for i in range(drop + 1, len(msgs)) if msgs[i]["type"] == "sensors")
+    assert ticks == [t for t in range(120) if t < drop or t >= next_key]
+    for d in seen:
+        assert abs(d["tank1_mass_kg"] - samples[d["sim_tick"]]["tank1_mass_kg"]) <= DEADBANDS["tank1_mass_kg"]
+    assert link.stream_stats()["gaps"] == 1
+    assert link.stream_stats()["orphan_deltas"] == next_key - drop - 1
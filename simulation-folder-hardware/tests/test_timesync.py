@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from tcd1.timesync import ClockSync
+
+
+class FakePico:
+    """Device ticks_ms running skew fast, reading t0_ms at host time 0."""
+
+    def __init__(self, t0_ms=0, skew=0.0, period=ClockSync.TICKS_PERIOD):
+        self.t0_ms = t0_ms
+        self.skew = skew
+        self.period = period
+
+    def ticks_ms(self, host):
+        return int(self.t0_ms + 1000.0 * host * (1.0 + self.skew)) % self.period
+
+    def host_at(self, ticks, near):
+        # host time the device read ticks (middle of that ms), the read closest to near
+        k = self.t0_ms + 1000.0 * near * (1.0 + self.skew)
+        k = ticks + self.period * round((k - ticks) / self.period)
+        return (k + 0.5 - self.t0_ms) / (1000.0 * (1.0 + self.skew))
+
+
+def _ping(sync, pico, t, rng, slow=0.0):
+    # one heartbeat: ~1 ms each way, slow adds to one leg only
+    up = rng.uniform(0.0004, 0.0008)
+    down = rng.uniform(0.0004, 0.0008)
+    if rng.random() < 0.5:
+        up += slow
+    else:
+        down += slow
+    sync.add(t, t + up + down, pico.ticks_ms(t + up))
+
+
+def _pings(sync, pico, start, n, every, seed=0, outliers=0.0):
+    rng = random.Random(seed)
+    t = start
+    for _ in range(n):
+        _ping(sync, pico, t, rng, 0.08 if rng.random() < outliers else 0.0)
+        t += every
+    return t
+
+
+def _check(sync, pico, t0, t1, step=0.5):
+    # every device stamp in [t0, t1] maps back to when it was read, within the bound
+    worst = 0.0
+    t = t0
+    while t <= t1:
+        ticks = pico.ticks_ms(t)
+        host, err = sync.to_host(ticks)
+        miss = abs(host - pico.host_at(ticks, t))
+        assert miss <= err, (t, miss, err)
+        worst = max(worst, miss)
+        t += step
+    return worst
+
+
+def test_offset_from_a_few_pings():
+    sync, pico = ClockSync(), FakePico(t0_ms=123456, skew=30e-6)
+    t = _pings(sync, pico, 100.0, 5, 1.0)
+    assert sync.synced and not sync.fitted
+    assert sync.drift == 0.0
+    assert sync.err_s < 0.003
+    # unfitted, the bound widens with DRIFT_BOUND as it extrapolates
+    assert _check(sync, pico, t - 5.0, t + 30.0) < 0.003
+    assert sync.to_host(pico.ticks_ms(t + 30.0))[1] > sync.err_s + 0.0025
+
+
+@pytest.mark.parametrize("skew", [-200e-6, 0.0, 80e-6])
+def test_fits_skew(skew):
+    sync, pico = ClockSync(), FakePico(t0_ms=5000, skew=skew)
+    t = _pings(sync, pico, 10.0, 40, 2.0, seed=1)
+    assert sync.fitted
+    # host = dev / (1 + skew)
+    assert sync.drift == pytest.approx(-skew, abs=5e-6)
+    assert sync.snapshot()["drift_ppm"] == pytest.approx(-1e6 * skew, abs=5)
+    assert _check(sync, pico, t - 60.0, t + 20.0) < 0.002
+
+
+@pytest.mark.parametrize("period", [ClockSync.TICKS_PERIOD, 1 << 16])
+def test_ticks_wraparound(period):
+    # starts 5 s before the wrap; a 2**16 period wraps again every 65 s
+    sync, pico = ClockSync(period), FakePico(t0_ms=period - 5000, skew=50e-6, period=period)
+    t = 0.0
+    for _ in range(8):
+        t = _pings(sync, pico, t, 10, 2.0, seed=int(t))
+        _check(sync, pico, t - 20.0, t)
+    assert sync.resets == 0
+    assert sync.fitted and sync.drift == pytest.approx(-50e-6, abs=5e-6)
+    # a stamp from just before the last wrap still maps to the past
+    host, _ = sync.to_host(pico.ticks_ms(t - 10.0))
+    assert host == pytest.approx(t - 10.0, abs=0.002)
+
+
+def test_rtt_outliers_rejected():
+    sync, pico = ClockSync(), FakePico(t0_ms=1000, skew=20e-6)
+    # a third of the heartbeats queue 80 ms behind a stream burst, on one leg
+    t = _pings(sync, pico, 0.0, 64, 1.0, seed=2, outliers=0.33)
+    assert max(s[2] for s in sync._samples) > 0.08
+    assert sync.err_s < 0.003
+    assert _check(sync, pico, t - 30.0, t + 5.0) < 0.002
+
+
+def test_device_restart_resets_model():
+    sync, pico = ClockSync(), FakePico(t0_ms=7_000_000)
+    t = _pings(sync, pico, 0.0, 30, 1.0)
+    assert sync.fitted
+    pico = FakePico(t0_ms=-1000.0 * (t + 0.5))  # rebooted: ticks_ms ~0 now
+    t = _pings(sync, pico, t + 1.0, 3, 1.0, seed=3)
+    assert sync.resets == 1
+    assert sync.snapshot()["samples"] == 3
+    _check(sync, pico, t - 2.0, t)
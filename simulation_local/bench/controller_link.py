@@ -0,0 +1,72 @@
+# Startup time and per-command latency, kp_controller_sim subprocess vs in-process.
+#
+#   python -m bench.controller_link [--n 500] [--runs 5]
+#
+# startup is construct -> first heartbeat answered (median over runs);
+# latency is heartbeat / snapshot round trips with the 10 Hz stream on.
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from tcd1.controller_inproc_link import InProcessControllerLink
+from tcd1.controller_subprocess_link import SubprocessControllerLink
+
+MODES = {
+    "subprocess": SubprocessControllerLink,
+    "inproc": InProcessControllerLink,
+}
+
+
+async def startup(mode: str) -> float:
+    t0 = time.perf_counter()
+    link = MODES[mode]()
+    await link.start()
+    rx = asyncio.create_task(link.rx_task())
+    try:
+        await link.call("heartbeat", {}, 10.0)
+        return time.perf_counter() - t0
+    finally:
+        rx.cancel()
+        await asyncio.gather(rx, return_exceptions=True)
+        await link.aclose()
+
+
+async def latency(mode: str, n: int) -> dict:
+    link = MODES[mode]()
+    await link.start()
+    rx = asyncio.create_task(link.rx_task())
+    out = {}
+    try:
+        await link.call("start_stream", {"hz": 10.0}, 10.0)
+        for name in ("heartbeat", "snapshot"):
+            lat = []
+            for _ in range(n):
+                t0 = time.perf_counter()
+                await link.call(name, {}, 5.0)
+                lat.append(1e6 * (time.perf_counter() - t0))
+            lat.sort()
+            out[name] = (statistics.median(lat), lat[int(0.99 * (n - 1))])
+    finally:
+        rx.cancel()
+        await asyncio.gather(rx, return_exceptions=True)
+        await link.aclose()
+    return out
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=500)
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    for mode in MODES:
+        t_start = statistics.median([await startup(mode) for _ in range(args.runs)])
+        lat = await latency(mode, args.n)
+        cmds = "  ".join(f"{k} p50 {p50:8.1f} us p99 {p99:8.1f} us" for k, (p50, p99) in lat.items())
+        print(f"{mode:10s} startup {1000 * t_start:7.1f} ms  {cmds}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
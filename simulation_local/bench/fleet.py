@@ -0,0 +1,88 @@
+# Campaign throughput, fleet.FleetSim vs looping the scalar SystemController.
+#
+#   python -m bench.fleet [--rigs 1000] [--scalar-rigs 3] [--litres 20] [--dose-ml 1000]
+#
+# The scalar side runs SystemController's own drain coroutines one rig at a
+# time on a VirtualTimeLoop (so no real sleeping, only its per-step cost);
+# the fleet side advances all rigs together. Both use default params, so
+# their cycle times must agree; the speed-up is in rigs simulated per
+# real second.
+
+import argparse
+import asyncio
+import contextlib
+import io
+import math
+import time
+
+import numpy as np
+
+from bringup import default_fail
+from controls import SystemController
+from fleet import FleetParams, FleetSim
+from tcd1 import clock
+from tcd1.config import TestConfig
+
+
+async def scalar_campaign(cfg: TestConfig, p: FleetParams, dt: float = 0.05) -> list:
+    """One rig through the campaign on SystemController; cycle durations."""
+    ctrl = SystemController()
+    ctrl.canister_mass_kg = 0.0
+    cycles = max(1, math.ceil(1000.0 * cfg.total_volume_to_pump_l / cfg.volume_per_dispense_ml))
+    dose_kg = cfg.volume_per_dispense_ml / 1000.0 * p.density_kg_l
+    flow_kg_s = p.dispense_ml_s / 1000.0 * p.density_kg_l
+
+    out = []
+    for _ in range(cycles):
+        t0 = clock.monotonic()
+        left = dose_kg
+        while left > 1e-12:
+            await asyncio.sleep(dt)
+            add = min(left, flow_kg_s * dt)
+            ctrl.canister_mass_kg += add
+            left -= add
+        await ctrl.drain_canister_to_sump(timeout_s=cfg.drain_timeout_s, stable_eps_kg=p.stable_eps_kg, stable_time_s=p.stable_time_s)
+        await ctrl.drain_sump_to_tank(
+            timeout_s=cfg.return_timeout_s, sump_empty_kg=p.sump_empty_kg, stable_eps_kg=p.stable_eps_kg, stable_time_s=p.stable_time_s
+        )
+        if cfg.rest_time_s > 0:
+            await asyncio.sleep(cfg.rest_time_s)
+        out.append(clock.monotonic() - t0)
+    return out
+
+
+def run_scalar(cfg: TestConfig, rigs: int) -> tuple:
+    cycle_s = []
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # Pump ON/OFF prints
+        for _ in range(rigs):
+            with asyncio.Runner(loop_factory=clock.VirtualTimeLoop) as runner:
+                cycle_s += runner.run(scalar_campaign(cfg, FleetParams()))
+    return time.perf_counter() - t0, np.array(cycle_s)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rigs", type=int, default=1000)
+    ap.add_argument("--scalar-rigs", type=int, default=3)
+    ap.add_argument("--litres", type=float, default=20.0)
+    ap.add_argument("--dose-ml", type=float, default=1000.0)
+    args = ap.parse_args()
+
+    cfg = TestConfig(args.litres, args.dose_ml)
+
+    t_scalar, cyc_scalar = run_scalar(cfg, args.scalar_rigs)
+    t0 = time.perf_counter()
+    res = FleetSim(cfg, default_fail(), args.rigs).run()
+    t_fleet = time.perf_counter() - t0
+
+    per_scalar = args.scalar_rigs / t_scalar
+    per_fleet = args.rigs / t_fleet
+    print(f"campaign {args.litres:g} L in {args.dose_ml:g} ml doses = {res.cycles_per_campaign} cycles")
+    print(f"scalar  {args.scalar_rigs:6d} rigs {t_scalar:8.2f} s  {per_scalar:10.1f} rigs/s  cycle p50 {np.median(cyc_scalar):.3f} s")
+    print(f"fleet   {args.rigs:6d} rigs {t_fleet:8.2f} s  {per_fleet:10.1f} rigs/s  cycle p50 {np.median(res.cycle_s):.3f} s")
+    print(f"speed-up {per_fleet / per_scalar:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
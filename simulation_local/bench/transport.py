@@ -0,0 +1,77 @@
+# Maximum sustainable sensor stream rate, stdout JSON pipe vs shared-memory ring.
+#
+#   python -m bench.transport [--hz 500,1000,2000,...] [--seconds 3]
+#
+# For each rate the sim is asked to stream at hz and the host counts what
+# it actually ingests (history, waiters and metrics included). A rate is
+# sustained when the host gets >= 95 % of it with no samples lost on the
+# way (stream counter gaps, ring overruns). Each transport stops at its
+# first failing rate. cpu is host process CPU per ingested sample.
+
+import argparse
+import asyncio
+import time
+
+from tcd1.controller_subprocess_link import SubprocessControllerLink
+
+DEFAULT_HZ = "100,500,1000,2000,5000,10000,15000,20000,25000,30000,40000,50000"
+
+
+async def measure(link: SubprocessControllerLink, hz: float, seconds: float) -> dict:
+    await link.call("start_stream", {"hz": hz}, 5.0)
+    await asyncio.sleep(0.5)  # settle: attach, drain the pipe backlog
+    st = link.metrics.stream
+    lost0 = st.dropped + link.shm_stats().get("overruns", 0)
+    n0 = st.samples
+    t0 = time.monotonic()
+    c0 = time.process_time()
+    await asyncio.sleep(seconds)
+    dt = time.monotonic() - t0
+    cpu = time.process_time() - c0
+    n = st.samples - n0
+    lost = st.dropped + link.shm_stats().get("overruns", 0) - lost0
+    return {
+        "hz": hz,
+        "rate": n / dt,
+        "cpu_us": 1e6 * cpu / n if n else 0.0,
+        "lost": lost,
+        "ok": n / dt >= 0.95 * hz and lost == 0,
+    }
+
+
+async def run(transport: str, rates: list, seconds: float) -> float:
+    link = SubprocessControllerLink(transport=transport, history_len=1000)
+    await link.start()
+    rx = asyncio.create_task(link.rx_task())
+    best = 0.0
+    try:
+        await link.call("heartbeat", {}, 5.0)
+        for hz in rates:
+            r = await measure(link, hz, seconds)
+            print(
+                f"{transport:5s} {hz:8.0f} Hz  got {r['rate']:9.1f} Hz  "
+                f"cpu {r['cpu_us']:6.1f} us/sample  lost {r['lost']:6d}  {'ok' if r['ok'] else 'FAIL'}"
+            )
+            if not r["ok"]:
+                break
+            best = hz
+    finally:
+        rx.cancel()
+        await asyncio.gather(rx, return_exceptions=True)
+        await link.aclose()
+    return best
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--hz", default=DEFAULT_HZ, help="Comma separated rates to try, ascending")
+    ap.add_argument("--seconds", type=float, default=3.0)
+    args = ap.parse_args()
+    rates = [float(x) for x in args.hz.split(",") if x]
+
+    best = {t: await run(t, rates, args.seconds) for t in SubprocessControllerLink.TRANSPORTS}
+    print("max sustained:", ", ".join(f"{t} {hz:.0f} Hz" for t, hz in best.items()))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,12 +5,15 @@ warnings.filterwarnings("ignore", category=ResourceWarning)
 import logging
 logging.getLogger("asyncio").setLevel(logging.CRITICAL)
 import asyncio
-import time
+import json
 from typing import Optional
 
+from tcd1 import clock
 from tcd1.config import FailCriteria, TestConfig
+from tcd1.daemon import DEFAULT_SOCKET
 from tcd1.logger import CsvLogger
-from tcd1.safety import check_stream, check_limits, safe_stop
+from tcd1.liveness import LivenessManager
+from tcd1.safety import check_link_health, check_stream, check_limits, safe_stop
 from tcd1.actions.heartbeat import heartbeat
 from tcd1.actions.data_collect import start_stream, snapshot, stop_stream
 from tcd1.actions.drain_canister import drain_canister_to_sump
@@ -36,17 +39,13 @@ def default_fail() -> FailCriteria:
 
 
 async def wait_for_data(ctrl, t: float = 5.0) -> None:
-    t0 = time.monotonic()
-    while not getattr(ctrl, "latest", None):
-        if time.monotonic() - t0 > t:
-            raise RuntimeError("No sensor data")
-        await asyncio.sleep(0.05)
+    await ctrl.wait_for(lambda s: True, t, label="sensor data")
 
 
 async def wait_controller_ready(ctrl, t: float = 5.0) -> None:
-    t0 = time.monotonic()
+    t0 = clock.monotonic()
     last_err: Optional[Exception] = None
-    while time.monotonic() - t0 < t:
+    while clock.monotonic() - t0 < t:
         try:
             await heartbeat(ctrl)
             return
@@ -56,60 +55,85 @@ async def wait_controller_ready(ctrl, t: float = 5.0) -> None:
     raise RuntimeError(f"Controller not responding after {t:.1f}s (last error: {last_err!r})")
 
 
-async def heartbeat_task(ctrl, period_s: float = 0.5) -> None:
-    try:
-        while True:
-            try:
-                await heartbeat(ctrl)
-            except Exception:
-                pass
-            await asyncio.sleep(period_s)
-    except asyncio.CancelledError:
-        pass
+async def make_controller(args):
+    if args.controller == "inproc":
+        from tcd1.controller_inproc_link import InProcessControllerLink
 
+        ctrl = InProcessControllerLink(seed=args.seed)
+        await ctrl.start()
+        return ctrl
+
+    if args.controller == "daemon":
+        from tcd1.daemon_link import DaemonLink
+
+        ctrl = DaemonLink(args.daemon_socket)
+        await ctrl.start()
+        return ctrl
+
+    if args.controller == "socket":
+        from tcd1.controller_socket_link import SocketControllerLink
+
+        ctrl = SocketControllerLink(args.address)
+        await ctrl.start()
+        return ctrl
 
-async def make_controller(args):
     if args.controller == "serial":
         from tcd1.controller_link import ControllerLink
 
         port = ControllerLink.auto_port() if args.port == "auto" else args.port
         if not port:
             raise RuntimeError("No controller port found (use --port or check connection)")
-        return ControllerLink(port, args.baud)
+        ctrl = ControllerLink(port, args.baud)
+        await ctrl.start()
+        return ctrl
 
     from tcd1.controller_subprocess_link import SubprocessControllerLink
 
     cmd = args.controller_sim_cmd.split() if args.controller_sim_cmd else None
-    ctrl = SubprocessControllerLink(cmd=cmd)
+    ctrl = SubprocessControllerLink(cmd=cmd, transport=args.transport, seed=args.seed)
     await ctrl.start()
     return ctrl
 
 
-async def main() -> None:
+def parse_args() -> argparse.Namespace:
     ap = argparse.ArgumentParser()
     ap.add_argument("--mode", choices=["monitor", "drain-canister", "drain-sump", "snapshot"], default="monitor")
 
-    ap.add_argument("--controller", choices=["sim", "serial"], default="sim")
+    ap.add_argument("--controller", choices=["sim", "inproc", "serial", "socket", "daemon"], default="sim")
+    ap.add_argument("--clock", choices=["wall", "virtual"], default="wall", help="virtual: simulated time on the event loop, as fast as the CPU allows (needs --controller inproc)")
+    ap.add_argument("--transport", choices=["pipe", "shm"], default="pipe", help="Sim sensor stream over the stdout pipe or a shared-memory ring")
+    ap.add_argument("--daemon-socket", default=DEFAULT_SOCKET, help="rig_daemon.py socket for --controller daemon")
     ap.add_argument("--controller-sim-cmd", default="python -u -m kp_controller_sim.main", help="Override sim command, e.g. 'python -m kp_controller_sim.main'")
+    ap.add_argument("--seed", type=int, default=None, help="Sim sensor noise seed, for bit-identical telemetry across runs (default: random)")
 
     ap.add_argument("--port", default="auto")
     ap.add_argument("--baud", type=int, default=115200)
+    ap.add_argument("--address", default="127.0.0.1:7700", help="--controller socket: host:port or Unix socket path")
 
     ap.add_argument("--ev", choices=["ev1", "ev2"], default="ev1")
     ap.add_argument("--dest", choices=["TANK1", "TANK2"], default="TANK2")
 
     ap.add_argument("--stream-hz", type=float, default=10.0)
+    ap.add_argument("--keyframe-s", type=float, default=0.0, help="Delta stream: full frame every N s, changed fields in between (0 = off)")
     ap.add_argument("--print-hz", type=float, default=2.0)
+    ap.add_argument("--quiet-s", type=float, default=1.0, help="Heartbeat only after this long without any controller traffic")
+    ap.add_argument("--metrics-every", type=float, default=10.0, help="Monitor: print link metrics every N s (0 = off)")
     ap.add_argument("--logcsv", default="")
     ap.add_argument("--stable-eps", type=float, default=0.01)
     ap.add_argument("--stable-time", type=float, default=2.0)
     ap.add_argument("--sump-empty", type=float, default=0.05)
     ap.add_argument("--no-stream", action="store_true")
     args = ap.parse_args()
+    if args.clock == "virtual" and args.controller != "inproc":
+        ap.error("--clock virtual needs --controller inproc (a subprocess or serial controller keeps real time)")
+    return args
+
 
+async def main(args: argparse.Namespace) -> None:
     ctrl = await make_controller(args)
     rx = asyncio.create_task(ctrl.rx_task())
-    hb = asyncio.create_task(heartbeat_task(ctrl, 0.5))
+    live = LivenessManager(ctrl, quiet_s=args.quiet_s)
+    hb = asyncio.create_task(live.run())
 
     logger: Optional[CsvLogger] = CsvLogger(args.logcsv) if args.logcsv else None
     cfg = default_cfg()
@@ -122,9 +146,10 @@ async def main() -> None:
         if getattr(ctrl, "hello", None):
             print("[HELLO]", ctrl.hello)
 
-        if not args.no_stream:
+        # the daemon already streams for all of its clients
+        if not args.no_stream and args.controller != "daemon":
             try:
-                await start_stream(ctrl, args.stream_hz)
+                await start_stream(ctrl, args.stream_hz, args.keyframe_s)
             except Exception:
                 pass
 
@@ -134,12 +159,19 @@ async def main() -> None:
         elif args.mode == "monitor":
             await wait_for_data(ctrl)
             period = 1.0 / max(0.2, args.print_hz)
+            show_metrics = args.metrics_every > 0 and hasattr(ctrl, "metrics_snapshot")
+            next_metrics = clock.monotonic() + args.metrics_every
             while True:
+                check_link_health(live)
                 check_stream(ctrl, crit)
                 check_limits(ctrl, crit)
                 print(ctrl.latest)
                 if logger:
-                    logger.log(ctrl.latest)
+                    ts, ts_err = ctrl.sample_time(ctrl.latest)
+                    logger.log({"ts": ts, "ts_err_ms": "" if ts_err is None else round(1000.0 * ts_err, 3), **ctrl.latest})
+                if show_metrics and clock.monotonic() >= next_metrics:
+                    print("[METRICS]", json.dumps(ctrl.metrics_snapshot()))
+                    next_metrics += args.metrics_every
                 await asyncio.sleep(period)
 
         elif args.mode == "drain-canister":
@@ -170,13 +202,18 @@ async def main() -> None:
             print("[DONE]", res)
 
     finally:
-        try:
-            await stop_stream(ctrl)
-        except Exception:
-            pass
+        if args.controller != "daemon":
+            try:
+                await stop_stream(ctrl)
+            except Exception:
+                pass
 
-        await safe_stop(ctrl)
+        if args.controller != "daemon" or args.mode.startswith("drain"):
+            await safe_stop(ctrl)
 
+        if args.keyframe_s > 0 and hasattr(ctrl, "stream_stats"):
+            print("[STREAM]", ctrl.stream_stats())
+        print("[LIVENESS]", live.report())
         if logger:
             logger.close()
 
@@ -195,7 +232,8 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    clock.run(main(args), virtual=args.clock == "virtual")
 
 
 
@@ -1,74 +1,191 @@
-import time
-import random
+import asyncio
+from typing import Callable, Optional
+
+from tcd1.clock import CLOCK, LoopClock
+
+# clock jitter allowed when deciding a transition has finished
+_EPS = 1e-9
+
+
+class Transition:
+    """
+    A timed actuator move on the sim clock: started by start(duration),
+    finished duration s later. Nothing blocks; callers read frac()/done or
+    await wait().
+    """
+
+    def __init__(self, clock: Optional[LoopClock] = None):
+        self.clock = clock if clock is not None else CLOCK
+        self.t_start = float("-inf")
+        self.duration_s = 0.0
+
+    def start(self, duration_s: float) -> None:
+        self.t_start = self.clock.monotonic()
+        self.duration_s = max(0.0, float(duration_s))
+
+    def remaining_s(self) -> float:
+        return max(0.0, self.t_start + self.duration_s - self.clock.monotonic())
+
+    @property
+    def done(self) -> bool:
+        return self.remaining_s() <= _EPS
+
+    def frac(self) -> float:
+        """0.0 at start() .. 1.0 when done."""
+        if self.done or self.duration_s <= 0.0:
+            return 1.0
+        return (self.clock.monotonic() - self.t_start) / self.duration_s
+
+    async def wait(self) -> None:
+        while not self.done:
+            await asyncio.sleep(self.remaining_s())
 
 
 class Pump:
-    def __init__(self, label: str, max_f: float, max_p: float):
+    """
+    start()/stop() return at once; speed() ramps linearly to full (or to
+    zero) over spin_up_s.
+    """
+
+    def __init__(self, label: str, max_f: float, max_p: float, spin_up_s: float = 0.5, clock: Optional[LoopClock] = None):
         self.label = label
         self.max_f = float(max_f)
         self.max_p = float(max_p)
+        self.spin_up_s = float(spin_up_s)
         self.is_running = False
+        self._ramp = Transition(clock)
+        self._speed0 = 0.0
+
+    def speed(self) -> float:
+        """Fraction of full speed, 0.0 .. 1.0."""
+        f = self._ramp.frac()
+        target = 1.0 if self.is_running else 0.0
+        return self._speed0 + (target - self._speed0) * f
+
+    def _command(self, running: bool) -> None:
+        self._speed0 = self.speed()
+        self.is_running = running
+        self._ramp.start(abs((1.0 if running else 0.0) - self._speed0) * self.spin_up_s)
 
     def start(self):
-        self.is_running = True
+        if not self.is_running:
+            self._command(True)
         print(f"{self.label} is now ON")
 
     def stop(self):
-        self.is_running = False
+        if self.is_running:
+            self._command(False)
         print(f"{self.label} is now OFF")
 
+    async def wait(self) -> None:
+        await self._ramp.wait()
+
 
 class MotorizedBallValve:
-    def __init__(self, name: str, open_time_s: float = 3.0, close_time_s: float = 3.0):
+    """
+    Travels at open_time_s / close_time_s per full stroke. command() sets
+    the target and returns; position (0=closed, 100=open) follows on the
+    sim clock, and move_to() awaits arrival.
+    """
+
+    def __init__(self, name: str, open_time_s: float = 3.0, close_time_s: float = 3.0, clock: Optional[LoopClock] = None):
         self.name = name
-        self.position = 0  # 0=closed, 100=open
         self.open_time_s = float(open_time_s)
         self.close_time_s = float(close_time_s)
+        self.target = 0
+        self._from = 0.0
+        self._move = Transition(clock)
+
+    @property
+    def position(self) -> float:
+        return self._from + (self.target - self._from) * self._move.frac()
 
-    def move_to(self, target: int):
+    @property
+    def moving(self) -> bool:
+        return not self._move.done
+
+    def command(self, target: int) -> None:
         target = max(0, min(100, int(target)))
-        if target == self.position:
-            return
-        duration = (abs(target - self.position) / 100.0) * (
-            self.open_time_s if target > self.position else self.close_time_s
-        )
-        time.sleep(min(duration, 0.05))
-        self.position = target
+        pos = self.position
+        self._from = pos
+        self.target = target
+        self._move.start((abs(target - pos) / 100.0) * (self.open_time_s if target > pos else self.close_time_s))
+
+    async def move_to(self, target: int) -> None:
+        self.command(target)
+        await self._move.wait()
 
 
 class SolenoidValve:
-    def __init__(self, name: str):
+    """open()/close() return at once; is_open changes response_s later."""
+
+    def __init__(self, name: str, response_s: float = 0.05, clock: Optional[LoopClock] = None):
         self.name = name
-        self.is_open = False
+        self.response_s = float(response_s)
+        self.commanded = False
+        self._prev = False
+        self._switch = Transition(clock)
+
+    @property
+    def is_open(self) -> bool:
+        return self.commanded if self._switch.done else self._prev
+
+    def _command(self, state: bool) -> None:
+        if state == self.commanded:
+            return
+        self._prev = self.is_open
+        self.commanded = state
+        self._switch.start(self.response_s)
 
     def open(self):
-        self.is_open = True
+        self._command(True)
 
     def close(self):
-        self.is_open = False
+        self._command(False)
+
+    async def wait(self) -> None:
+        await self._switch.wait()
 
 
 class DivertingValve:
-    def __init__(self, name: str):
+    """set_to() returns at once; position changes switch_s later."""
+
+    def __init__(self, name: str, switch_s: float = 1.0, clock: Optional[LoopClock] = None):
         self.name = name
-        self.position = "TANK2"
+        self.switch_s = float(switch_s)
+        self.target = "TANK2"
+        self._prev = "TANK2"
+        self._switch = Transition(clock)
+
+    @property
+    def position(self) -> str:
+        return self.target if self._switch.done else self._prev
 
     def set_to(self, tank: str):
         if tank not in ("TANK1", "TANK2"):
             raise ValueError("tank must be TANK1 or TANK2")
-        self.position = tank
+        if tank == self.target:
+            return
+        self._prev = self.position
+        self.target = tank
+        self._switch.start(self.switch_s)
+
+    async def wait(self) -> None:
+        await self._switch.wait()
 
 
 class LoadCell:
     """
     Simple sim load cell.
-    Always returns a float (never None).
+    Always returns a float (never None). noise() is added to every read
+    (noise.NoiseStream; none when not given).
     """
 
-    def __init__(self, name: str, capacity_kg: float):
+    def __init__(self, name: str, capacity_kg: float, noise: Optional[Callable[[], float]] = None):
         self.name = name
         self.capacity_kg = float(capacity_kg)
         self._mass_kg = 0.0  # IMPORTANT: initialize
+        self.noise = noise
 
     def set_mass(self, mass_kg: float):
         m = float(mass_kg)
@@ -79,9 +196,9 @@ class LoadCell:
         self._mass_kg = m
 
     def read_mass(self) -> float:
-        # Small noise, but always numeric
-        noise = random.uniform(-0.003, 0.003)
-        v = self._mass_kg + noise
+        v = self._mass_kg
+        if self.noise is not None:
+            v += self.noise()
         if v < 0.0:
             v = 0.0
         return float(v)
@@ -1,12 +1,23 @@
 ﻿import asyncio
-import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 from components import Pump, MotorizedBallValve, SolenoidValve, LoadCell, DivertingValve
-
-
-def _now_ts() -> float:
-    return time.time()
+from io_config import actuator_timing, load_io_config, noise_sigmas
+from noise import SensorNoise
+from tcd1.clock import CLOCK, LoopClock
+
+# noisy sensors() keys: (io_config sensor, unit scale, sigma without an io_config
+# accuracy[, operating span the accuracy_percent applies to instead of full scale])
+NOISE_SOURCES = {
+    "canister_mass_kg": ("load_cell_1", 1.0, 0.001),
+    "sump_mass_kg": ("load_cell_2", 1.0, 0.001),
+    # kPa; 0.5 % of the 100 bar full scale is +-0.5 bar on a ~1 bar signal and
+    # trips pressure_min_bar at idle, so of the 0-3 bar working range instead
+    "pump_pressure_bar": ("pressure_sensor_2.pressure", 0.01, 0.0, 3.0),
+    "bus_voltage_v": ("voltage_sensor_1", 1.0, 0.0),
+    "pump_voltage_v": ("voltage_sensor_2", 1.0, 0.0),
+    "dv_voltage_v": ("voltage_sensor_3", 1.0, 0.0),
+}
 
 
 class SystemController:
@@ -19,18 +30,45 @@ class SystemController:
       - pump_current_a, dv_current_a
       - pump_voltage_v, dv_voltage_v
       - ev1_status, ev2_status
+
+    Every timestamp, timeout and stable-time window reads clock (default:
+    the running event loop's clock, so a VirtualTimeLoop speeds it all up).
+
+    Actuators move on that clock with io_config's timing (see
+    io_config.actuator_timing): ev1/ev2 are the emptying solenoids, the
+    return line is pump -> MBV 1 -> diverter -> tank, and a drain waits for
+    its valves the way the rig's firmware does.
+
+    Sensor readings carry seeded noise sized from io_config's accuracy
+    specs (NOISE_SOURCES); the same seed gives the same readings.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        clock: Optional[LoopClock] = None,
+        io_config: Optional[Dict[str, Any]] = None,
+        seed: Optional[int] = None,
+    ):
+        self.clock = clock if clock is not None else CLOCK
+        cfg = io_config if io_config is not None else load_io_config()
+        timing = actuator_timing(cfg)
+        self.timing = timing
+        self.noise = SensorNoise(noise_sigmas(cfg, NOISE_SOURCES), seed)
+
         # Components
-        self.pumps = [Pump("Return Pump", 2.7, 380)]
-        self.mbvs = [MotorizedBallValve(f"MBV {i}") for i in range(1, 5)]
+        self.pumps = [Pump("Return Pump", 2.7, 380, spin_up_s=timing["pump_spin_up_s"], clock=self.clock)]
+        self.mbvs = [
+            MotorizedBallValve(f"MBV {i}", timing["mbv_open_s"], timing["mbv_close_s"], clock=self.clock) for i in range(1, 5)
+        ]
         self.solenoids = [
-            SolenoidValve(n)
+            SolenoidValve(n, timing["solenoid_response_s"], clock=self.clock)
             for n in ["Dispense Valve 1", "Dispense Valve 2", "Emptying Valve 1", "Emptying Valve 2"]
         ]
-        self.load_cells = [LoadCell("Canister Load Cell", 300), LoadCell("Sump Load Cell", 300)]
-        self.diverter = DivertingValve("3-Way Diverter")
+        self.load_cells = [
+            LoadCell("Canister Load Cell", 300, self.noise.stream("canister_mass_kg")),
+            LoadCell("Sump Load Cell", 300, self.noise.stream("sump_mass_kg")),
+        ]
+        self.diverter = DivertingValve("3-Way Diverter", timing["diverter_switch_s"], clock=self.clock)
 
         # Mass state (kg)
         self.canister_mass_kg = 5.0
@@ -46,29 +84,34 @@ class SystemController:
         self.dv_current_a = 0.5
         self.pump_pressure_bar = 1.2
 
-        # Valve status flags
-        self.ev1_status = False
-        self.ev2_status = False
-
         # Diverter target
         self.tank = "TANK2"
 
         self._sync_loadcells()
 
+    @property
+    def ev1_status(self) -> bool:
+        return self.solenoids[2].is_open
+
+    @property
+    def ev2_status(self) -> bool:
+        return self.solenoids[3].is_open
+
     def _sync_loadcells(self) -> None:
         self.load_cells[0].set_mass(self.canister_mass_kg)
         self.load_cells[1].set_mass(self.sump_mass_kg)
 
     def sensors(self) -> Dict[str, Any]:
         self._sync_loadcells()
+        noise = self.noise
         return {
-            "ts": _now_ts(),
-            "bus_voltage_v": float(self.bus_voltage_v),
-            "pump_pressure_bar": float(self.pump_pressure_bar),
+            "ts": self.clock.time(),
+            "bus_voltage_v": float(self.bus_voltage_v + noise("bus_voltage_v")),
+            "pump_pressure_bar": float(self.pump_pressure_bar + noise("pump_pressure_bar")),
             "pump_current_a": float(self.pump_current_a),
             "dv_current_a": float(self.dv_current_a),
-            "pump_voltage_v": float(self.bus_voltage_v),
-            "dv_voltage_v": float(self.bus_voltage_v),
+            "pump_voltage_v": float(self.bus_voltage_v + noise("pump_voltage_v")),
+            "dv_voltage_v": float(self.bus_voltage_v + noise("dv_voltage_v")),
             "canister_mass_kg": float(self.load_cells[0].read_mass()),
             "sump_mass_kg": float(self.load_cells[1].read_mass()),
             "ev1_status": bool(self.ev1_status),
@@ -76,7 +119,7 @@ class SystemController:
         }
 
     async def heartbeat(self) -> Dict[str, Any]:
-        return {"ok": True, "ts": _now_ts()}
+        return {"ok": True, "ts": self.clock.time()}
 
     async def start_stream(self, hz: float) -> Dict[str, Any]:
         self.stream_hz = max(0.2, float(hz))
@@ -88,12 +131,15 @@ class SystemController:
         return {"ok": True}
 
     async def snapshot(self) -> Dict[str, Any]:
-        return {"ok": True, "ts": _now_ts(), "data": self.sensors()}
+        return {"ok": True, "ts": self.clock.time(), "data": self.sensors()}
 
     async def safe_stop(self) -> Dict[str, Any]:
+        # commanded only: safe_stop must not wait on valve travel
         self.pumps[0].stop()
-        self.ev1_status = False
-        self.ev2_status = False
+        for sv in self.solenoids:
+            sv.close()
+        for mbv in self.mbvs:
+            mbv.command(0)
         self.pump_current_a = 0.1
         self.dv_current_a = 0.1
         self.pump_pressure_bar = 0.8
@@ -110,48 +156,56 @@ class SystemController:
         if ev not in ("ev1", "ev2"):
             raise ValueError("ev must be ev1 or ev2")
 
-        self.ev1_status = (ev == "ev1")
-        self.ev2_status = (ev == "ev2")
+        valve = self.solenoids[2] if ev == "ev1" else self.solenoids[3]
+        other = self.solenoids[3] if ev == "ev1" else self.solenoids[2]
+        t0 = self.clock.monotonic()
 
-        self.pumps[0].stop()
-        self.pump_current_a = 0.2
-        self.dv_current_a = 0.6
-        self.pump_pressure_bar = 1.0
+        try:
+            other.close()
+            valve.open()
 
-        t0 = time.monotonic()
-        last_change_t = time.monotonic()
-        last_can = float(self.canister_mass_kg)
+            self.pumps[0].stop()
+            self.pump_current_a = 0.2
+            self.dv_current_a = 0.6
+            self.pump_pressure_bar = 1.0
 
-        rate = 2.0  # kg/s (faster sim)
+            last_change_t = self.clock.monotonic()
+            last_can = float(self.canister_mass_kg)
 
-        while True:
-            if time.monotonic() - t0 > float(timeout_s):
-                raise RuntimeError("drain_canister_to_sump timed out")
+            rate = 2.0  # kg/s (faster sim)
 
-            dt = 0.05
-            await asyncio.sleep(dt)
+            while True:
+                if self.clock.monotonic() - t0 > float(timeout_s):
+                    raise RuntimeError("drain_canister_to_sump timed out")
 
-            if self.canister_mass_kg > 0.0:
-                d = min(self.canister_mass_kg, rate * dt)
-                self.canister_mass_kg -= d
-                self.sump_mass_kg += d
+                dt = 0.05
+                await asyncio.sleep(dt)
 
-            cur_can = float(self.canister_mass_kg)
-            if abs(cur_can - last_can) > float(stable_eps_kg):
-                last_change_t = time.monotonic()
-                last_can = cur_can
+                # nothing flows until the solenoid has actually opened
+                if valve.is_open and self.canister_mass_kg > 0.0:
+                    d = min(self.canister_mass_kg, rate * dt)
+                    self.canister_mass_kg -= d
+                    self.sump_mass_kg += d
 
-            if self.canister_mass_kg <= 0.0:
-                break
-            if time.monotonic() - last_change_t >= float(stable_time_s):
-                break
+                cur_can = float(self.canister_mass_kg)
+                if abs(cur_can - last_can) > float(stable_eps_kg):
+                    last_change_t = self.clock.monotonic()
+                    last_can = cur_can
 
-        self.ev1_status = False
-        self.ev2_status = False
+                if self.canister_mass_kg <= 0.0:
+                    break
+                if self.clock.monotonic() - last_change_t >= float(stable_time_s):
+                    break
+
+            valve.close()
+        finally:
+            # every way out (timeout, error, cancel) shuts the emptying solenoid
+            if valve.commanded:
+                valve.close()
 
         return {
             "ok": True,
-            "duration_s": round(time.monotonic() - t0, 3),
+            "duration_s": round(self.clock.monotonic() - t0, 3),
             "canister_mass_kg": float(self.canister_mass_kg),
             "sump_mass_kg": float(self.sump_mass_kg),
         }
@@ -168,48 +222,67 @@ class SystemController:
         if tank not in ("TANK1", "TANK2"):
             raise ValueError("tank must be TANK1 or TANK2")
 
-        self.tank = tank
-        self.diverter.set_to(tank)
-
-        self.pumps[0].start()
-        self.pump_current_a = 3.0
-        self.dv_current_a = 0.5
-        self.pump_pressure_bar = 1.6
-
-        t0 = time.monotonic()
-        last_change_t = time.monotonic()
-        last_sump = float(self.sump_mass_kg)
-
-        rate = 2.0  # kg/s (faster sim)
-
-        while True:
-            if time.monotonic() - t0 > float(timeout_s):
-                raise RuntimeError("drain_sump_to_tank timed out")
-
-            dt = 0.05
-            await asyncio.sleep(dt)
-
-            if self.sump_mass_kg > float(sump_empty_kg):
-                d = min(self.sump_mass_kg - float(sump_empty_kg), rate * dt)
-                self.sump_mass_kg -= d
-
-            cur_sump = float(self.sump_mass_kg)
-            if abs(cur_sump - last_sump) > float(stable_eps_kg):
-                last_change_t = time.monotonic()
-                last_sump = cur_sump
-
-            if self.sump_mass_kg <= float(sump_empty_kg):
-                break
-            if time.monotonic() - last_change_t >= float(stable_time_s):
-                break
-
-        self.pumps[0].stop()
-        self.pump_current_a = 0.2
-        self.pump_pressure_bar = 1.0
+        pump = self.pumps[0]
+        mbv = self.mbvs[0]
+        t0 = self.clock.monotonic()
+
+        try:
+            # route and open the return line before the pump runs against it
+            self.tank = tank
+            self.diverter.set_to(tank)
+            await asyncio.gather(self.diverter.wait(), mbv.move_to(100))
+
+            pump.start()
+            self.dv_current_a = 0.5
+
+            last_change_t = self.clock.monotonic()
+            last_sump = float(self.sump_mass_kg)
+
+            rate = 2.0  # kg/s (faster sim)
+
+            while True:
+                # the closing stroke at the end is part of the timeout_s budget
+                if self.clock.monotonic() - t0 > float(timeout_s) - mbv.close_time_s:
+                    raise RuntimeError("drain_sump_to_tank timed out")
+
+                dt = 0.05
+                await asyncio.sleep(dt)
+
+                speed = pump.speed()
+                self.pump_current_a = 0.2 + 2.8 * speed
+                self.pump_pressure_bar = 1.0 + 0.6 * speed
+
+                if self.sump_mass_kg > float(sump_empty_kg):
+                    d = min(self.sump_mass_kg - float(sump_empty_kg), rate * speed * dt)
+                    self.sump_mass_kg -= d
+
+                cur_sump = float(self.sump_mass_kg)
+                if abs(cur_sump - last_sump) > float(stable_eps_kg):
+                    last_change_t = self.clock.monotonic()
+                    last_sump = cur_sump
+
+                if self.sump_mass_kg <= float(sump_empty_kg):
+                    break
+                if self.clock.monotonic() - last_change_t >= float(stable_time_s):
+                    break
+
+            pump.stop()
+            self.pump_current_a = 0.2
+            self.pump_pressure_bar = 1.0
+            # the drain is over once the return line is isolated again
+            await mbv.move_to(0)
+        finally:
+            # every way out (timeout, error, cancel) stops the pump and closes the line
+            if pump.is_running:
+                pump.stop()
+                self.pump_current_a = 0.2
+                self.pump_pressure_bar = 1.0
+            if mbv.target != 0:
+                mbv.command(0)
 
         return {
             "ok": True,
-            "duration_s": round(time.monotonic() - t0, 3),
+            "duration_s": round(self.clock.monotonic() - t0, 3),
             "tank": tank,
             "sump_mass_kg": float(self.sump_mass_kg),
         }
@@ -0,0 +1,311 @@
+import argparse
+import json
+import math
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from io_config import actuator_timing, load_io_config
+from tcd1.config import FailCriteria, TestConfig
+
+ArrayLike = Union[float, np.ndarray]
+
+# rig phases
+DISPENSE, DRAIN_CANISTER, DRAIN_SUMP, REST, DONE, FAILED = range(6)
+
+# FleetResult.fail_reason codes
+FAIL_REASONS = (
+    "",
+    "dispense_timeout",
+    "drain_timeout",
+    "return_timeout",
+    "pressure",
+    "voltage",
+    "pump_current",
+    "dv_current",
+    "unfinished",
+)
+_R = {name: i for i, name in enumerate(FAIL_REASONS)}
+
+# same actuator timing SystemController gets
+_TIMING = actuator_timing(load_io_config())
+
+# clock jitter allowed when deciding an actuator has finished (as components._EPS)
+_EPS = 1e-9
+
+
+@dataclass
+class FleetParams:
+    """
+    Per-rig physics and setpoints. Every field is a scalar (same for all
+    rigs) or an array of length n (parameter sweep / rig-to-rig spread).
+    Defaults are SystemController's; the electrical values are the ones it
+    reports while returning (pump at full speed) and while draining the
+    canister (DV), the actuator times come from io_config.
+    """
+
+    canister_rate_kg_s: ArrayLike = 2.0
+    sump_rate_kg_s: ArrayLike = 2.0
+    dispense_ml_s: ArrayLike = 250.0
+    density_kg_l: ArrayLike = 1.0
+    stable_eps_kg: ArrayLike = 0.01
+    stable_time_s: ArrayLike = 2.0
+    sump_empty_kg: ArrayLike = 0.05
+    bus_voltage_v: ArrayLike = 24.0
+    pump_current_a: ArrayLike = 3.0
+    pump_pressure_bar: ArrayLike = 1.6
+    dv_current_a: ArrayLike = 0.6
+    ev_response_s: ArrayLike = _TIMING["solenoid_response_s"]
+    mbv_open_s: ArrayLike = _TIMING["mbv_open_s"]
+    mbv_close_s: ArrayLike = _TIMING["mbv_close_s"]
+    pump_spin_up_s: ArrayLike = _TIMING["pump_spin_up_s"]
+
+    def jitter(self, n: int, rel: float = 0.05, seed: Optional[int] = None) -> "FleetParams":
+        """
+        Copy with every rate and electrical value scaled per rig by a
+        normal factor (1 +- rel), for rig-to-rig spread.
+        """
+        rng = np.random.default_rng(seed)
+        fixed = ("density_kg_l", "stable_eps_kg", "stable_time_s", "sump_empty_kg")
+        out = {}
+        for f in fields(self):
+            v = np.broadcast_to(np.asarray(getattr(self, f.name), dtype=float), (n,))
+            if f.name not in fixed:
+                v = v * rng.normal(1.0, rel, n).clip(0.0)
+            out[f.name] = v
+        return FleetParams(**out)
+
+
+@dataclass
+class FleetResult:
+    n: int
+    cycles_per_campaign: int
+    state: np.ndarray        # DONE / FAILED / other (unfinished at max_s)
+    fail_reason: np.ndarray  # index into FAIL_REASONS
+    campaign_s: np.ndarray   # completion time, nan unless DONE
+    cycles_done: np.ndarray
+    cycle_s: np.ndarray      # duration of every completed cycle, all rigs
+    tank_kg: np.ndarray
+    sim_s: float
+
+    def summary(self) -> Dict[str, Any]:
+        done = self.state == DONE
+        reasons, counts = np.unique(self.fail_reason[self.fail_reason > 0], return_counts=True)
+        return {
+            "rigs": self.n,
+            "cycles_per_campaign": self.cycles_per_campaign,
+            "done": int(done.sum()),
+            "failed": {FAIL_REASONS[r]: int(c) for r, c in zip(reasons, counts)},
+            "cycle_s": _percentiles(self.cycle_s),
+            "campaign_h": _percentiles(self.campaign_s[done] / 3600.0),
+            "sim_h": round(self.sim_s / 3600.0, 2),
+        }
+
+
+def _percentiles(a: np.ndarray) -> Dict[str, float]:
+    if not a.size:
+        return {}
+    p = np.percentile(a, [5, 50, 95])
+    return {"p5": round(float(p[0]), 3), "p50": round(float(p[1]), 3), "p95": round(float(p[2]), 3), "max": round(float(a.max()), 3)}
+
+
+class FleetSim:
+    """
+    N rigs running a TestConfig campaign at once, SystemController's drain
+    model as arrays: each step advances every rig by dt (SystemController's
+    50 ms), with the same order of timeout check, transfer and stable-time
+    detection, so a single rig here matches the scalar sim step for step.
+
+    A cycle is dispense (volume_per_dispense_ml into the canister), drain
+    canister -> sump (flowing once the emptying solenoid has opened), return
+    sump -> tank (after the return MBV has opened, with the pump ramping up,
+    and until the MBV has closed again), then rest_time_s. A drain ends
+    when the source is empty or its mass has not moved more than
+    stable_eps_kg for stable_time_s; a phase over its TestConfig timeout
+    or a FailCriteria limit fails the rig, as bringup's checks would.
+    """
+
+    def __init__(
+        self,
+        cfg: TestConfig,
+        crit: FailCriteria,
+        n: int,
+        params: Optional[FleetParams] = None,
+        dt: float = 0.05,
+    ):
+        self.cfg = cfg
+        self.crit = crit
+        self.n = int(n)
+        self.dt = float(dt)
+        p = params if params is not None else FleetParams()
+        self.p = {f.name: np.broadcast_to(np.asarray(getattr(p, f.name), dtype=float), (self.n,)) for f in fields(p)}
+
+        self.cycles_total = max(1, math.ceil(1000.0 * cfg.total_volume_to_pump_l / cfg.volume_per_dispense_ml))
+        self.dose_kg = cfg.volume_per_dispense_ml / 1000.0 * self.p["density_kg_l"]
+
+        self.t = 0.0
+        self.phase = np.full(self.n, DISPENSE, dtype=np.int8)
+        self.fail_reason = np.zeros(self.n, dtype=np.int8)
+        self.canister = np.zeros(self.n)
+        self.sump = np.zeros(self.n)
+        self.tank = np.zeros(self.n)
+        self.dose_left = self.dose_kg.copy()
+        self.t_phase = np.zeros(self.n)
+        self.t_flow = np.zeros(self.n)  # when the drain loop of the phase starts, after its actuators
+        self.t_cycle = np.zeros(self.n)
+        self.last_change = np.zeros(self.n)
+        self.last_mass = np.zeros(self.n)
+        self.cycles_done = np.zeros(self.n, dtype=np.int64)
+        self.campaign_s = np.full(self.n, np.nan)
+        self._cycle_s: list = []
+
+        self._limit_fail = self._check_limits()
+
+    def _check_limits(self) -> Dict[int, np.ndarray]:
+        """Per-phase FailCriteria violation (reason code, 0 = ok) of every rig."""
+        c, p = self.crit, self.p
+        volt = np.where((p["bus_voltage_v"] < c.voltage_min_v) | (p["bus_voltage_v"] > c.voltage_max_v), _R["voltage"], 0)
+        dv = np.where(p["dv_current_a"] > c.dv_current_max_a, _R["dv_current"], 0)
+        pump = np.where(p["pump_current_a"] > c.pump_current_max_a, _R["pump_current"], 0)
+        press = np.where(
+            (p["pump_pressure_bar"] < c.pressure_min_bar) | (p["pump_pressure_bar"] > c.pressure_max_bar), _R["pressure"], 0
+        )
+        # first violated limit wins, in check_limits' order
+        canister = np.where(volt > 0, volt, dv)
+        sump = np.where(press > 0, press, np.where(volt > 0, volt, pump))
+        return {DRAIN_CANISTER: canister.astype(np.int8), DRAIN_SUMP: sump.astype(np.int8)}
+
+    def _enter(self, mask: np.ndarray, phase: int, mass: Optional[np.ndarray] = None, delay: ArrayLike = 0.0) -> None:
+        self.phase[mask] = phase
+        self.t_phase[mask] = self.t
+        self.t_flow[mask] = (self.t + np.broadcast_to(delay, (self.n,)))[mask]
+        self.last_change[mask] = self.t_flow[mask]
+        if mass is not None:
+            self.last_mass[mask] = mass[mask]
+        if phase in self._limit_fail:
+            self._fail(mask & (self._limit_fail[phase] > 0), self._limit_fail[phase])
+
+    def _fail(self, mask: np.ndarray, reason: Union[int, np.ndarray]) -> None:
+        if not mask.any():
+            return
+        self.phase[mask] = FAILED
+        self.fail_reason[mask] = reason[mask] if isinstance(reason, np.ndarray) else reason
+
+    def _drain(self, m: np.ndarray, src: np.ndarray, dst: Optional[np.ndarray], rate: np.ndarray, floor: ArrayLike, timeout_s: ArrayLike, reason: str) -> np.ndarray:
+        """
+        One SystemController drain loop step for rigs in m whose loop has
+        started (actuators ready); rate is the effective kg/s this step.
+        Returns the rigs that finished.
+        """
+        m = m & (self.t > self.t_flow + _EPS)
+        self._fail(m & (self.t - self.dt - self.t_phase > timeout_s), _R[reason])
+        m = m & (self.phase != FAILED)
+
+        d = np.where(m & (src > floor), np.minimum(src - floor, rate * self.dt), 0.0)
+        src -= d
+        if dst is not None:
+            dst += d
+
+        moved = m & (np.abs(src - self.last_mass) > self.p["stable_eps_kg"])
+        self.last_change[moved] = self.t
+        self.last_mass[moved] = src[moved]
+        return m & ((src <= floor) | (self.t - self.last_change >= self.p["stable_time_s"]))
+
+    def step(self) -> None:
+        self.t += self.dt
+        # phase at the start of the step: a rig that finishes one phase starts the next on the following step
+        phase = self.phase.copy()
+        cfg = self.cfg
+
+        m = phase == DISPENSE
+        if m.any():
+            self._fail(m & (self.t - self.dt - self.t_phase > cfg.dispense_timeout_s), _R["dispense_timeout"])
+            m &= self.phase != FAILED
+            add = np.where(m, np.minimum(self.dose_left, self.p["dispense_ml_s"] / 1000.0 * self.p["density_kg_l"] * self.dt), 0.0)
+            self.canister += add
+            self.dose_left -= add
+            self._enter(m & (self.dose_left <= 1e-12), DRAIN_CANISTER, self.canister)
+
+        m = phase == DRAIN_CANISTER
+        if m.any():
+            is_open = self.t - self.t_phase >= self.p["ev_response_s"] - _EPS
+            rate = np.where(is_open, self.p["canister_rate_kg_s"], 0.0)
+            fin = self._drain(m, self.canister, self.sump, rate, 0.0, cfg.drain_timeout_s, "drain_timeout")
+            self._enter(fin, DRAIN_SUMP, self.sump, delay=self.p["mbv_open_s"])
+
+        m = phase == DRAIN_SUMP
+        if m.any():
+            spin = self.p["pump_spin_up_s"]
+            speed = np.where(spin > 0, np.clip((self.t - self.t_flow) / np.where(spin > 0, spin, 1.0), 0.0, 1.0), 1.0)
+            rate = self.p["sump_rate_kg_s"] * speed
+            # the MBV close at the end counts against return_timeout_s, as in SystemController
+            fin = self._drain(m, self.sump, self.tank, rate, self.p["sump_empty_kg"], cfg.return_timeout_s - self.p["mbv_close_s"], "return_timeout")
+            # REST starts with the return MBV closing
+            self._enter(fin, REST)
+
+        # the step the return MBV is closed again, when rest_time_s == 0
+        m = (self.phase == REST) & (self.t - self.t_phase >= cfg.rest_time_s + self.p["mbv_close_s"] - _EPS)
+        if m.any():
+            self._cycle_s.append(self.t - self.t_cycle[m])
+            self.cycles_done[m] += 1
+            self.t_cycle[m] = self.t
+            done = m & (self.cycles_done >= self.cycles_total)
+            self.phase[done] = DONE
+            self.campaign_s[done] = self.t
+            nxt = m & ~done
+            self.dose_left[nxt] = self.dose_kg[nxt]
+            self._enter(nxt, DISPENSE)
+
+    def run(self, max_s: float = 7 * 24 * 3600.0) -> FleetResult:
+        """Step until every rig is DONE or FAILED, or max_s of sim time."""
+        while self.t < max_s:
+            active = (self.phase != DONE) & (self.phase != FAILED)
+            if not active.any():
+                break
+            self.step()
+        else:
+            self._fail((self.phase != DONE) & (self.phase != FAILED), _R["unfinished"])
+
+        return FleetResult(
+            n=self.n,
+            cycles_per_campaign=self.cycles_total,
+            state=self.phase.copy(),
+            fail_reason=self.fail_reason.copy(),
+            campaign_s=self.campaign_s.copy(),
+            cycles_done=self.cycles_done.copy(),
+            cycle_s=np.concatenate(self._cycle_s) if self._cycle_s else np.zeros(0),
+            tank_kg=self.tank.copy(),
+            sim_s=self.t,
+        )
+
+
+def main() -> None:
+    from bringup import default_cfg, default_fail
+
+    ap = argparse.ArgumentParser(description="Campaign duration distribution over a fleet of simulated rigs")
+    ap.add_argument("--rigs", type=int, default=1000)
+    ap.add_argument("--litres", type=float, default=None, help="Campaign volume (default: bringup's TestConfig)")
+    ap.add_argument("--dose-ml", type=float, default=None, help="Volume per dispense (default: bringup's TestConfig)")
+    ap.add_argument("--rest-s", type=float, default=0.0)
+    ap.add_argument("--jitter", type=float, default=0.05, help="Rig-to-rig spread of rates and electrical values (relative sd)")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--max-h", type=float, default=168.0, help="Give up on rigs not done after this much sim time")
+    args = ap.parse_args()
+
+    base = default_cfg()
+    cfg = TestConfig(
+        base.total_volume_to_pump_l if args.litres is None else args.litres,
+        base.volume_per_dispense_ml if args.dose_ml is None else args.dose_ml,
+        drain_timeout_s=base.drain_timeout_s,
+        return_timeout_s=base.return_timeout_s,
+        dispense_timeout_s=base.dispense_timeout_s,
+        rest_time_s=args.rest_s,
+    )
+    params = FleetParams().jitter(args.rigs, args.jitter, args.seed) if args.jitter > 0 else None
+    res = FleetSim(cfg, default_fail(), args.rigs, params).run(max_s=3600.0 * args.max_h)
+    print(json.dumps(res.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+from typing import Any, Dict, Optional, Tuple
+
+# the rig's hardware description, shared with rig-ui
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rig-ui", "src", "config", "io_config.yaml")
+
+# actuator timing the YAML does not give (or when it is not there)
+DEFAULT_TIMING = {
+    "mbv_open_s": 3.0,
+    "mbv_close_s": 3.0,
+    "solenoid_response_s": 0.05,
+    "diverter_switch_s": 1.0,
+    "pump_spin_up_s": 0.5,
+}
+
+
+def load_io_config(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    io_config.yaml as a dict; {} when the file (or PyYAML) is not there, so
+    the sim still runs from a bare simulation_local checkout.
+    """
+    path = path or os.environ.get("TCD1_IO_CONFIG") or DEFAULT_PATH
+    if not os.path.isfile(path):
+        return {}
+    try:
+        import yaml
+    except ImportError:
+        return {}
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+def _first(section: Dict[str, Any], type_: str) -> Dict[str, Any]:
+    for spec in section.values():
+        if isinstance(spec, dict) and spec.get("type") == type_:
+            return spec
+    return {}
+
+
+def actuator_timing(cfg: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Transition times (s) of the simulated actuators: the motorized ball
+    valve's open_time_s / close_time_s from io_config, the rest from
+    DEFAULT_TIMING (the YAML has no timing for them).
+    """
+    out = dict(DEFAULT_TIMING)
+    mbv = _first(cfg.get("actuators") or {}, "motorized_valve")
+    if "open_time_s" in mbv:
+        out["mbv_open_s"] = float(mbv["open_time_s"])
+    if "close_time_s" in mbv:
+        out["mbv_close_s"] = float(mbv["close_time_s"])
+    return out
+
+
+def _spec(cfg: Dict[str, Any], path: str) -> Dict[str, Any]:
+    """sensors entry by "name" or "name.sub" (e.g. pressure_sensor_2.pressure)."""
+    node: Any = cfg.get("sensors") or {}
+    for part in path.split("."):
+        node = node.get(part) if isinstance(node, dict) else None
+    return node if isinstance(node, dict) else {}
+
+
+def accuracy_sigma(cfg: Dict[str, Any], path: str, scale: float = 1.0, span: Optional[float] = None) -> Optional[float]:
+    """
+    1-sigma noise of a sensor in the sim's units (sensor unit * scale),
+    reading its accuracy spec as a 3-sigma bound: accuracy_percent is of
+    full scale (max - min), or of span (sim units) when given, for a
+    sensor whose full scale dwarfs the range the rig uses;
+    accuracy_degC / accuracy_mm are absolute. None when io_config has no
+    accuracy for it.
+    """
+    spec = _spec(cfg, path)
+    if "accuracy_percent" in spec and span is not None:
+        return float(spec["accuracy_percent"]) / 100.0 * float(span) / 3.0
+    if "accuracy_percent" in spec and "max" in spec:
+        span = float(spec["max"]) - float(spec.get("min", 0.0))
+        bound = float(spec["accuracy_percent"]) / 100.0 * span
+    elif "accuracy_degC" in spec:
+        bound = float(spec["accuracy_degC"])
+    elif "accuracy_mm" in spec:
+        bound = float(spec["accuracy_mm"])
+    else:
+        return None
+    return bound * float(scale) / 3.0
+
+
+def noise_sigmas(cfg: Dict[str, Any], sources: Dict[str, Tuple]) -> Dict[str, float]:
+    """
+    {sim key: sigma} for sources {sim key: (io_config sensor, unit scale,
+    sigma when io_config has no accuracy for it[, operating span])}.
+    """
+    out = {}
+    for key, (path, scale, fallback, *span) in sources.items():
+        sigma = accuracy_sigma(cfg, path, scale, span[0] if span else None)
+        out[key] = fallback if sigma is None else sigma
+    return out
@@ -0,0 +1,45 @@
+from typing import Any, Dict, Optional
+
+# always part of a sensors_delta frame
+ALWAYS = ("ts",)
+
+
+class DeltaEncoder:
+    """
+    Keyframe/delta encoding of the sensor stream: a full "sensors" frame
+    every keyframe_every frames, otherwise "sensors_delta" carrying only the
+    fields that moved more than their deadband since they were last sent.
+    """
+
+    def __init__(self) -> None:
+        self.configure(0, None)
+
+    def configure(self, keyframe_every: int, deadbands: Optional[Dict[str, float]]) -> None:
+        # keyframe_every <= 0 disables deltas (every frame is a full frame)
+        self.keyframe_every = int(keyframe_every)
+        self.deadbands = deadbands or {}
+        self.sent: Dict[str, Any] = {}
+        self.n = 0
+
+    def encode(self, d: Dict[str, Any]) -> Dict[str, Any]:
+        if self.keyframe_every <= 0:
+            return {"type": "sensors", "data": d}
+
+        if self.n % self.keyframe_every == 0 or not self.sent:
+            self.n = 1
+            self.sent = dict(d)
+            return {"type": "sensors", "data": d}
+
+        self.n += 1
+        changed: Dict[str, Any] = {}
+        for k, v in d.items():
+            old = self.sent.get(k)
+            if k in ALWAYS or old is None:
+                changed[k] = v
+            elif isinstance(v, float):
+                if abs(v - old) > self.deadbands.get(k, 0.0):
+                    changed[k] = v
+            elif v != old:
+                changed[k] = v
+        self.sent.update(changed)
+        return {"type": "sensors_delta", "data": changed}
@@ -0,0 +1,77 @@
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from tcd1 import clock
+
+
+class JobCancelled(RuntimeError):
+    pass
+
+
+@dataclass
+class Job:
+    id: int
+    name: str
+    cid: Any
+    task: asyncio.Task
+    started: float = field(default_factory=clock.monotonic)
+    cancelled_by: Optional[str] = None
+
+    def info(self) -> Dict[str, Any]:
+        return {"job": self.id, "name": self.name, "id": self.cid, "running_s": round(clock.monotonic() - self.started, 3)}
+
+
+class JobTable:
+    """
+    Long-running commands of the controller. One job at a time (the rig
+    has one set of valves); a second one is refused as busy, like on the
+    Pico. cancel() stops a job at its next await and the caller waiting on
+    run() gets JobCancelled instead of a result. A caller that is itself
+    cancelled takes its job down with it, so no drain runs on unseen.
+    A job stays listed until its task has finished, cleanup included.
+    """
+
+    def __init__(self):
+        self.running: Dict[int, Job] = {}
+        self._next_id = 1
+
+    def check_free(self) -> None:
+        for job in self.running.values():
+            raise RuntimeError(f"busy: job {job.id} ({job.name}) already running")
+
+    async def run(
+        self,
+        name: str,
+        cid: Any,
+        factory: Callable[[], Awaitable[Dict[str, Any]]],
+        on_accept: Optional[Callable[[Job], None]] = None,
+    ) -> Dict[str, Any]:
+        self.check_free()
+        job = Job(self._next_id, name, cid, asyncio.ensure_future(factory()))
+        self._next_id += 1
+        self.running[job.id] = job
+        job.task.add_done_callback(lambda _: self.running.pop(job.id, None))
+        if on_accept is not None:
+            on_accept(job)
+        try:
+            return await job.task
+        except asyncio.CancelledError:
+            if job.cancelled_by is None:
+                # we are being cancelled, not the job: stop it too
+                job.cancelled_by = "caller"
+                job.task.cancel()
+                raise
+            raise JobCancelled(f"{name} cancelled by {job.cancelled_by}") from None
+
+    async def cancel(self, job_id: Optional[int] = None, reason: str = "cancel_job") -> List[int]:
+        """Cancel one job (all when job_id is None); returns the ids cancelled."""
+        jobs = [j for j in self.running.values() if job_id is None or j.id == job_id]
+        for j in jobs:
+            j.cancelled_by = reason
+            j.task.cancel()
+        await asyncio.gather(*(j.task for j in jobs), return_exceptions=True)
+        return [j.id for j in jobs]
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [j.info() for j in self.running.values()]
@@ -1,11 +1,18 @@
-﻿import asyncio
+﻿import argparse
+import asyncio
 import json
+import signal
 import sys
-import time
 import traceback
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 
 from controls import SystemController
+from kp_controller_sim.delta import DeltaEncoder
+from kp_controller_sim.jobs import Job, JobTable
+from kp_controller_sim.shm_ring import ShmRingWriter, layout
+
+# samples emitted per wakeup at most; above that the stream skips ahead
+MAX_CATCHUP = 1000
 
 
 def _writeline(obj: Dict[str, Any]) -> None:
@@ -13,18 +20,50 @@ def _writeline(obj: Dict[str, Any]) -> None:
     sys.stdout.flush()
 
 
+def _writelines(objs: List[Dict[str, Any]]) -> None:
+    sys.stdout.write("".join(json.dumps(o) + "\n" for o in objs))
+    sys.stdout.flush()
+
+
 async def _read_stdin_line() -> str:
     loop = asyncio.get_running_loop()
     return await loop.run_in_executor(None, sys.stdin.readline)
 
 
-async def sensor_stream_task(ctrl: SystemController) -> None:
+async def sensor_stream_task(disp: "CommandDispatcher") -> None:
+    """
+    Emits every sample that is due since the last wakeup, so rates above
+    what asyncio.sleep() can resolve (~1 kHz) still come out at the
+    requested rate, in one write per wakeup.
+    """
+    ctrl = disp.ctrl
+    next_t = ctrl.clock.monotonic()
+    tick = 0
     while True:
         try:
             hz = ctrl.stream_hz if ctrl.stream_enabled else 2.0
             period = 1.0 / max(0.2, float(hz))
-            _writeline({"type": "sensors", "data": ctrl.sensors()})
-            await asyncio.sleep(period)
+            now = ctrl.clock.monotonic()
+            n = min(MAX_CATCHUP, int((now - next_t) / period) + 1) if now >= next_t else 0
+
+            if n:
+                # sim_tick counts stream samples, so the host can tell gaps from jitter
+                samples = []
+                for _ in range(n):
+                    tick += 1
+                    d = ctrl.sensors()
+                    d["sim_tick"] = tick
+                    samples.append(d)
+                if disp.shm_on and disp.shm is not None:
+                    for d in samples:
+                        disp.shm.write(d)
+                else:
+                    _writelines([disp.delta.encode(d) for d in samples])
+                next_t += n * period
+                if next_t < now:
+                    next_t = now + period  # too far behind: skip, don't burst
+
+            await asyncio.sleep(max(0.0, next_t - ctrl.clock.monotonic()))
         except Exception:
             sys.stderr.write("[kp_controller_sim] sensor_stream_task crashed:\n")
             sys.stderr.write(traceback.format_exc() + "\n")
@@ -32,53 +71,161 @@ async def sensor_stream_task(ctrl: SystemController) -> None:
             await asyncio.sleep(0.5)
 
 
-async def handle_cmd(ctrl: SystemController, msg: Dict[str, Any]) -> Dict[str, Any]:
-    name = msg.get("name")
-    args = msg.get("args") or {}
-    cid = msg.get("id")
+class CommandDispatcher:
+    """
+    Command handling for one SystemController, with the state that belongs
+    to it: the job table, the keyframe/delta encoder and the shm ring.
+    kp_controller_sim makes one; InProcessControllerLink one per link, with
+    wire=False: its samples never go over a wire, so start_stream ignores
+    keyframe_s/deadband and refuses transport="shm".
+    """
 
-    try:
-        if name == "heartbeat":
-            res = await ctrl.heartbeat()
+    def __init__(self, ctrl: SystemController, wire: bool = True):
+        self.ctrl = ctrl
+        self.wire = wire
+        # keyframe/delta encoding of the sensor stream, configured by start_stream
+        self.delta = DeltaEncoder()
+        # shared-memory sensor ring; while on, samples go there instead of stdout
+        self.shm: Optional[ShmRingWriter] = None
+        self.shm_on = False
+        # drains run as jobs so the command loop keeps serving everything else
+        self.jobs = JobTable()
+
+    def close(self) -> None:
+        if self.shm is not None:
+            self.shm.close()
+            self.shm = None
+        self.shm_on = False
+
+    def _set_transport(self, transport: str, slots: int) -> Dict[str, Any]:
+        if transport != "shm":
+            self.shm_on = False
+            return {"transport": "pipe"}
+        if self.shm is None or self.shm.slots != slots:
+            if self.shm is not None:
+                self.shm.close()
+            self.shm = ShmRingWriter(layout({**self.ctrl.sensors(), "sim_tick": 0}), slots)
+        self.shm_on = True
+        return {"transport": "shm", "shm": self.shm.describe()}
 
-        elif name == "start_stream":
+    async def _start_stream(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        ctrl = self.ctrl
+        transport = str(args.get("transport", "pipe"))
+        if not self.wire:
+            if transport != "pipe":
+                raise RuntimeError(f"transport {transport!r} not available in-process")
             res = await ctrl.start_stream(float(args.get("hz", 10.0)))
+            res["keyframe_every"] = 0
+            return res
 
-        elif name == "stop_stream":
-            res = await ctrl.stop_stream()
+        res = await ctrl.start_stream(float(args.get("hz", 10.0)))
+        # keyframe_s > 0: full frame every keyframe_s, deltas in between
+        keyframe_s = float(args.get("keyframe_s", 0.0))
+        every = max(1, int(round(keyframe_s * ctrl.stream_hz))) if keyframe_s > 0 else 0
+        deadband = args.get("deadband") or {}
+        if not isinstance(deadband, dict):
+            deadband = {}
+        self.delta.configure(every, {str(k): float(v) for k, v in deadband.items()})
+        res["keyframe_every"] = every
+        # transport "shm": samples go to a shared-memory ring instead of stdout
+        res.update(self._set_transport(transport, int(args.get("slots", 4096))))
+        return res
 
-        elif name == "snapshot":
-            res = await ctrl.snapshot()
+    async def handle_cmd(
+        self,
+        msg: Dict[str, Any],
+        on_accept: Optional[Callable[[Job], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run one command and build its cmd_result. Drains go through the job
+        table: on_accept(job) is called as soon as one is registered, the
+        result comes back when it finishes (or is cancelled).
+        """
+        ctrl = self.ctrl
+        jobs = self.jobs
+        name = msg.get("name")
+        args = msg.get("args") or {}
+        cid = msg.get("id")
+
+        try:
+            if name == "heartbeat":
+                res = await ctrl.heartbeat()
 
-        elif name == "safe_stop":
-            res = await ctrl.safe_stop()
+            elif name == "start_stream":
+                res = await self._start_stream(args)
 
-        elif name == "drain_canister_to_sump":
-            res = await ctrl.drain_canister_to_sump(
-                ev=str(args.get("ev", "ev1")),
-                timeout_s=float(args.get("timeout_s", 60.0)),
-                stable_eps_kg=float(args.get("stable_eps_kg", 0.01)),
-                stable_time_s=float(args.get("stable_time_s", 2.0)),
-            )
+            elif name == "stop_stream":
+                res = await ctrl.stop_stream()
 
-        elif name == "drain_sump_to_tank":
-            res = await ctrl.drain_sump_to_tank(
-                tank=str(args.get("tank", "TANK2")),
-                timeout_s=float(args.get("timeout_s", 120.0)),
-                sump_empty_kg=float(args.get("sump_empty_kg", 0.05)),
-                stable_eps_kg=float(args.get("stable_eps_kg", 0.01)),
-                stable_time_s=float(args.get("stable_time_s", 2.0)),
-            )
-        else:
-            raise RuntimeError(f"Unknown command: {name!r}")
+            elif name == "snapshot":
+                res = await ctrl.snapshot()
 
-        return {"type": "cmd_result", "id": cid, "ok": True, "result": res}
+            elif name == "safe_stop":
+                # preempts a running drain
+                cancelled = await jobs.cancel(reason="safe_stop")
+                res = await ctrl.safe_stop()
+                res["cancelled_jobs"] = cancelled
 
-    except Exception as e:
-        return {"type": "cmd_result", "id": cid, "ok": False, "error": str(e), "result": {}}
+            elif name == "cancel_job":
+                job = args.get("job")
+                cancelled = await jobs.cancel(None if job is None else int(job))
+                # a drain stopped halfway leaves valves/pump as they were
+                res = await ctrl.safe_stop() if cancelled else {"ok": True}
+                res["cancelled_jobs"] = cancelled
 
+            elif name == "jobs":
+                res = {"ok": True, "jobs": jobs.list()}
 
-async def cmd_loop(ctrl: SystemController) -> None:
+            elif name == "drain_canister_to_sump":
+                res = await jobs.run(
+                    name,
+                    cid,
+                    lambda: ctrl.drain_canister_to_sump(
+                        ev=str(args.get("ev", "ev1")),
+                        timeout_s=float(args.get("timeout_s", 60.0)),
+                        stable_eps_kg=float(args.get("stable_eps_kg", 0.01)),
+                        stable_time_s=float(args.get("stable_time_s", 2.0)),
+                    ),
+                    on_accept,
+                )
+
+            elif name == "drain_sump_to_tank":
+                res = await jobs.run(
+                    name,
+                    cid,
+                    lambda: ctrl.drain_sump_to_tank(
+                        tank=str(args.get("tank", "TANK2")),
+                        timeout_s=float(args.get("timeout_s", 120.0)),
+                        sump_empty_kg=float(args.get("sump_empty_kg", 0.05)),
+                        stable_eps_kg=float(args.get("stable_eps_kg", 0.01)),
+                        stable_time_s=float(args.get("stable_time_s", 2.0)),
+                    ),
+                    on_accept,
+                )
+            else:
+                raise RuntimeError(f"Unknown command: {name!r}")
+
+            return {"type": "cmd_result", "id": cid, "ok": True, "result": res}
+
+        except Exception as e:
+            return {"type": "cmd_result", "id": cid, "ok": False, "error": str(e), "result": {}}
+
+
+def _accepted(job: Job) -> None:
+    _writeline({"type": "cmd_accepted", "id": job.cid, "job": job.id, "name": job.name})
+
+
+async def _serve(disp: CommandDispatcher, msg: Dict[str, Any]) -> None:
+    _writeline(await disp.handle_cmd(msg, _accepted))
+
+
+async def cmd_loop(disp: CommandDispatcher) -> None:
+    """
+    Every command runs in its own task, so a drain never holds up
+    heartbeats, snapshots or the safe_stop that cancels it. Replies go out
+    as cmd_result whenever each one finishes.
+    """
+    tasks: set = set()
     while True:
         line = await _read_stdin_line()
 
@@ -99,21 +246,30 @@ async def cmd_loop(ctrl: SystemController) -> None:
         if msg.get("type") != "cmd":
             continue
 
-        reply = await handle_cmd(ctrl, msg)
-        _writeline(reply)
+        task = asyncio.create_task(_serve(disp, msg))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
 
 
-async def main() -> None:
+async def main(seed: Optional[int] = None) -> None:
     sys.stderr.write("[kp_controller_sim] starting\n")
     sys.stderr.flush()
 
-    ctrl = SystemController()
-    _writeline({"type": "hello", "ts": time.time(), "name": "kp_controller_sim", "version": "1.0"})
+    ctrl = SystemController(seed=seed)
+    _writeline({"type": "hello", "ts": ctrl.clock.time(), "name": "kp_controller_sim", "version": "1.0", "seed": ctrl.noise.seed})
 
-    s_task = asyncio.create_task(sensor_stream_task(ctrl))
-    c_task = asyncio.create_task(cmd_loop(ctrl))
-    await asyncio.gather(s_task, c_task)
+    disp = CommandDispatcher(ctrl)
+    s_task = asyncio.create_task(sensor_stream_task(disp))
+    c_task = asyncio.create_task(cmd_loop(disp))
+    try:
+        await asyncio.gather(s_task, c_task)
+    finally:
+        disp.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # SIGTERM from SubprocessControllerLink.aclose(): unwind so the shm ring is unlinked
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--seed", type=int, default=None, help="Sensor noise seed (same seed, same readings); default: random")
+    asyncio.run(main(ap.parse_args().seed))
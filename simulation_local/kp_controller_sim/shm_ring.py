@@ -0,0 +1,70 @@
+import struct
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+# Shared-memory sensor ring, written by the sim, read by tcd1/shm_ring.py.
+#
+#   header  magic u32, version u16, nfields u16, slots u32, rec_size u32,
+#           write_seq u64 (seq of the newest complete record)
+#   record  seq u64, then one f64 per field (ints and bools stored as f64)
+#
+# Record seq n lives in slot n % slots. The writer zeroes a slot's seq
+# before rewriting it and stores the new seq last, so a reader that finds
+# the seq it expected after reading the values has a consistent record.
+MAGIC = 0x31444354  # "TCD1"
+VERSION = 1
+HEADER = struct.Struct("<IHHIIQ")
+WRITE_SEQ_OFF = 16
+SEQ = struct.Struct("<Q")
+
+
+def layout(sample: Dict[str, Any]) -> List[List[str]]:
+    """[name, "f" | "i" | "b"] for every numeric field of a sensors() dict."""
+    fields = []
+    for k, v in sample.items():
+        if isinstance(v, bool):
+            fields.append([k, "b"])
+        elif isinstance(v, int):
+            fields.append([k, "i"])
+        elif isinstance(v, float):
+            fields.append([k, "f"])
+    return fields
+
+
+class ShmRingWriter:
+    def __init__(self, fields: List[List[str]], slots: int = 4096, name: Optional[str] = None):
+        self.fields = fields
+        self.names = [f[0] for f in fields]
+        self.slots = max(2, int(slots))
+        self.values = struct.Struct("<" + "d" * len(fields))
+        self.rec_size = SEQ.size + self.values.size
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER.size + self.slots * self.rec_size)
+        self.buf = self.shm.buf
+        HEADER.pack_into(self.buf, 0, MAGIC, VERSION, len(fields), self.slots, self.rec_size, 0)
+        self.seq = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def describe(self) -> Dict[str, Any]:
+        # sent to the host in the start_stream reply
+        return {"name": self.shm.name, "fields": self.fields, "slots": self.slots, "version": VERSION}
+
+    def write(self, sample: Dict[str, Any]) -> None:
+        seq = self.seq + 1
+        off = HEADER.size + (seq % self.slots) * self.rec_size
+        buf = self.buf
+        SEQ.pack_into(buf, off, 0)
+        self.values.pack_into(buf, off + SEQ.size, *(float(sample.get(k) or 0.0) for k in self.names))
+        SEQ.pack_into(buf, off, seq)
+        SEQ.pack_into(buf, WRITE_SEQ_OFF, seq)
+        self.seq = seq
+
+    def close(self) -> None:
+        self.buf = None
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except (OSError, BufferError):
+            pass
@@ -0,0 +1,62 @@
+import zlib
+from typing import Dict, Optional
+
+import numpy as np
+
+# samples generated per refill of a sensor's stream
+BLOCK = 4096
+
+
+class NoiseStream:
+    """
+    Gaussian noise for one sensor, sigma in the sensor's units, clipped to
+    +-3 sigma (the accuracy bound it came from). Generated BLOCK samples at
+    a time; a read is a list index.
+    """
+
+    __slots__ = ("sigma", "_rng", "_block", "_buf", "_i")
+
+    def __init__(self, rng: np.random.Generator, sigma: float, block: int = BLOCK):
+        self.sigma = float(sigma)
+        self._rng = rng
+        self._block = int(block)
+        self._buf: list = []
+        self._i = self._block
+
+    def _refill(self) -> None:
+        s = self.sigma
+        self._buf = np.clip(self._rng.standard_normal(self._block) * s, -3.0 * s, 3.0 * s).tolist()
+        self._i = 0
+
+    def __call__(self) -> float:
+        if self._i >= self._block:
+            self._refill()
+        v = self._buf[self._i]
+        self._i += 1
+        return v
+
+
+class SensorNoise:
+    """
+    Seeded noise for a set of sensors. Every sensor has its own stream,
+    keyed by (seed, sensor name), so the n-th reading of a sensor is the
+    same in every run with the same seed, whatever else is read or in
+    which order. seed=None draws a fresh one; self.seed is what to pass
+    to reproduce the run.
+    """
+
+    def __init__(self, sigmas: Dict[str, float], seed: Optional[int] = None, block: int = BLOCK):
+        root = np.random.SeedSequence(seed)
+        self.seed = int(root.entropy)
+        self.sigmas = dict(sigmas)
+        self._streams = {}
+        for key, sigma in self.sigmas.items():
+            ss = np.random.SeedSequence(root.entropy, spawn_key=(zlib.crc32(key.encode()),))
+            self._streams[key] = NoiseStream(np.random.default_rng(ss), sigma, block)
+
+    def stream(self, key: str) -> NoiseStream:
+        return self._streams[key]
+
+    def __call__(self, key: str) -> float:
+        s = self._streams.get(key)
+        return s() if s is not None and s.sigma > 0.0 else 0.0
@@ -7,24 +7,28 @@ import asyncio
 import csv
 import json
 import threading
-import time
 from typing import Any, Dict, Optional
 
 from tcd1.actions.heartbeat import heartbeat
 from tcd1.actions.data_collect import start_stream, stop_stream, snapshot
 from tcd1.actions.drain_canister import drain_canister_to_sump
 from tcd1.actions.drain_sump import drain_sump_to_tank
-from tcd1.safety import safe_stop
+from tcd1 import clock
+from tcd1.config import FailCriteria
+from tcd1.liveness import LivenessManager
+from tcd1.safety import check_limits, check_link_health, check_stream, safe_stop
+from bringup import default_fail
 
 
 def now_ts() -> float:
-    return time.time()
+    return clock.wall()
 
 
-def heartbeat_row(latest: Dict[str, Any]) -> Dict[str, Any]:
+def heartbeat_row(latest: Dict[str, Any], ts: Optional[float] = None, ts_err: Optional[float] = None) -> Dict[str, Any]:
     bus_v = latest.get("bus_voltage_v")
     return {
-        "Timestamp": now_ts(),
+        "Timestamp": now_ts() if ts is None else ts,
+        "Timestamp_err_ms": "" if ts_err is None else round(1000.0 * ts_err, 3),
         "canister_mass": latest.get("canister_mass_kg"),
         "sump_mass": latest.get("sump_mass_kg"),
         "pump_voltage": latest.get("pump_voltage_v", bus_v),
@@ -39,6 +43,7 @@ def heartbeat_row(latest: Dict[str, Any]) -> Dict[str, Any]:
 class HeartbeatCsvLogger:
     FIELDNAMES = [
         "Timestamp",
+        "Timestamp_err_ms",
         "canister_mass",
         "sump_mass",
         "pump_voltage",
@@ -82,9 +87,9 @@ class EventLogger:
 
 
 async def wait_controller_ready(ctrl, t: float = 5.0) -> None:
-    t0 = time.monotonic()
+    t0 = clock.monotonic()
     last_err: Optional[Exception] = None
-    while time.monotonic() - t0 < t:
+    while clock.monotonic() - t0 < t:
         try:
             await heartbeat(ctrl)
             return
@@ -94,28 +99,16 @@ async def wait_controller_ready(ctrl, t: float = 5.0) -> None:
     raise RuntimeError(f"Controller not responding after {t:.1f}s (last error: {last_err!r})")
 
 
-async def heartbeat_task(ctrl, period_s: float = 0.5) -> None:
-    try:
-        while True:
-            try:
-                await heartbeat(ctrl)
-            except Exception:
-                pass
-            await asyncio.sleep(period_s)
-    except asyncio.CancelledError:
-        pass
-
-
 async def stream_log_task(ctrl, hb_csv, event_log, log_hz: float, print_hz: float) -> None:
     try:
         log_period = 1.0 / max(0.1, log_hz)
         print_period = 1.0 / max(0.1, print_hz)
-        next_print = time.monotonic()
+        next_print = clock.monotonic()
 
         while True:
             latest = getattr(ctrl, "latest", None)
             if latest:
-                row = heartbeat_row(latest)
+                row = heartbeat_row(latest, *ctrl.sample_time(latest))
 
                 if hb_csv:
                     hb_csv.log(row)
@@ -123,9 +116,9 @@ async def stream_log_task(ctrl, hb_csv, event_log, log_hz: float, print_hz: floa
                 if event_log:
                     event_log.write({"ts": row["Timestamp"], "kind": "heartbeat", **row})
 
-                if time.monotonic() >= next_print:
+                if clock.monotonic() >= next_print:
                     print(row)
-                    next_print = time.monotonic() + print_period
+                    next_print = clock.monotonic() + print_period
 
             await asyncio.sleep(log_period)
 
@@ -143,23 +136,42 @@ async def can_dispense_sim(target_ml: int, done_event: threading.Event, step_ml:
     done_event.set()
 
 
+def check_step(ctrl, live: LivenessManager, crit: FailCriteria) -> None:
+    # before each controller step: link alive, stream fresh, readings within limits
+    check_link_health(live)
+    check_stream(ctrl, crit)
+    check_limits(ctrl, crit)
+
+
 async def make_controller(args):
+    if args.controller == "inproc":
+        from tcd1.controller_inproc_link import InProcessControllerLink
+
+        ctrl = InProcessControllerLink(seed=args.seed)
+        await ctrl.start()
+        return ctrl
+
     from tcd1.controller_subprocess_link import SubprocessControllerLink
     cmd = args.controller_sim_cmd.split() if args.controller_sim_cmd else None
-    ctrl = SubprocessControllerLink(cmd=cmd)
+    ctrl = SubprocessControllerLink(cmd=cmd, transport=args.transport, seed=args.seed)
     await ctrl.start()
     return ctrl
 
 
-async def main() -> None:
+def parse_args() -> argparse.Namespace:
     ap = argparse.ArgumentParser()
 
-    ap.add_argument("--controller", choices=["sim"], default="sim")
+    ap.add_argument("--controller", choices=["sim", "inproc"], default="sim", help="inproc: run SystemController on this event loop instead of a subprocess")
+    ap.add_argument("--clock", choices=["wall", "virtual"], default="wall", help="virtual: simulated time on the event loop, as fast as the CPU allows (needs --controller inproc)")
     ap.add_argument("--controller-sim-cmd", default="", help="Override sim command, e.g. 'python -m kp_controller_sim.main'")
+    ap.add_argument("--seed", type=int, default=None, help="Sim sensor noise seed, for bit-identical telemetry across runs (default: random)")
+    ap.add_argument("--transport", choices=["pipe", "shm"], default="pipe", help="Sim sensor stream over the stdout pipe or a shared-memory ring")
 
     ap.add_argument("--stream-hz", type=float, default=10.0)
+    ap.add_argument("--keyframe-s", type=float, default=0.0, help="Delta stream: full frame every N s, changed fields in between (0 = off)")
     ap.add_argument("--log-hz", type=float, default=10.0)
     ap.add_argument("--print-hz", type=float, default=2.0)
+    ap.add_argument("--quiet-s", type=float, default=1.0, help="Heartbeat only after this long without any controller traffic")
 
     ap.add_argument("--ev", choices=["ev1", "ev2"], default="ev1")
     ap.add_argument("--dest", choices=["TANK1", "TANK2"], default="TANK2")
@@ -178,13 +190,20 @@ async def main() -> None:
     ap.add_argument("--sump-empty", type=float, default=0.05)
 
     args = ap.parse_args()
+    if args.clock == "virtual" and args.controller != "inproc":
+        ap.error("--clock virtual needs --controller inproc (a subprocess or serial controller keeps real time)")
+    return args
 
+
+async def main(args: argparse.Namespace) -> None:
     hb_csv = HeartbeatCsvLogger(args.heartbeat_csv) if args.heartbeat_csv else None
     event_log = EventLogger(args.events_jsonl) if args.events_jsonl else None
+    crit = default_fail()
 
     ctrl = await make_controller(args)
     rx = asyncio.create_task(ctrl.rx_task())
-    hb = asyncio.create_task(heartbeat_task(ctrl, 0.5))
+    live = LivenessManager(ctrl, quiet_s=args.quiet_s)
+    hb = asyncio.create_task(live.run())
     log_task = None
 
     dispense_done = threading.Event()
@@ -197,7 +216,7 @@ async def main() -> None:
         print("[CTRL] Ready")
 
         try:
-            await start_stream(ctrl, args.stream_hz)
+            await start_stream(ctrl, args.stream_hz, args.keyframe_s)
         except Exception:
             pass
 
@@ -212,9 +231,11 @@ async def main() -> None:
 
         print("[FLOW] Dispense start. Waiting for completion...")
         while not dispense_done.is_set():
+            check_link_health(live)
             await asyncio.sleep(0.05)
         print("[FLOW] Dispense complete.")
 
+        check_step(ctrl, live, crit)
         res1 = await drain_canister_to_sump(
             ctrl,
             ev=args.ev,
@@ -224,6 +245,7 @@ async def main() -> None:
         )
         print("[DONE drain_canister]", res1)
 
+        check_step(ctrl, live, crit)
         res2 = await drain_sump_to_tank(
             ctrl,
             tank=args.dest,
@@ -252,6 +274,11 @@ async def main() -> None:
         rx.cancel()
         await asyncio.gather(hb, rx, return_exceptions=True)
 
+        report = live.report()
+        print("[LIVENESS]", report)
+        if event_log:
+            event_log.write({"ts": now_ts(), "kind": "event", "event": "liveness", "data": report})
+
         try:
             aclose = getattr(ctrl, "aclose", None)
             if aclose:
@@ -268,6 +295,7 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    clock.run(main(args), virtual=args.clock == "virtual")
 
 
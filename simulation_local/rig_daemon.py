@@ -0,0 +1,74 @@
+# rig_daemon.py
+#
+# Owns the one kp_controller_sim subprocess and shares it over a Unix
+# socket, so bringup (--controller daemon), dashboards and exporters can
+# run against the same simulated rig at once. See tcd1/daemon.py.
+
+import argparse
+import warnings
+warnings.filterwarnings("ignore", category=ResourceWarning)
+
+import asyncio
+import json
+import time
+
+from tcd1.actions.data_collect import start_stream
+from tcd1.controller_subprocess_link import SubprocessControllerLink
+from tcd1.daemon import DEFAULT_SOCKET, RigDaemon
+from tcd1.liveness import LivenessManager
+from tcd1.safety import safe_stop
+
+
+async def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--socket", default=DEFAULT_SOCKET)
+    ap.add_argument("--controller-sim-cmd", default="python -u -m kp_controller_sim.main", help="Override sim command, e.g. 'python -m kp_controller_sim.main'")
+    ap.add_argument("--seed", type=int, default=None, help="Sim sensor noise seed, for bit-identical telemetry across runs (default: random)")
+    ap.add_argument("--transport", choices=["pipe", "shm"], default="pipe", help="Sim sensor stream over the stdout pipe or a shared-memory ring")
+    ap.add_argument("--stream-hz", type=float, default=10.0)
+    ap.add_argument("--keyframe-s", type=float, default=0.0, help="Delta stream: full frame every N s, changed fields in between (0 = off)")
+    ap.add_argument("--client-queue", type=int, default=256, help="Samples buffered per client before the oldest are dropped")
+    ap.add_argument("--quiet-s", type=float, default=1.0, help="Heartbeat only after this long without any controller traffic")
+    ap.add_argument("--status-every", type=float, default=30.0, help="Print client/link status every N s (0 = off)")
+    args = ap.parse_args()
+
+    ctrl = SubprocessControllerLink(cmd=args.controller_sim_cmd.split() if args.controller_sim_cmd else None, transport=args.transport, seed=args.seed)
+    await ctrl.start()
+    rx = asyncio.create_task(ctrl.rx_task())
+    live = LivenessManager(ctrl, quiet_s=args.quiet_s)
+    hb = asyncio.create_task(live.run())
+    # the daemon owns the stream and restarts it after a client's safe_stop/reset_sim
+    daemon = RigDaemon(ctrl, args.socket, queue_max=args.client_queue, stream=lambda: start_stream(ctrl, args.stream_hz, args.keyframe_s))
+
+    try:
+        await ctrl.call("heartbeat", {}, 5.0)
+
+        await daemon.start()
+        print(f"[DAEMON] serving kp_controller_sim on {args.socket}")
+        server = asyncio.create_task(daemon.serve_forever())
+        try:
+            while True:
+                await asyncio.sleep(args.status_every if args.status_every > 0 else 3600.0)
+                if args.status_every > 0:
+                    st = daemon.status()
+                    st["liveness"] = live.state
+                    print(f"[DAEMON {time.strftime('%H:%M:%S')}]", json.dumps(st))
+        finally:
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+
+    finally:
+        await daemon.aclose()
+        await safe_stop(ctrl)
+        print("[LIVENESS]", live.report())
+        hb.cancel()
+        rx.cancel()
+        await asyncio.gather(hb, rx, return_exceptions=True)
+        try:
+            await ctrl.aclose()
+        except Exception:
+            pass
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
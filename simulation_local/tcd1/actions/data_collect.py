@@ -1,5 +1,11 @@
-async def start_stream(ctrl, hz: float = 10.0):
-    return await ctrl.call("start_stream", {"hz": float(hz)}, 2.0)
+async def start_stream(ctrl, hz: float = 10.0, keyframe_s: float = 0.0, deadband=None):
+    args = {"hz": float(hz)}
+    if keyframe_s > 0:
+        # full frame every keyframe_s, sensors_delta (changed fields only) in between
+        args["keyframe_s"] = float(keyframe_s)
+        if deadband:
+            args["deadband"] = {k: float(v) for k, v in deadband.items()}
+    return await ctrl.call("start_stream", args, 2.0)
 
 
 async def stop_stream(ctrl):
@@ -0,0 +1,11 @@
+from typing import Any, Dict, Optional
+
+
+async def list_jobs(ctrl) -> Dict[str, Any]:
+    return await ctrl.call("jobs", {}, 2.0)
+
+
+async def cancel_job(ctrl, job: Optional[int] = None) -> Dict[str, Any]:
+    # job=None cancels whatever is running; the controller then goes to safe_stop
+    args = {} if job is None else {"job": int(job)}
+    return await ctrl.call("cancel_job", args, 5.0)
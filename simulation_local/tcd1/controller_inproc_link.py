@@ -0,0 +1,138 @@
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+from tcd1 import clock
+from tcd1.history import SensorHistory
+from tcd1.metrics import LinkMetrics
+from tcd1.waiters import Predicate, SensorWaiters
+
+
+class InProcessControllerLink:
+    """
+    Controller link that runs SystemController on the caller's event loop:
+    no subprocess, no JSON, no pipe. Commands go through the same dispatch
+    as kp_controller_sim (a CommandDispatcher of this link's own, so jobs
+    are per link), and rx_task() is the sensor stream task, handing each
+    sample dict straight to history and waiters.
+
+    A command that times out keeps running, as it would in the sim process.
+    start_stream's keyframe_s/deadband are ignored (every sample is a full
+    dict already) and transport="shm" is refused.
+    seed is the sensor noise seed of the SystemController made here.
+    """
+
+    def __init__(self, history_len: int = 30000, ctrl: Any = None, seed: Optional[int] = None):
+        from controls import SystemController
+        from kp_controller_sim.main import CommandDispatcher
+
+        self.ctrl = ctrl if ctrl is not None else SystemController(seed=seed)
+        self.dispatcher = CommandDispatcher(self.ctrl, wire=False)
+        self.latest: Optional[Dict[str, Any]] = None
+        self.hello: Optional[Dict[str, Any]] = None
+        self.last_rx_monotonic = clock.monotonic()
+        self.history = SensorHistory(history_len)
+        self.waiters = SensorWaiters()
+        self.metrics = LinkMetrics()
+
+        # call id -> accepted job info of drains still running
+        self.jobs: Dict[Any, Dict[str, Any]] = {}
+
+        self._next_id = 1
+        self._cmds: set = set()
+
+    async def start(self) -> None:
+        if self.hello is None:
+            self.hello = {"type": "hello", "ts": clock.wall(), "name": "kp_controller_sim", "version": "1.0", "seed": self.ctrl.noise.seed, "inproc": True}
+
+    async def rx_task(self) -> None:
+        """
+        Sensor stream at ctrl.stream_hz (2 Hz while stopped, like the sim),
+        catching up on every sample due since the last wakeup.
+        """
+        await self.start()
+        ctrl = self.ctrl
+        next_t = clock.monotonic()
+        tick = 0
+        try:
+            while True:
+                hz = ctrl.stream_hz if ctrl.stream_enabled else 2.0
+                period = 1.0 / max(0.2, float(hz))
+                now = clock.monotonic()
+                if now >= next_t:
+                    n = min(1000, int((now - next_t) / period) + 1)
+                    for _ in range(n):
+                        tick += 1
+                        data = ctrl.sensors()
+                        data["sim_tick"] = tick
+                        self._ingest(data, now)
+                    next_t += n * period
+                    if next_t < now:
+                        next_t = now + period
+                await asyncio.sleep(max(0.0, next_t - clock.monotonic()))
+        except asyncio.CancelledError:
+            pass
+
+    def _ingest(self, data: Dict[str, Any], now: float) -> None:
+        self.latest = data
+        self.last_rx_monotonic = now
+        self.history.append(data, now)
+        self.metrics.stream.on_frame(now, data["sim_tick"])
+        self.waiters.notify(data)
+
+    def sample_time(self, data: Dict[str, Any]) -> Tuple[float, Optional[float]]:
+        """
+        (wall time, error bound in s) of a sample: "ts" is stamped by the
+        controller from this process' clock, so it is exact.
+        """
+        ts = data.get("ts")
+        if isinstance(ts, (int, float)):
+            return float(ts), 0.0
+        return clock.wall(), None
+
+    def stream_stats(self) -> Dict[str, Any]:
+        return {}
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        return self.metrics.snapshot()
+
+    async def call(self, name: str, args: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+        cid = self._next_id
+        self._next_id += 1
+        if name in ("start_stream", "stop_stream"):
+            self.metrics.stream.reset_counter()
+
+        t0 = clock.monotonic()
+        def accepted(job: Any) -> None:
+            self.jobs[cid] = {"type": "cmd_accepted", "id": cid, "job": job.id, "name": job.name}
+
+        task = asyncio.create_task(self.dispatcher.handle_cmd({"type": "cmd", "id": cid, "name": name, "args": args}, accepted))
+        self._cmds.add(task)
+        task.add_done_callback(self._cmds.discard)
+        task.add_done_callback(lambda _: self.jobs.pop(cid, None))
+        try:
+            msg = await asyncio.wait_for(asyncio.shield(task), timeout_s)
+        except asyncio.TimeoutError:
+            self.metrics.record_timeout(name)
+            raise
+
+        if not msg.get("ok", False):
+            self.metrics.record_error(name)
+            raise RuntimeError(str(msg.get("error") or "command failed"))
+        self.metrics.record_rtt(name, clock.monotonic() - t0)
+        res = msg.get("result")
+        return res if isinstance(res, dict) else {}
+
+    async def wait_for(self, predicate: Predicate, timeout_s: float, label: str = "condition") -> Dict[str, Any]:
+        """
+        Wait until a sensors sample satisfies predicate (checked per sample).
+        """
+        return await self.waiters.wait(predicate, timeout_s, label)
+
+    async def aclose(self) -> None:
+        self.close()
+        await asyncio.gather(*self._cmds, return_exceptions=True)
+        self.dispatcher.close()
+
+    def close(self) -> None:
+        for task in list(self._cmds):
+            task.cancel()
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from tcd1.link_core import LinkCore, SerialTransport
+
+
+class ControllerLink(LinkCore):
+    """
+    Controller on a serial port speaking the kp_controller_sim JSON lines
+    protocol (LinkCore over a SerialTransport). The port is opened by
+    start() / the first rx_task() or call().
+    """
+
+    def __init__(self, port: str, baud: int = 115200, history_len: int = 30000):
+        self.port = port
+        self.baud = baud
+        super().__init__(SerialTransport(port, baud), history_len)
+
+    @staticmethod
+    def auto_port() -> Optional[str]:
+        """Most likely USB serial controller port, or None."""
+        from serial.tools import list_ports
+
+        best, best_s = None, 0
+        for p in list_ports.comports():
+            txt = f"{p.description} {p.manufacturer} {p.product} {p.hwid}".lower()
+            s = 0
+            if p.vid is not None:
+                s += 2
+            if "usb" in txt:
+                s += 1
+            if "acm" in p.device.lower() or "usb" in p.device.lower():
+                s += 2
+            if s > best_s:
+                best, best_s = p.device, s
+        return best
@@ -0,0 +1,13 @@
+from tcd1.link_core import LinkCore, SocketTransport
+
+
+class SocketControllerLink(LinkCore):
+    """
+    Controller reached over a stream socket, "host:port" or a Unix socket
+    path, speaking the kp_controller_sim JSON lines protocol (e.g. the sim
+    behind socat, or a controller on another machine).
+    """
+
+    def __init__(self, address: str, history_len: int = 30000):
+        self.address = address
+        super().__init__(SocketTransport(address), history_len)
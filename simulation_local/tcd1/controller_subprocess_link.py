@@ -1,146 +1,124 @@
 ﻿import asyncio
-import json
 import sys
-import time
 from typing import Any, Dict, Optional
 
+from tcd1 import clock
+from tcd1.link_core import LinkCore, PipeTransport
+from tcd1.shm_ring import ShmRingReader
 
-class SubprocessControllerLink:
+
+class SubprocessControllerLink(LinkCore):
     """
-    Controller link that talks to a simulator over stdin/stdout JSON lines.
+    Controller link that talks to a simulator over stdin/stdout JSON lines
+    (LinkCore over a PipeTransport).
+
+    transport="shm" asks the sim (on start_stream) to put sensor samples in
+    a shared-memory ring, polled every shm_poll_s; commands, replies and
+    hello stay on the pipe.
+
+    seed is passed to the sim as --seed (sensor noise; hello echoes it).
 
     Windows note:
-      - To avoid "unclosed transport" warnings on Proactor, we provide async aclose()
-        that terminates, awaits wait(), and closes the underlying transport.
+      - To avoid "unclosed transport" warnings on Proactor, use async aclose(),
+        which terminates, awaits wait(), and closes the underlying transport.
     """
-    def __init__(self, cmd: Optional[list[str]] = None):
+    TRANSPORTS = ("pipe", "shm")
+
+    def __init__(
+        self,
+        cmd: Optional[list[str]] = None,
+        history_len: int = 30000,
+        transport: str = "pipe",
+        shm_poll_s: float = 0.002,
+        shm_slots: int = 4096,
+        seed: Optional[int] = None,
+    ):
+        if transport not in self.TRANSPORTS:
+            raise ValueError(f"transport must be one of {self.TRANSPORTS}")
         # Default to unbuffered module run (important so stdout flushes immediately)
         self.cmd = cmd or [sys.executable, "-u", "-m", "kp_controller_sim.main"]
-        self.proc: Optional[asyncio.subprocess.Process] = None
-
-        self.latest: Optional[Dict[str, Any]] = None
-        self.hello: Optional[Dict[str, Any]] = None
-        self.last_rx_monotonic = time.monotonic()
-
-        self._next_id = 1
-        self._pending: Dict[int, asyncio.Future] = {}
-
-    async def start(self) -> None:
-        if self.proc is not None:
+        if seed is not None:
+            self.cmd = [*self.cmd, "--seed", str(int(seed))]
+        self.pipe = PipeTransport(self.cmd)
+        super().__init__(self.pipe, history_len)
+        self.transport = transport
+        self.shm_poll_s = float(shm_poll_s)
+        self.shm_slots = int(shm_slots)
+        self._shm: Optional[ShmRingReader] = None
+        self._shm_task: Optional[asyncio.Task] = None
+
+    @property
+    def proc(self) -> Optional[asyncio.subprocess.Process]:
+        return self.pipe.proc
+
+    def _prepare(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        if name == "start_stream" and self.transport == "shm":
+            return {**args, "transport": "shm", "slots": self.shm_slots}
+        return args
+
+    def _on_result(self, name: str, result: Dict[str, Any]) -> None:
+        if name == "start_stream":
+            if result.get("transport") == "shm":
+                self._attach_shm(result["shm"])
+            else:
+                self._detach_shm()
+
+    def _attach_shm(self, desc: Dict[str, Any]) -> None:
+        if self._shm is not None and self._shm.shm.name == desc.get("name"):
             return
-        self.proc = await asyncio.create_subprocess_exec(
-            *self.cmd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
-
-    async def rx_task(self) -> None:
-        if self.proc is None:
-            await self.start()
-        assert self.proc and self.proc.stdout
-
+        self._detach_shm()
+        self._shm = ShmRingReader(desc)
+        self._shm_task = asyncio.create_task(self._shm_loop(self._shm))
+
+    def _detach_shm(self) -> None:
+        if self._shm_task is not None:
+            self._shm_task.cancel()
+            self._shm_task = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    async def _shm_loop(self, ring: ShmRingReader) -> None:
+        """
+        Drain the ring every shm_poll_s. A poll returns all samples written
+        since the last one; as with a batch frame, only the newest was just
+        sampled, earlier ones get rx time backdated by their ts offset.
+        """
         try:
             while True:
-                line = await self.proc.stdout.readline()
-                if not line:
-                    return
-
-                self.last_rx_monotonic = time.monotonic()
-
-                try:
-                    msg = json.loads(line.decode("utf-8").strip())
-                except Exception:
-                    continue
-
-                t = msg.get("type")
-                if t == "hello":
-                    self.hello = msg
-                elif t == "sensors":
-                    self.latest = msg.get("data") or {}
-                elif t == "cmd_result":
-                    cid = msg.get("id")
-                    fut = self._pending.pop(cid, None)
-                    if fut and not fut.done():
-                        if msg.get("ok", False):
-                            fut.set_result(msg.get("result"))
-                        else:
-                            err = msg.get("error") or (msg.get("result") or {}).get("error") or "command failed"
-                            fut.set_exception(RuntimeError(str(err)))
+                recs = ring.poll()
+                if recs:
+                    now = clock.monotonic()
+                    self.last_rx_monotonic = now
+                    t_last = recs[-1][1].get("ts", 0.0)
+                    for _, data in recs:
+                        self.history.append(data, now - (t_last - data.get("ts", t_last)))
+                        self.waiters.notify(data)
+                    first, last = recs[0][1], recs[-1][1]
+                    self.latest = last
+                    self.metrics.stream.on_frame(now, first.get("sim_tick", recs[0][0]), last.get("sim_tick", recs[-1][0]), 1, len(recs))
+                await asyncio.sleep(self.shm_poll_s)
         except asyncio.CancelledError:
-            # normal shutdown path
             pass
 
-    async def call(self, name: str, args: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
-        if self.proc is None:
-            await self.start()
-        assert self.proc and self.proc.stdin
-
-        cid = self._next_id
-        self._next_id += 1
-
-        fut = asyncio.get_running_loop().create_future()
-        self._pending[cid] = fut
+    def shm_stats(self) -> Dict[str, Any]:
+        if self._shm is None:
+            return {}
+        return {"name": self._shm.shm.name, "slots": self._shm.slots, "next_seq": self._shm.next_seq, "overruns": self._shm.overruns}
 
-        payload = {"type": "cmd", "id": cid, "name": name, "args": args}
-        self.proc.stdin.write((json.dumps(payload) + "\n").encode("utf-8"))
-        await self.proc.stdin.drain()
-
-        res = await asyncio.wait_for(fut, timeout=timeout_s)
-        return res if isinstance(res, dict) else {}
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        snap = super().metrics_snapshot()
+        snap["transport"] = self.transport
+        if self._shm is not None:
+            snap["shm"] = self.shm_stats()
+        return snap
 
     async def aclose(self) -> None:
-        """
-        Best-effort async cleanup (recommended on Windows).
-        """
-        if not self.proc:
-            return
-
-        # Cancel any pending callers so they don't hang
-        for _, fut in list(self._pending.items()):
-            if not fut.done():
-                fut.cancel()
-        self._pending.clear()
-
-        # Close stdin to signal sim to exit if it cares
-        try:
-            if self.proc.stdin:
-                self.proc.stdin.close()
-        except Exception:
-            pass
-
-        # Ask process to stop
-        if self.proc.returncode is None:
-            try:
-                self.proc.terminate()
-            except Exception:
-                pass
-
-            # Wait a bit, then kill if needed
-            try:
-                await asyncio.wait_for(self.proc.wait(), timeout=2.0)
-            except Exception:
-                try:
-                    self.proc.kill()
-                except Exception:
-                    pass
-                try:
-                    await asyncio.wait_for(self.proc.wait(), timeout=2.0)
-                except Exception:
-                    pass
-
-        # IMPORTANT: close the underlying transport (fixes Windows "unclosed transport" warnings)
-        try:
-            tr = getattr(self.proc, "_transport", None)
-            if tr:
-                tr.close()
-        except Exception:
-            pass
+        self._detach_shm()
+        await super().aclose()
 
     def close(self) -> None:
         # Synchronous fallback. Prefer: await aclose()
-        if self.proc and self.proc.returncode is None:
-            try:
-                self.proc.terminate()
-            except Exception:
-                pass
+        self._detach_shm()
+        super().close()
+        self.pipe.terminate()
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from tcd1.daemon import DEFAULT_SOCKET
+from tcd1.history import SensorHistory
+from tcd1.metrics import LinkMetrics
+from tcd1.waiters import Predicate, SensorWaiters
+
+
+class DaemonCommandError(RuntimeError):
+    pass
+
+
+class DaemonLinkDown(RuntimeError):
+    pass
+
+
+class DaemonLink:
+    """
+    Client side of the rig daemon. Looks like a controller link (call,
+    wait_for, latest, history, sample_time ...) so the scripts and actions
+    run unchanged, but the port/subprocess stays owned by the daemon and
+    several clients can share it.
+
+    Framing, stream setup and reconnects are the daemon's business;
+    sample_time() returns the stamp the daemon computed from its link.
+    """
+
+    def __init__(self, path: str = DEFAULT_SOCKET, history_len: int = 30000):
+        self.path = path
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+        self.latest: Dict[str, Any] = {}
+        self.hello: Dict[str, Any] = {}
+        self.daemon_hello: Dict[str, Any] = {}
+        self.last_rx_monotonic = time.monotonic()
+        self.history = SensorHistory(history_len)
+        self.waiters = SensorWaiters()
+        self.metrics = LinkMetrics()
+        # id(sample) -> (ts, ts_err) as sent by the daemon, for sample_time()
+        self._stamps: Dict[int, Tuple[float, Optional[float]]] = {}
+
+        self._next_id = 1
+        self._pending: Dict[int, asyncio.Future] = {}
+
+    async def start(self) -> None:
+        if self.writer is not None:
+            return
+        try:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.path, limit=1 << 20)
+        except OSError as e:
+            raise DaemonLinkDown(f"no rig daemon on {self.path} ({e})") from e
+
+    async def rx_task(self) -> None:
+        if self.reader is None:
+            await self.start()
+        assert self.reader is not None
+
+        err: Exception = DaemonLinkDown("rig daemon closed the connection")
+        try:
+            while True:
+                try:
+                    line = await self.reader.readline()
+                except (ConnectionError, ValueError) as e:
+                    err = DaemonLinkDown(f"rig daemon connection lost: {e!r}")
+                    break
+                if not line:
+                    break
+
+                try:
+                    msg = json.loads(line.decode("utf-8"))
+                except Exception:
+                    continue
+                if not isinstance(msg, dict):
+                    continue
+
+                t = msg.get("type")
+                if t == "sensors":
+                    data = msg.get("data")
+                    if isinstance(data, dict):
+                        self._ingest(data, msg.get("ts"), msg.get("ts_err"))
+                elif t == "cmd_result":
+                    fut = self._pending.get(msg.get("id"))
+                    if fut and not fut.done():
+                        fut.set_result(msg)
+                elif t == "hello":
+                    self.daemon_hello = msg
+                    self.hello = msg.get("link") or {}
+        except asyncio.CancelledError:
+            return
+
+        for fut in list(self._pending.values()):
+            if not fut.done():
+                fut.set_exception(err)
+
+    def _ingest(self, data: Dict[str, Any], ts: Any, ts_err: Any) -> None:
+        # only samples count as fresh (like PicoLink._ingest): heartbeat
+        # replies must not hide a stalled stream from check_stream
+        now = time.monotonic()
+        self.last_rx_monotonic = now
+        self.latest = data
+        if isinstance(ts, (int, float)):
+            self._stamps = {id(data): (float(ts), ts_err if isinstance(ts_err, (int, float)) else None)}
+        self.history.append(data, now)
+        tick = data.get("sim_tick", data.get("ts"))
+        if isinstance(tick, (int, float)):
+            self.metrics.stream.on_frame(now, tick)
+        self.waiters.notify(data)
+
+    def sample_time(self, data: Dict[str, Any]) -> Tuple[float, Optional[float]]:
+        """
+        (wall time, error bound in s) the daemon stamped on the latest
+        sample; other samples get the current time with an unknown bound.
+        """
+        return self._stamps.get(id(data), (time.time(), None))
+
+    def stream_stats(self) -> Dict[str, Any]:
+        return {}
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        return self.metrics.snapshot()
+
+    async def daemon_status(self, timeout_s: float = 2.0) -> Dict[str, Any]:
+        return await self.call("daemon_status", {}, timeout_s)
+
+    async def subscribe(self, on: bool = True) -> None:
+        await self._send({"type": "subscribe", "on": bool(on)})
+
+    async def _send(self, msg: Dict[str, Any]) -> None:
+        if self.writer is None:
+            await self.start()
+        assert self.writer is not None
+        self.writer.write((json.dumps(msg) + "\n").encode("utf-8"))
+        await self.writer.drain()
+
+    async def call(self, name: str, args: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+        cid = self._next_id
+        self._next_id += 1
+        if name in ("start_stream", "stop_stream"):
+            self.metrics.stream.reset_counter()
+
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[cid] = fut
+        t0 = time.monotonic()
+        try:
+            await self._send({"type": "cmd", "id": cid, "name": name, "args": args, "timeout_s": timeout_s})
+            # the daemon enforces timeout_s on its link; allow for the extra hop
+            resp = await asyncio.wait_for(fut, timeout_s + 1.0)
+        except asyncio.TimeoutError:
+            self.metrics.record_timeout(name)
+            raise
+        finally:
+            self._pending.pop(cid, None)
+
+        if not resp.get("ok", False):
+            err = str(resp.get("error") or "command failed")
+            if err.startswith("timeout:"):
+                self.metrics.record_timeout(name)
+                raise asyncio.TimeoutError(err)
+            self.metrics.record_error(name)
+            raise DaemonCommandError(err)
+
+        self.metrics.record_rtt(name, time.monotonic() - t0)
+        res = resp.get("result", {})
+        return res if isinstance(res, dict) else {}
+
+    async def wait_for(self, predicate: Predicate, timeout_s: float, label: str = "condition") -> Dict[str, Any]:
+        """
+        Wait until a sample relayed by the daemon satisfies predicate.
+        """
+        return await self.waiters.wait(predicate, timeout_s, label)
+
+    async def aclose(self) -> None:
+        self.close()
+        if self.writer is not None:
+            try:
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        for fut in list(self._pending.values()):
+            if not fut.done():
+                fut.cancel()
+        self._pending.clear()
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            except Exception:
+                pass
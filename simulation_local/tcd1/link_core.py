@@ -0,0 +1,506 @@
+import asyncio
+import heapq
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from tcd1 import clock
+from tcd1.history import SensorHistory
+from tcd1.metrics import LinkMetrics
+from tcd1.stream_delta import DeltaReassembler
+from tcd1.waiters import Predicate, SensorWaiters
+
+
+class ControllerCommandError(RuntimeError):
+    pass
+
+
+class ControllerLinkDown(RuntimeError):
+    pass
+
+
+class LinkTransport:
+    """
+    Byte pipe under a LinkCore. read() returns whatever arrived (b"" once
+    the other end is gone), write() sends one already-framed chunk.
+    """
+
+    name = "?"
+
+    async def open(self) -> None:
+        pass
+
+    async def read(self) -> bytes:
+        raise NotImplementedError
+
+    async def write(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+
+class PipeTransport(LinkTransport):
+    """stdin/stdout of a child process (kp_controller_sim)."""
+
+    name = "pipe"
+
+    def __init__(self, cmd: List[str]):
+        self.cmd = cmd
+        self.proc: Optional[asyncio.subprocess.Process] = None
+
+    async def open(self) -> None:
+        if self.proc is not None:
+            return
+        self.proc = await asyncio.create_subprocess_exec(
+            *self.cmd,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+    async def read(self) -> bytes:
+        assert self.proc and self.proc.stdout
+        return await self.proc.stdout.read(65536)
+
+    async def write(self, data: bytes) -> None:
+        assert self.proc and self.proc.stdin
+        self.proc.stdin.write(data)
+        await self.proc.stdin.drain()
+
+    async def aclose(self) -> None:
+        """
+        Best-effort cleanup: close stdin, terminate, kill if it lingers, and
+        close the asyncio transport (avoids "unclosed transport" on Windows
+        Proactor).
+        """
+        proc = self.proc
+        if proc is None:
+            return
+
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+        except Exception:
+            pass
+
+        if proc.returncode is None:
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+            try:
+                await asyncio.wait_for(proc.wait(), timeout=2.0)
+            except Exception:
+                try:
+                    proc.kill()
+                except Exception:
+                    pass
+                try:
+                    await asyncio.wait_for(proc.wait(), timeout=2.0)
+                except Exception:
+                    pass
+
+        try:
+            tr = getattr(proc, "_transport", None)
+            if tr:
+                tr.close()
+        except Exception:
+            pass
+
+    def terminate(self) -> None:
+        if self.proc and self.proc.returncode is None:
+            try:
+                self.proc.terminate()
+            except Exception:
+                pass
+
+
+class SerialTransport(LinkTransport):
+    """
+    pyserial port. Reads come straight off the fd through the event loop
+    (add_reader); without an fd (Windows) each read is one thread hop for
+    everything the driver has buffered.
+
+    The fd stays readable until it is read, so the reader is one-shot: the
+    callback removes itself and read() re-adds it after each read. A reader
+    left in place would run every loop iteration while data sits unread (or
+    forever after EOF). The fd is only read once it is readable: pyserial
+    sets VMIN=0, so an empty read returns b"" rather than EAGAIN and would
+    look like EOF.
+    """
+
+    name = "serial"
+
+    def __init__(self, port: str, baud: int = 115200):
+        self.port = port
+        self.baud = baud
+        self.ser: Any = None
+        self._fd: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._readable = asyncio.Event()
+
+    async def open(self) -> None:
+        if self.ser is not None:
+            return
+        import serial
+
+        self.ser = serial.Serial(self.port, baudrate=self.baud, timeout=0.2)
+        try:
+            fd = self.ser.fileno()
+            os.set_blocking(fd, False)
+            self._loop = asyncio.get_running_loop()
+            # armed for the first read(); a Proactor loop refuses here
+            self._loop.add_reader(fd, self._on_readable)
+            self._fd = fd
+        except (AttributeError, OSError, NotImplementedError):
+            self._fd = None  # no fd, or a Proactor loop
+
+    def _on_readable(self) -> None:
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+        self._readable.set()
+
+    async def read(self) -> bytes:
+        if self._fd is None:
+            return await asyncio.to_thread(self.ser.read, max(1, self.ser.in_waiting))
+        while True:
+            await self._readable.wait()
+            self._readable.clear()
+            try:
+                return os.read(self._fd, 65536)
+            except BlockingIOError:
+                pass
+            finally:
+                if self._fd is not None:
+                    self._loop.add_reader(self._fd, self._on_readable)
+
+    def _write(self, data: bytes) -> None:
+        self.ser.write(data)
+        self.ser.flush()
+
+    async def write(self, data: bytes) -> None:
+        await asyncio.to_thread(self._write, data)
+
+    async def aclose(self) -> None:
+        if self._fd is not None:
+            try:
+                self._loop.remove_reader(self._fd)
+            except Exception:
+                pass
+            self._fd = None
+        if self.ser is not None:
+            self.ser.close()
+
+
+class SocketTransport(LinkTransport):
+    """TCP ("host:port") or Unix socket (a path) speaking the same JSON lines."""
+
+    name = "socket"
+
+    def __init__(self, address: str):
+        self.address = address
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def open(self) -> None:
+        if self.writer is not None:
+            return
+        host, sep, port = self.address.rpartition(":")
+        if sep and port.isdigit() and "/" not in self.address:
+            self.reader, self.writer = await asyncio.open_connection(host or "127.0.0.1", int(port))
+        else:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.address)
+
+    async def read(self) -> bytes:
+        assert self.reader is not None
+        return await self.reader.read(65536)
+
+    async def write(self, data: bytes) -> None:
+        assert self.writer is not None
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def aclose(self) -> None:
+        if self.writer is not None:
+            try:
+                self.writer.close()
+                await self.writer.wait_closed()
+            except Exception:
+                pass
+
+
+class LinkCore:
+    """
+    Controller link over any LinkTransport, JSON lines both ways:
+
+    - rx: chunks are split into lines in one buffer pass and dispatched
+      (hello, sensors / sensors_delta through the DeltaReassembler, cmd_result)
+    - tx: one writer task; whatever is queued when it wakes goes out as a
+      single write
+    - calls: a pending table keyed by id with one deadline heap, swept by a
+      single task instead of a timer per call
+
+    Errors: a failed reply raises ControllerCommandError, a missed deadline
+    asyncio.TimeoutError, and calls still pending when the transport goes
+    away ControllerLinkDown.
+    """
+
+    RX_BUF_MAX = 1 << 20
+
+    def __init__(self, io: LinkTransport, history_len: int = 30000):
+        self.io = io
+        self.latest: Optional[Dict[str, Any]] = None
+        self.hello: Optional[Dict[str, Any]] = None
+        self.last_rx_monotonic = clock.monotonic()
+        # per-key time series (host rx time), bounded by history_len
+        self.history = SensorHistory(history_len)
+        self.waiters = SensorWaiters()
+        self.metrics = LinkMetrics()
+        # rebuilds full samples from keyframe + sensors_delta streams
+        self.stream = DeltaReassembler()
+        self.rx_bad_lines = 0
+        # call id -> cmd_accepted frame of jobs still running on the controller
+        self.jobs: Dict[Any, Dict[str, Any]] = {}
+
+        self._next_id = 1
+        self._pending: Dict[int, Tuple[asyncio.Future, str]] = {}
+        self._deadlines: List[Tuple[float, int]] = []
+        self._sweep_task: Optional[asyncio.Task] = None
+        self._txq: List[Tuple[bytes, Optional[int]]] = []
+        self._tx_wake = asyncio.Event()
+        self._tx_task: Optional[asyncio.Task] = None
+        self._rxbuf = bytearray()
+        self._opened = False
+
+    async def start(self) -> None:
+        if not self._opened:
+            await self.io.open()
+            self._opened = True
+
+    # ---- rx -----------------------------------------------------------
+
+    async def rx_task(self) -> None:
+        await self.start()
+        err: Exception = ControllerLinkDown(f"{self.io.name} link closed")
+        try:
+            while True:
+                try:
+                    data = await self.io.read()
+                except (OSError, ConnectionError) as e:
+                    err = ControllerLinkDown(f"{self.io.name} link lost: {e!r}")
+                    break
+                if not data:
+                    break
+                self._feed(data)
+        except asyncio.CancelledError:
+            return
+        self._fail_pending(err)
+
+    def _feed(self, data: bytes) -> None:
+        buf = self._rxbuf
+        buf += data
+        pos = 0
+        while True:
+            end = buf.find(b"\n", pos)
+            if end < 0:
+                break
+            if end > pos:
+                self._dispatch_line(bytes(buf[pos:end]))
+            pos = end + 1
+        del buf[:pos]
+        if len(buf) > self.RX_BUF_MAX:
+            # no newline in sight: line noise, drop it
+            self.rx_bad_lines += 1
+            self.stream.gap()
+            buf.clear()
+
+    def _dispatch_line(self, line: bytes) -> None:
+        try:
+            msg = json.loads(line)
+        except ValueError:
+            # garbled line, maybe a sensors_delta
+            self.rx_bad_lines += 1
+            self.stream.gap()
+            return
+        if isinstance(msg, dict):
+            self._dispatch(msg, len(line) + 1)
+
+    def _dispatch(self, msg: Dict[str, Any], nbytes: int) -> None:
+        t = msg.get("type")
+        if t == "sensors":
+            data = msg.get("data")
+            if isinstance(data, dict):
+                self._ingest(self.stream.keyframe(data, nbytes))
+        elif t == "sensors_delta":
+            data = msg.get("data")
+            if isinstance(data, dict):
+                full = self.stream.delta(data, nbytes)
+                if full is not None:
+                    self._ingest(full)
+        elif t == "cmd_result":
+            cid = msg.get("id")
+            self.jobs.pop(cid, None)
+            entry = self._pending.pop(cid, None)
+            if entry is not None and not entry[0].done():
+                entry[0].set_result(msg)
+        elif t == "cmd_accepted":
+            # long command running as a job; its cmd_result comes when it ends
+            self.jobs[msg.get("id")] = msg
+        elif t == "hello":
+            self.hello = msg
+        elif t == "log":
+            print(f"[CTRL] {msg.get('msg', '')}")
+
+    def _ingest(self, data: Dict[str, Any]) -> None:
+        # only samples count as fresh: heartbeat replies must not hide a
+        # stalled stream from check_stream
+        now = clock.monotonic()
+        self.last_rx_monotonic = now
+        self.latest = data
+        self.history.append(data, now)
+        tick = data.get("sim_tick", data.get("ts"))
+        if isinstance(tick, (int, float)):
+            self.metrics.stream.on_frame(now, tick)
+        self.waiters.notify(data)
+
+    # ---- tx -----------------------------------------------------------
+
+    def _send(self, data: bytes, cid: Optional[int] = None) -> None:
+        if self._tx_task is None or self._tx_task.done():
+            self._tx_task = asyncio.create_task(self._tx_loop())
+        self._txq.append((data, cid))
+        self._tx_wake.set()
+
+    async def _tx_loop(self) -> None:
+        try:
+            while True:
+                await self._tx_wake.wait()
+                self._tx_wake.clear()
+                batch, self._txq = self._txq, []
+                if not batch:
+                    continue
+                try:
+                    await self.io.write(b"".join(b[0] for b in batch))
+                except Exception as e:
+                    # nothing in this batch got out; fail its callers now
+                    for _, cid in batch:
+                        entry = self._pending.pop(cid, None) if cid is not None else None
+                        if entry is not None and not entry[0].done():
+                            entry[0].set_exception(ControllerLinkDown(f"{self.io.name} write failed: {e!r}"))
+        except asyncio.CancelledError:
+            pass
+
+    # ---- calls --------------------------------------------------------
+
+    async def _sweep_loop(self) -> None:
+        dl = self._deadlines
+        try:
+            while dl:
+                now = clock.monotonic()
+                while dl and dl[0][0] <= now:
+                    _, cid = heapq.heappop(dl)
+                    entry = self._pending.pop(cid, None)
+                    if entry is not None and not entry[0].done():
+                        entry[0].set_exception(asyncio.TimeoutError(f"{entry[1]} timed out"))
+                # drop deadlines of calls that already finished
+                while dl and dl[0][1] not in self._pending:
+                    heapq.heappop(dl)
+                if dl:
+                    await asyncio.sleep(max(0.0, dl[0][0] - clock.monotonic()))
+        except asyncio.CancelledError:
+            pass
+
+    def _prepare(self, name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Hook: adjust args before a command goes out."""
+        return args
+
+    def _on_result(self, name: str, result: Dict[str, Any]) -> None:
+        """Hook: look at a successful result before the caller gets it."""
+
+    async def call(self, name: str, args: Dict[str, Any], timeout_s: float) -> Dict[str, Any]:
+        await self.start()
+        cid = self._next_id
+        self._next_id += 1
+        if name in ("start_stream", "stop_stream"):
+            self.metrics.stream.reset_counter()
+        args = self._prepare(name, args)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._pending[cid] = (fut, name)
+        t0 = clock.monotonic()
+        heapq.heappush(self._deadlines, (t0 + float(timeout_s), cid))
+        if self._sweep_task is None or self._sweep_task.done() or self._deadlines[0][1] == cid:
+            # new earliest deadline: restart the sweeper so it sleeps until this one
+            if self._sweep_task is not None:
+                self._sweep_task.cancel()
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+
+        self._send((json.dumps({"type": "cmd", "id": cid, "name": name, "args": args}) + "\n").encode(), cid)
+        try:
+            msg = await fut
+        except asyncio.TimeoutError:
+            self.metrics.record_timeout(name)
+            raise
+        finally:
+            self._pending.pop(cid, None)
+
+        if not msg.get("ok", False):
+            self.metrics.record_error(name)
+            err = msg.get("error") or (msg.get("result") or {}).get("error") or "command failed"
+            raise ControllerCommandError(str(err))
+        self.metrics.record_rtt(name, clock.monotonic() - t0)
+
+        res = msg.get("result")
+        res = res if isinstance(res, dict) else {}
+        self._on_result(name, res)
+        return res
+
+    def _fail_pending(self, err: Exception) -> None:
+        for fut, _ in list(self._pending.values()):
+            if not fut.done():
+                fut.set_exception(err)
+        self._pending.clear()
+
+    async def wait_for(self, predicate: Predicate, timeout_s: float, label: str = "condition") -> Dict[str, Any]:
+        """
+        Wait until a sensors frame satisfies predicate (checked per frame).
+        """
+        return await self.waiters.wait(predicate, timeout_s, label)
+
+    def sample_time(self, data: Dict[str, Any]) -> Tuple[float, Optional[float]]:
+        """
+        (wall time, error bound in s) of a sample. The controller stamps
+        "ts" from the host clock (sim) so it is taken as exact; None bound
+        when unstamped.
+        """
+        ts = data.get("ts")
+        if isinstance(ts, (int, float)):
+            return float(ts), 0.0
+        return clock.wall(), None
+
+    def stream_stats(self) -> Dict[str, Any]:
+        return self.stream.stats()
+
+    def metrics_snapshot(self) -> Dict[str, Any]:
+        snap = self.metrics.snapshot()
+        snap["link"] = self.io.name
+        snap["rx_bad_lines"] = self.rx_bad_lines
+        return snap
+
+    def _stop_tasks(self) -> None:
+        for fut, _ in list(self._pending.values()):
+            if not fut.done():
+                fut.cancel()
+        self._pending.clear()
+        for t in (self._tx_task, self._sweep_task):
+            if t is not None:
+                t.cancel()
+
+    async def aclose(self) -> None:
+        self._stop_tasks()
+        await self.io.aclose()
+
+    def close(self) -> None:
+        # synchronous fallback; prefer await aclose()
+        self._stop_tasks()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+from typing import Any, Dict, Optional
+
+from tcd1 import clock
+
+# one heartbeat round trip on the wire (request + typical reply, JSON lines)
+_HB_REQ = {"type": "cmd", "id": 1000, "name": "heartbeat", "args": {}}
+_HB_REP = {"type": "cmd_result", "id": 1000, "ok": True, "result": {"ts_ms": 123456789}}
+HEARTBEAT_BYTES = len(json.dumps(_HB_REQ)) + len(json.dumps(_HB_REP)) + 2
+
+
+class LivenessManager:
+    """
+    Passive liveness for a controller link. Any received frame counts as
+    proof of life (link.last_rx_monotonic); a heartbeat is only sent after
+    quiet_s without traffic, or every sync_every_s when something needs
+    regular round trips (clock sync). State is one of:
+
+        "alive"  traffic within quiet_s
+        "quiet"  silent for longer, probing
+        "lost"   nothing heard (stream or probe) for dead_s
+    """
+
+    def __init__(
+        self,
+        link: Any,
+        quiet_s: float = 1.0,
+        dead_s: float = 3.0,
+        probe_timeout_s: float = 1.0,
+        sync_every_s: Optional[float] = None,
+        legacy_period_s: float = 0.5,
+    ):
+        self.link = link
+        self.quiet_s = float(quiet_s)
+        self.dead_s = max(float(dead_s), self.quiet_s)
+        self.probe_timeout_s = float(probe_timeout_s)
+        self.sync_every_s = sync_every_s
+        # the fixed-period keepalive this replaces, for the traffic report
+        self.legacy_period_s = float(legacy_period_s)
+
+        self.probes = 0
+        self.probe_failures = 0
+        self._t_start = clock.monotonic()
+        self._last_probe = 0.0
+        self._last_probe_ok = 0.0
+
+    @property
+    def last_seen(self) -> float:
+        return max(getattr(self.link, "last_rx_monotonic", 0.0), self._last_probe_ok)
+
+    def idle_s(self) -> float:
+        return clock.monotonic() - self.last_seen
+
+    @property
+    def state(self) -> str:
+        idle = self.idle_s()
+        if idle <= self.quiet_s:
+            return "alive"
+        if idle <= self.dead_s:
+            return "quiet"
+        return "lost"
+
+    async def _probe(self) -> None:
+        self.probes += 1
+        self._last_probe = clock.monotonic()
+        try:
+            await self.link.call("heartbeat", {}, self.probe_timeout_s)
+            self._last_probe_ok = clock.monotonic()
+        except Exception:
+            self.probe_failures += 1
+
+    async def run(self) -> None:
+        try:
+            while True:
+                now = clock.monotonic()
+                wait = self.quiet_s - (now - self.last_seen)
+                if self.sync_every_s:
+                    wait = min(wait, self.sync_every_s - (now - self._last_probe))
+
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+
+                await self._probe()
+                if clock.monotonic() - self._last_probe_ok > self.quiet_s:
+                    # probe failed: don't hammer a link that isn't answering
+                    await asyncio.sleep(0.5 * self.quiet_s)
+        except asyncio.CancelledError:
+            pass
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = clock.monotonic() - self._t_start
+        legacy = int(elapsed / self.legacy_period_s) if self.legacy_period_s > 0 else 0
+        saved = max(0, legacy - self.probes)
+        return {
+            "state": self.state,
+            "idle_s": round(self.idle_s(), 3),
+            "elapsed_s": round(elapsed, 1),
+            "heartbeats_sent": self.probes,
+            "heartbeats_failed": self.probe_failures,
+            "legacy_heartbeats": legacy,
+            "heartbeats_saved": saved,
+            "bytes_saved": saved * HEARTBEAT_BYTES,
+        }
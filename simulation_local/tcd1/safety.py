@@ -1,5 +1,6 @@
-import time
+from tcd1 import clock
 from tcd1.config import FailCriteria
+from tcd1.liveness import LivenessManager
 
 
 def check_stream(ctrl, crit: FailCriteria) -> None:
@@ -7,10 +8,15 @@ def check_stream(ctrl, crit: FailCriteria) -> None:
     if last is None:
         raise RuntimeError("Missing last_rx_monotonic on controller link")
 
-    if time.monotonic() - last > crit.max_sensor_gap_s:
+    if clock.monotonic() - last > crit.max_sensor_gap_s:
         raise RuntimeError("Sensor stream timeout")
 
 
+def check_link_health(live: LivenessManager) -> None:
+    if live.state == "lost":
+        raise RuntimeError(f"Controller link lost (nothing received for {live.idle_s():.1f}s)")
+
+
 def check_limits(ctrl, crit: FailCriteria) -> None:
     s = getattr(ctrl, "latest", None) or {}
 
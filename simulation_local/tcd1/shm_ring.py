@@ -0,0 +1,96 @@
+import struct
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Tuple
+
+# Reader side of kp_controller_sim/shm_ring.py; see there for the layout.
+MAGIC = 0x31444354  # "TCD1"
+VERSION = 1
+HEADER = struct.Struct("<IHHIIQ")
+WRITE_SEQ_OFF = 16
+SEQ = struct.Struct("<Q")
+
+
+class ShmLayoutError(RuntimeError):
+    pass
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # the sim owns the segment; keep this process' resource tracker from
+    # unlinking it on exit
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # 3.13+
+    except TypeError:
+        pass
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        from multiprocessing import resource_tracker
+
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    return shm
+
+
+class ShmRingReader:
+    """
+    Reads sensor records straight out of the sim's shared-memory ring:
+    struct.unpack_from on the mapping, nothing goes through a pipe or a
+    JSON parser. poll() returns everything written since the last call.
+    A reader that falls more than `slots` records behind loses the oldest
+    ones; they are counted in overruns.
+    """
+
+    def __init__(self, desc: Dict[str, Any]):
+        self.shm = _attach(str(desc["name"]))
+        self.buf = self.shm.buf
+        magic, version, nfields, slots, rec_size, write_seq = HEADER.unpack_from(self.buf, 0)
+        fields: List[List[str]] = desc.get("fields") or []
+        if magic != MAGIC or version != VERSION or nfields != len(fields):
+            self.close()
+            raise ShmLayoutError(f"unexpected shm ring layout in {desc['name']!r}")
+
+        self.names = [f[0] for f in fields]
+        self.bools = [i for i, f in enumerate(fields) if f[1] == "b"]
+        self.ints = [i for i, f in enumerate(fields) if f[1] == "i"]
+        self.values = struct.Struct("<" + "d" * nfields)
+        if SEQ.size + self.values.size != rec_size:
+            self.close()
+            raise ShmLayoutError(f"record size mismatch in {desc['name']!r}")
+        self.slots = slots
+        self.rec_size = rec_size
+        self.next_seq = write_seq + 1
+        self.overruns = 0
+
+    def poll(self) -> List[Tuple[int, Dict[str, Any]]]:
+        buf = self.buf
+        head = SEQ.unpack_from(buf, WRITE_SEQ_OFF)[0]
+        seq = self.next_seq
+        if head - seq + 1 > self.slots:
+            # lapped: those records are already overwritten
+            self.overruns += head - self.slots + 1 - seq
+            seq = head - self.slots + 1
+
+        out = []
+        names, bools, ints, unpack = self.names, self.bools, self.ints, self.values.unpack_from
+        while seq <= head:
+            off = HEADER.size + (seq % self.slots) * self.rec_size
+            vals = unpack(buf, off + SEQ.size)
+            if SEQ.unpack_from(buf, off)[0] != seq:
+                self.overruns += 1  # rewritten while we read it
+            else:
+                d = dict(zip(names, vals))
+                for i in bools:
+                    d[names[i]] = vals[i] != 0.0
+                for i in ints:
+                    d[names[i]] = int(vals[i])
+                out.append((seq, d))
+            seq += 1
+        self.next_seq = seq
+        return out
+
+    def close(self) -> None:
+        self.buf = None
+        try:
+            self.shm.close()
+        except (OSError, BufferError):
+            pass
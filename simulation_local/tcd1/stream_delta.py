@@ -0,0 +1,58 @@
+from typing import Any, Dict, Optional
+
+
+class DeltaReassembler:
+    """
+    Rebuilds full sensor dicts from a keyframe/delta stream ("sensors" +
+    "sensors_delta") and keeps byte counts so the saving can be reported.
+    Plain full-frame streams just look like all keyframes.
+
+    The sender only resends a field once it moves again, so after a lost
+    frame the rebuilt state can be stale with nothing to show for it. The
+    link calls gap() when it knows a frame went missing (seq gap, garbled
+    line); deltas are then dropped until the next keyframe.
+    """
+
+    def __init__(self):
+        self.state: Optional[Dict[str, Any]] = None
+        self.key_frames = 0
+        self.key_bytes = 0
+        self.delta_frames = 0
+        self.delta_bytes = 0
+        self.orphan_deltas = 0  # deltas with no keyframe to apply to (before the first, after a gap)
+        self.gaps = 0
+
+    def keyframe(self, data: Dict[str, Any], nbytes: int = 0) -> Dict[str, Any]:
+        self.key_frames += 1
+        self.key_bytes += nbytes
+        self.state = data
+        return data
+
+    def delta(self, data: Dict[str, Any], nbytes: int = 0) -> Optional[Dict[str, Any]]:
+        if self.state is None:
+            self.orphan_deltas += 1
+            return None
+        self.delta_frames += 1
+        self.delta_bytes += nbytes
+        full = dict(self.state)
+        full.update(data)
+        self.state = full
+        return full
+
+    def gap(self) -> None:
+        self.gaps += 1
+        self.state = None
+
+    def stats(self) -> Dict[str, Any]:
+        avg_key = self.key_bytes / self.key_frames if self.key_frames else 0.0
+        full_equiv = avg_key * (self.key_frames + self.delta_frames)
+        sent = self.key_bytes + self.delta_bytes
+        return {
+            "key_frames": self.key_frames,
+            "delta_frames": self.delta_frames,
+            "orphan_deltas": self.orphan_deltas,
+            "gaps": self.gaps,
+            "bytes": sent,
+            "bytes_full_equiv": round(full_equiv),
+            "saved_pct": round(100.0 * (1.0 - sent / full_equiv), 1) if full_equiv else 0.0,
+        }
@@ -0,0 +1,84 @@
+import asyncio
+import contextlib
+import io
+
+import pytest
+
+from controls import SystemController
+from tcd1 import clock
+
+
+def _run(coro_fn):
+    # virtual time: the drains' sleeps and valve strokes take no real time
+    with contextlib.redirect_stdout(io.StringIO()), asyncio.Runner(loop_factory=clock.VirtualTimeLoop) as runner:
+        return runner.run(coro_fn())
+
+
+def test_drain_sump_finishes_inside_timeout_including_mbv_close():
+    async def run():
+        ctrl = SystemController(seed=1)
+        ctrl.sump_mass_kg = 5.0
+        close_s = ctrl.mbvs[0].close_time_s
+        t0 = clock.monotonic()
+        res = await ctrl.drain_sump_to_tank(timeout_s=12.0 + close_s, stable_time_s=1.0)
+        assert res["ok"]
+        assert clock.monotonic() - t0 <= 12.0 + close_s
+        assert ctrl.mbvs[0].position == 0
+        assert not ctrl.pumps[0].is_running
+
+    _run(run)
+
+
+def test_drain_sump_timeout_stops_pump_and_closes_valve():
+    async def run():
+        ctrl = SystemController(seed=1)
+        ctrl.sump_mass_kg = 500.0
+        t0 = clock.monotonic()
+        with pytest.raises(RuntimeError, match="timed out"):
+            await ctrl.drain_sump_to_tank(timeout_s=15.0, stable_time_s=1.0)
+        took = clock.monotonic() - t0
+        # timed out early enough to leave room for the closing stroke
+        assert took <= 15.0 - ctrl.mbvs[0].close_time_s + 0.1
+        assert not ctrl.pumps[0].is_running
+        assert ctrl.mbvs[0].target == 0
+        await asyncio.sleep(ctrl.mbvs[0].close_time_s)
+        assert ctrl.mbvs[0].position == 0
+
+    _run(run)
+
+
+def test_drain_sump_cancel_stops_pump_and_closes_valve():
+    async def run():
+        ctrl = SystemController(seed=1)
+        ctrl.sump_mass_kg = 500.0
+        task = asyncio.create_task(ctrl.drain_sump_to_tank(timeout_s=60.0))
+        await asyncio.sleep(10.0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert not ctrl.pumps[0].is_running
+        assert ctrl.mbvs[0].target == 0
+
+    _run(run)
+
+
+def test_drain_canister_timeout_and_cancel_close_solenoid():
+    async def run():
+        ctrl = SystemController(seed=1)
+        ctrl.canister_mass_kg = 500.0
+        valve = ctrl.solenoids[2]
+        with pytest.raises(RuntimeError, match="timed out"):
+            await ctrl.drain_canister_to_sump(timeout_s=5.0)
+        assert not valve.commanded
+
+        task = asyncio.ensure_future(ctrl.drain_canister_to_sump(ev="ev2", timeout_s=60.0))
+        await asyncio.sleep(2.0)
+        assert ctrl.solenoids[3].is_open
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert not ctrl.solenoids[3].commanded
+        left = ctrl.canister_mass_kg
+        await asyncio.sleep(1.0)
+        assert not ctrl.solenoids[3].is_open
+        assert ctrl.canister_mass_kg == left
+
+    _run(run)
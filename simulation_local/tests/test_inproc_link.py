@@ -0,0 +1,82 @@
+import asyncio
+import contextlib
+import io
+
+import pytest
+
+from tcd1 import clock
+from tcd1.controller_inproc_link import InProcessControllerLink
+
+
+def _run(coro_fn):
+    with contextlib.redirect_stdout(io.StringIO()), asyncio.Runner(loop_factory=clock.VirtualTimeLoop) as runner:
+        return runner.run(coro_fn())
+
+
+def _link():
+    link = InProcessControllerLink(seed=1)
+    link.ctrl.canister_mass_kg = 100.0  # ~50 s drain
+    return link
+
+
+def test_links_in_one_process_have_their_own_jobs():
+    async def run():
+        a, b = _link(), _link()
+        drain_a = asyncio.create_task(a.call("drain_canister_to_sump", {"timeout_s": 120.0}, 200.0))
+        await asyncio.sleep(1.0)
+
+        # B is a different controller: its drain is not "busy" behind A's
+        drain_b = asyncio.create_task(b.call("drain_canister_to_sump", {"timeout_s": 120.0}, 200.0))
+        await asyncio.sleep(1.0)
+        assert [j["name"] for j in (await b.call("jobs", {}, 1.0))["jobs"]] == ["drain_canister_to_sump"]
+
+        # and B's safe_stop only stops B
+        res = await b.call("safe_stop", {}, 5.0)
+        assert res["cancelled_jobs"] == [1]
+        assert len((await a.call("jobs", {}, 1.0))["jobs"]) == 1
+        assert (await drain_a)["canister_mass_kg"] == 0.0
+        assert "cancelled by safe_stop" in str((await asyncio.gather(drain_b, return_exceptions=True))[0])
+
+        await a.aclose()
+        await b.aclose()
+
+    _run(run)
+
+
+def test_start_stream_wire_options_in_process():
+    async def run():
+        link = _link()
+        res = await link.call("start_stream", {"hz": 20.0, "keyframe_s": 1.0, "deadband": {"sump_mass_kg": 0.1}}, 1.0)
+        assert res["keyframe_every"] == 0
+        assert link.dispatcher.delta.keyframe_every == 0
+        with pytest.raises(RuntimeError, match="not available in-process"):
+            await link.call("start_stream", {"hz": 20.0, "transport": "shm"}, 1.0)
+        assert link.dispatcher.shm is None
+        await link.aclose()
+
+    _run(run)
+
+
+def test_closing_link_cancels_its_drain():
+    async def run():
+        link = _link()
+        ctrl = link.ctrl
+        drain = asyncio.create_task(link.call("drain_canister_to_sump", {"timeout_s": 120.0}, 200.0))
+        await asyncio.sleep(2.0)
+        assert ctrl.solenoids[2].is_open
+        jobs = link.dispatcher.jobs
+        job = next(iter(jobs.running.values()))
+
+        link.close()
+        await asyncio.gather(drain, return_exceptions=True)
+        # the job stays listed until its task is done, then goes
+        assert job.cancelled_by == "caller"
+        await asyncio.gather(job.task, return_exceptions=True)
+        assert job.task.cancelled()
+        assert not jobs.running
+        assert not ctrl.solenoids[2].commanded
+        left = ctrl.canister_mass_kg
+        await asyncio.sleep(5.0)
+        assert ctrl.canister_mass_kg == left
+
+    _run(run)
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import os
+import pty
+
+import pytest
+
+from tcd1 import clock
+from tcd1.link_core import LinkCore, LinkTransport, SerialTransport
+
+
+def _line(msg):
+    return json.dumps(msg).encode() + b"\n"
+
+
+def test_garbled_line_drops_deltas_until_keyframe():
+    link = LinkCore(io=None)
+    link._feed(_line({"type": "sensors", "data": {"ts": 0.0, "a": 1.0, "b": 1.0}}))
+    # the delta carrying b=5.0 loses bytes on the way
+    lost = _line({"type": "sensors_delta", "data": {"ts": 0.1, "b": 5.0}})
+    link._feed(lost[:10] + b"\n")
+    link._feed(_line({"type": "sensors_delta", "data": {"ts": 0.2, "a": 2.0}}))
+    assert link.latest["ts"] == 0.0
+
+    link._feed(_line({"type": "sensors", "data": {"ts": 0.3, "a": 2.0, "b": 5.0}}))
+    link._feed(_line({"type": "sensors_delta", "data": {"ts": 0.4}}))
+    assert link.latest == {"ts": 0.4, "a": 2.0, "b": 5.0}
+
+    st = link.stream_stats()
+    assert (st["gaps"], st["orphan_deltas"], st["key_frames"], st["delta_frames"]) == (1, 1, 2, 1)
+    assert link.rx_bad_lines == 1
+
+
+class CountingSerial(SerialTransport):
+    wakeups = 0
+
+    def _on_readable(self):
+        self.wakeups += 1
+        super()._on_readable()
+
+
+def test_serial_reader_does_not_spin_on_unread_data():
+    master, slave = pty.openpty()
+
+    async def main():
+        io = CountingSerial(os.ttyname(slave))
+        await io.open()
+        try:
+            os.write(master, b"hello\n")
+            # nobody reads for a while: a level-triggered reader fires every iteration
+            for _ in range(200):
+                await asyncio.sleep(0)
+            assert io.wakeups == 1
+            assert await io.read() == b"hello\n"
+
+            # waiting for more re-arms it, once
+            rx = asyncio.create_task(io.read())
+            await asyncio.sleep(0.01)
+            os.write(master, b"world\n")
+            assert await asyncio.wait_for(rx, 1.0) == b"world\n"
+            assert io.wakeups == 2
+        finally:
+            await io.aclose()
+
+    try:
+        asyncio.run(main())
+    finally:
+        os.close(slave)
+        os.close(master)
+
+
+class QueueTransport(LinkTransport):
+    name = "queue"
+
+    def __init__(self):
+        self.rx: asyncio.Queue = asyncio.Queue()
+
+    async def read(self):
+        return await self.rx.get()
+
+    async def write(self, data):
+        pass
+
+
+def test_freshness_counts_only_samples():
+    async def main():
+        io = QueueTransport()
+        link = LinkCore(io)
+        rx = asyncio.create_task(link.rx_task())
+        io.rx.put_nowait(_line({"type": "sensors", "data": {"ts": 0.0, "a": 1.0}}))
+        await asyncio.sleep(0)
+        fresh = link.last_rx_monotonic
+        await asyncio.sleep(5.0)
+        # the stream stalls; command replies keep coming
+        io.rx.put_nowait(_line({"type": "cmd_result", "id": 1, "ok": True, "result": {}}))
+        io.rx.put_nowait(_line({"type": "cmd_accepted", "id": 2, "job": 1, "name": "drain_sump_to_tank"}))
+        await asyncio.sleep(0.1)
+        assert link.last_rx_monotonic == fresh
+        io.rx.put_nowait(_line({"type": "sensors_delta", "data": {"ts": 5.0}}))
+        await asyncio.sleep(0)
+        assert link.last_rx_monotonic == pytest.approx(fresh + 5.1)
+        rx.cancel()
+
+    with asyncio.Runner(loop_factory=clock.VirtualTimeLoop) as runner:
+        runner.run(main())
@@ -0,0 +1,48 @@
+import asyncio
+from types import SimpleNamespace
+
+from bringup import default_fail
+from controls import SystemController
+from tcd1.safety import check_limits
+
+N = 20000
+
+
+def _trips(ctrl):
+    crit = default_fail()
+    trips = 0
+    lo = hi = None
+    for _ in range(N):
+        s = ctrl.sensors()
+        p = s["pump_pressure_bar"]
+        lo = p if lo is None else min(lo, p)
+        hi = p if hi is None else max(hi, p)
+        try:
+            check_limits(SimpleNamespace(latest=s), crit)
+        except RuntimeError:
+            trips += 1
+    # noise stays well inside the limits, not just on them
+    assert lo > crit.pressure_min_bar + 0.25
+    assert hi < crit.pressure_max_bar - 0.25
+    return trips
+
+
+def test_seeded_noise_never_trips_limits_at_idle():
+    for seed in (1, 2, 3):
+        assert _trips(SystemController(seed=seed)) == 0
+
+
+def test_seeded_noise_never_trips_limits_after_safe_stop():
+    for seed in (1, 2, 3):
+        ctrl = SystemController(seed=seed)
+        asyncio.run(ctrl.safe_stop())
+        assert _trips(ctrl) == 0
+
+
+def test_same_seed_same_readings():
+    a, b = SystemController(seed=7), SystemController(seed=7)
+    for _ in range(100):
+        sa, sb = a.sensors(), b.sensors()
+        sa.pop("ts")
+        sb.pop("ts")
+        assert sa == sb